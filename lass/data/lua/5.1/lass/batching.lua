@@ -0,0 +1,460 @@
+local class = require("lass.class")
+
+--[[
+RenderBatches
+
+draws the renderers of each z value together, instead of one at a time. renderers
+opt in by setting batchKind:
+
+	"sprites" - the renderer is one image, drawn from a SpriteBatch.
+		renderer:batchKey() returns a value that is the same for renderers with the
+		same texture (e.g. the image's filename), renderer.image is the texture, and
+		renderer:spriteArguments() returns the x, y, r, sx, sy, ox and oy arguments
+		of love.graphics.draw
+	"mesh" - the renderer is an outline, drawn from a Mesh of triangles.
+		renderer:batchKey() returns the draw mode ("fill" or "line"), and
+		renderer:screenOutline(points) fills points with the x and y values of the
+		outline's vertices in screen space, and returns how many values it wrote
+
+renderers with the same kind, key and canvas share a batch. a batch is only rebuilt
+when its members change. otherwise, a member is only written again when its global
+transform, color, shape (for meshes), or image and offset (for sprites) have changed
+since the last frame. changes made inside a shape's properties, such as moving one
+vertex of a polygon, are not noticed; assign the property again instead.
+
+within a z value, the batches are drawn just before the next renderer that can't be
+batched, so that they stay between the renderers drawn before and after them. batches
+drawn at the same point are drawn in the order they were first used.
+]]
+
+--[[internal]]
+
+local LINE_WIDTH = 1
+
+local function color(renderer)
+
+	local c = renderer.color
+	return c[1] or 255, c[2] or 255, c[3] or 255, c[4] or 255
+end
+
+local function writeVertex(vertices, n, x, y, r, g, b, a)
+
+	local i = (n - 1) * 6
+	vertices[i + 1], vertices[i + 2] = x, y
+	vertices[i + 3], vertices[i + 4], vertices[i + 5], vertices[i + 6] = r, g, b, a
+end
+
+local function outlineTriangles(vertices, n, points, count, mode, r, g, b, a)
+	--write the triangles covering the outline in points (count x and y values) into
+	--vertices after the first n vertices, and return the new number of vertices
+
+	if mode == "line" then
+		--each side is a thin rectangle
+		for i = 1, count, 2 do
+			local x1, y1 = points[i], points[i + 1]
+			local x2, y2 = points[(i + 1) % count + 1], points[(i + 2) % count + 1]
+			local dx, dy = x2 - x1, y2 - y1
+			local length = math.sqrt(dx * dx + dy * dy)
+
+			if length > 0 then
+				local nx, ny = -dy / length * LINE_WIDTH / 2, dx / length * LINE_WIDTH / 2
+
+				writeVertex(vertices, n + 1, x1 + nx, y1 + ny, r, g, b, a)
+				writeVertex(vertices, n + 2, x2 + nx, y2 + ny, r, g, b, a)
+				writeVertex(vertices, n + 3, x2 - nx, y2 - ny, r, g, b, a)
+				writeVertex(vertices, n + 4, x1 + nx, y1 + ny, r, g, b, a)
+				writeVertex(vertices, n + 5, x2 - nx, y2 - ny, r, g, b, a)
+				writeVertex(vertices, n + 6, x1 - nx, y1 - ny, r, g, b, a)
+				n = n + 6
+			end
+		end
+	else
+		--a fan from the first vertex, like love.graphics.polygon (which also assumes
+		--that the outline is convex)
+		for i = 3, count - 3, 2 do
+			writeVertex(vertices, n + 1, points[1], points[2], r, g, b, a)
+			writeVertex(vertices, n + 2, points[i], points[i + 1], r, g, b, a)
+			writeVertex(vertices, n + 3, points[i + 2], points[i + 3], r, g, b, a)
+			n = n + 3
+		end
+	end
+
+	return n
+end
+
+local function memberChanged(batch, i, renderer)
+	--return whether the i-th member of batch may look different from when it was
+	--last written, and remember how it looks now
+
+	local stamps = batch.stamps
+	local stamp = stamps[i]
+	if not stamp then
+		stamp = {}
+		stamps[i] = stamp
+	end
+
+	local transform = renderer.gameObject.globalTransform
+	local r, g, b, a = color(renderer)
+	local ySign = renderer.globals.ySign
+	local source, x, y
+
+	if batch.kind == "sprites" then
+		local offset = renderer.offset
+		source, x, y = renderer.image, offset and offset.x, offset and offset.y
+	else
+		source = renderer.shape
+		x = source._version
+	end
+
+	if
+		rawequal(stamp[1], transform) and stamp[2] == transform._version and
+		rawequal(stamp[3], source) and stamp[4] == x and stamp[5] == y and
+		stamp[6] == r and stamp[7] == g and stamp[8] == b and stamp[9] == a and
+		stamp[10] == ySign
+	then
+		return false
+	end
+
+	stamp[1], stamp[2], stamp[3], stamp[4], stamp[5] = transform, transform._version, source, x, y
+	stamp[6], stamp[7], stamp[8], stamp[9], stamp[10] = r, g, b, a, ySign
+
+	return true
+end
+
+local function writeTriangles(self, vertices, n, renderer, mode)
+	--write the triangles covering a renderer's outline into vertices after the
+	--first n vertices, and return the new number of vertices
+
+	local points = self.points
+	local count = renderer:screenOutline(points)
+	local r, g, b, a = color(renderer)
+
+	return outlineTriangles(vertices, n, points, count, mode, r, g, b, a)
+end
+
+local function uploadVertices(batch, first, last)
+
+	local mesh, vertices = batch.drawable, batch.vertices
+
+	for n = first, last do
+		local i = (n - 1) * 6
+		mesh:setVertex(
+			n, vertices[i + 1], vertices[i + 2], 0, 0,
+			vertices[i + 3], vertices[i + 4], vertices[i + 5], vertices[i + 6]
+		)
+	end
+end
+
+local function updateMesh(self, batch)
+
+	local members, ranges = batch.members, batch.ranges
+	local vertices, scratch = batch.vertices, self.scratch
+	local n = 0
+
+	for i = 1, batch.count do
+		local renderer = members[i]
+		local changed = memberChanged(batch, i, renderer)
+
+		if batch.rebuild then
+			n = writeTriangles(self, vertices, n, renderer, batch.key)
+			ranges[i] = n
+		else
+			local first, last = n + 1, ranges[i]
+
+			if changed then
+				local count = writeTriangles(self, scratch, 0, renderer, batch.key)
+
+				if n + count ~= last then
+					--the member's number of vertices changed, so the ones after it have moved
+					batch.rebuild = true
+					return updateMesh(self, batch)
+				end
+
+				local offset = n * 6
+				local upload = false
+
+				for j = 1, count * 6 do
+					if vertices[offset + j] ~= scratch[j] then
+						vertices[offset + j] = scratch[j]
+						upload = true
+					end
+				end
+
+				if upload then
+					uploadVertices(batch, first, last)
+				end
+			end
+
+			n = last
+		end
+	end
+
+	for i = batch.count + 1, #ranges do
+		ranges[i] = nil
+	end
+	for i = batch.count + 1, #batch.stamps do
+		batch.stamps[i] = nil
+	end
+
+	batch.vertexCount = n
+
+	if n == 0 then
+		return
+	end
+
+	if batch.rebuild then
+		local capacity = batch.drawable and batch.drawable:getVertexCount() or 0
+
+		if capacity < n then
+			batch.drawable = love.graphics.newMesh(math.max(n, capacity * 2), "triangles", "dynamic")
+		end
+		uploadVertices(batch, 1, n)
+	end
+
+	batch.drawable:setDrawRange(1, n)
+end
+
+local function updateSprites(self, batch)
+
+	local members, sprites = batch.members, batch.sprites
+	local spriteBatch = batch.drawable
+
+	if batch.rebuild then
+		if not spriteBatch or batch.capacity < batch.count then
+			batch.capacity = math.max(batch.count, (batch.capacity or 0) * 2)
+			spriteBatch = love.graphics.newSpriteBatch(members[1].image, batch.capacity, "dynamic")
+			batch.drawable = spriteBatch
+		end
+		spriteBatch:clear()
+	end
+
+	for i = 1, batch.count do
+		local renderer = members[i]
+		local s = sprites[i]
+
+		if not s then
+			s = {}
+			sprites[i] = s
+		end
+
+		if memberChanged(batch, i, renderer) or batch.rebuild then
+			local x, y, rotation, sx, sy, ox, oy = renderer:spriteArguments()
+			local r, g, b, a = color(renderer)
+
+			if
+				batch.rebuild or
+				s[1] ~= x or s[2] ~= y or s[3] ~= rotation or s[4] ~= sx or s[5] ~= sy or
+				s[6] ~= ox or s[7] ~= oy or s[8] ~= r or s[9] ~= g or s[10] ~= b or s[11] ~= a
+			then
+				s[1], s[2], s[3], s[4], s[5], s[6], s[7] = x, y, rotation, sx, sy, ox, oy
+				s[8], s[9], s[10], s[11] = r, g, b, a
+
+				spriteBatch:setColor(r, g, b, a)
+
+				if batch.rebuild then
+					s.id = spriteBatch:add(x, y, rotation, sx, sy, ox, oy)
+				else
+					spriteBatch:set(s.id, x, y, rotation, sx, sy, ox, oy)
+				end
+			end
+		end
+	end
+
+	for i = batch.count + 1, #sprites do
+		sprites[i] = nil
+		batch.stamps[i] = nil
+	end
+end
+
+--[[public]]
+
+local RenderBatches = class.define(function(self)
+
+	-- layers[z] holds the batches used at z. they are grouped into runs: the batches
+	-- drawn together between two renderers that can't be batched. run.batches[canvas][key]
+	-- is a batch, and run.order lists the batches of the run used in the current frame
+	self.layers = {}
+	self.frame = 0
+	-- scratch space for outlines, and for the vertices of one renderer
+	self.points = {}
+	self.scratch = {}
+end)
+
+--the triangulation used by the meshes, for renderers that build their own.
+--vertices is a flat list with six values (x, y, r, g, b and a) per vertex
+RenderBatches.outlineTriangles = outlineTriangles
+
+function RenderBatches:beginFrame()
+
+	self.frame = self.frame + 1
+end
+
+function RenderBatches:beginLayer(z)
+
+	local layer = self.layers[z]
+
+	if not layer then
+		layer = {runs = {}}
+		self.layers[z] = layer
+	end
+
+	layer.used = 0
+	layer.frame = self.frame
+	self.layer = layer
+	self.run = nil
+end
+
+function RenderBatches:drawObject(object)
+	--draw a game object's components, or add them to their batches
+
+	if not object.active then
+		return
+	end
+
+	for i, component in ipairs(object.components) do
+		if component.draw then
+			if component.batchKind then
+				self:add(component)
+			else
+				--the batched renderers before this one have to be drawn under it
+				self:flush()
+				component:draw()
+			end
+		end
+	end
+end
+
+function RenderBatches:add(renderer)
+
+	local run = self.run
+
+	if not run then
+		local layer = self.layer
+		layer.used = layer.used + 1
+
+		run = layer.runs[layer.used]
+		if not run then
+			run = {batches = {}, order = {}}
+			layer.runs[layer.used] = run
+		end
+
+		for i = #run.order, 1, -1 do
+			run.order[i] = nil
+		end
+
+		self.run = run
+	end
+
+	local canvas = renderer.canvas
+	local key = renderer:batchKey()
+
+	local byCanvas = run.batches[canvas]
+	if not byCanvas then
+		byCanvas = {}
+		run.batches[canvas] = byCanvas
+	end
+
+	local batch = byCanvas[key]
+	if not batch or batch.kind ~= renderer.batchKind then
+		batch = {
+			kind = renderer.batchKind,
+			key = key,
+			members = {},
+			-- sprites
+			sprites = {},
+			-- mesh: the vertices, and the number of vertices up to the end of each member
+			vertices = {},
+			ranges = {},
+			-- how each member looked when it was last written
+			stamps = {},
+		}
+		byCanvas[key] = batch
+	end
+
+	if batch.frame ~= self.frame then
+		batch.frame = self.frame
+		batch.count = 0
+		batch.rebuild = false
+		run.order[#run.order + 1] = batch
+	end
+
+	local n = batch.count + 1
+	batch.count = n
+
+	if batch.members[n] ~= renderer then
+		batch.members[n] = renderer
+		batch.rebuild = true
+	end
+end
+
+function RenderBatches:flush()
+	--update and draw the batches that renderers have been added to since the last flush
+
+	local run = self.run
+	if not run then
+		return
+	end
+
+	for i, batch in ipairs(run.order) do
+		local members = batch.members
+
+		if #members > batch.count then
+			for j = batch.count + 1, #members do
+				members[j] = nil
+			end
+			batch.rebuild = true
+		end
+
+		local draw = true
+
+		if batch.kind == "sprites" then
+			updateSprites(self, batch)
+		else
+			updateMesh(self, batch)
+			draw = batch.vertexCount > 0
+		end
+
+		if draw then
+			members[1]:resetCanvas()
+			love.graphics.setColor(255, 255, 255)
+			love.graphics.draw(batch.drawable)
+		end
+	end
+
+	self.run = nil
+end
+
+function RenderBatches:endLayer()
+	--draw the rest of the batches used in the current layer
+
+	self:flush()
+
+	local layer = self.layer
+	for i = layer.used + 1, #layer.runs do
+		layer.runs[i] = nil
+	end
+
+	self.layer = nil
+end
+
+function RenderBatches:endFrame()
+	--release the batches that weren't used in the current frame
+
+	for z, layer in pairs(self.layers) do
+		if layer.frame ~= self.frame then
+			self.layers[z] = nil
+		else
+			for i, run in ipairs(layer.runs) do
+				for canvas, byCanvas in pairs(run.batches) do
+					for key, batch in pairs(byCanvas) do
+						if batch.frame ~= self.frame then
+							byCanvas[key] = nil
+						end
+					end
+				end
+			end
+		end
+	end
+end
+
+return RenderBatches
@@ -2,6 +2,7 @@ local lass = require("lass")
 local class = require("lass.class")
 local geometry = require("lass.geometry")
 local collections = require("lass.collections")
+local KeyPath = require("lass.keypath")
 
 --[[
 PeriodicInterpolator - a class for smoothly and periodically modifying gameObject parameters.
@@ -26,6 +27,12 @@ arguments (optional):
 	    be infinite.
 	period (number, default=1) - duration of the interpolation in seconds.
 		or, if sampleLength is infinite, rate at which X increases.
+	clock (string, default=nil) - the name of a time base to share with other interpolators.
+		interpolators with the same clock have the same X, and Y is only calculated once per
+		frame for all of them, by the first one to update. they should have the same
+		ifunction, amplitude, offset, sampleLength and period. the clock only runs while at
+		least one of its interpolators is playing; playing or stopping one interpolator does
+		not move the clock, but seeking does.
 ]]
 
 
@@ -46,12 +53,68 @@ local PeriodicInterpolator = class.define(lass.Component, function(self, argumen
 	arguments.sampleLength = arguments.sampleLength or math.pi*2 --math.huge is valid
 
 	lass.Component.init(self, arguments)
+	self.targetPaths = {}
 end)
 
+--[[internal]]
+
+local function getClock(self)
+
+	local clocks = self.globals.interpolatorClocks
+	local clock = clocks[self.clock]
+
+	if not clock then
+		clock = {x = self.offset.x, y = 0}
+		clocks[self.clock] = clock
+	end
+
+	return clock
+end
+
+local function rewind(self)
+	--an interpolator with a clock keeps to the clock's time instead of starting over
+
+	if not self.clock then
+		self:seek(0)
+	end
+end
+
+local function advance(self, state, dt)
+	--move state.x forward by dt and calculate state.y.
+	--returns true if x has completed a cycle and wrapped around
+
+	local tmp = state.x
+
+	if self.sampleLength ~= math.huge then
+		state.x = (state.x + dt * (1 / self.period) * self.sampleLength)
+		--wrap around to offset
+		state.x = ((state.x - self.offset.x) % self.sampleLength) + self.offset.x
+	--if sample length is infinite, x should increase forever
+	else
+		state.x = state.x + dt * (1 / self.period)
+	end
+
+	-- if x is lower than tmp, we have completed a cycle and wrapped around
+	local wrapped = state.x < tmp
+	if wrapped then
+		state.x = self.offset.x
+	end
+
+	state.y = (self.ifunction(state.x) * self.amplitude) + self.offset.y
+
+	return wrapped
+end
+
+--[[public]]
+
 function PeriodicInterpolator:awake()
 
 	self.lastY = 0
-	self:seek(0)
+	if self.clock then
+		self.x = getClock(self).x
+	else
+		self:seek(0)
+	end
 	self.plays = 0
 	self.maxPlays = math.huge
 
@@ -64,7 +127,7 @@ end
 function PeriodicInterpolator:play(timesToRepeat)
 
 	if self.playing then
-		self:seek(0)
+		rewind(self)
 
 		--only reset maxPlays when unpausing if timesToRepeat is specified
 		if timesToRepeat then
@@ -81,7 +144,7 @@ end
 function PeriodicInterpolator:playForever()
 
 	if self.playing then
-		self:seek(0)
+		rewind(self)
 	else
 		self.playing = true
 	end
@@ -94,7 +157,7 @@ function PeriodicInterpolator:stop()
 	self.playing = false
 	self.plays = 0
 	self.maxPlays = 1
-	self:seek(0)
+	rewind(self)
 end
 
 function PeriodicInterpolator:pause()
@@ -103,12 +166,17 @@ function PeriodicInterpolator:pause()
 end
 
 function PeriodicInterpolator:seek(x)
+	--with a clock, this moves every interpolator that shares it
 
 	if self.sampleLength ~= math.huge then
 		self.x = (x % self.sampleLength) + self.offset.x
 	else
 		self.x = x + self.offset.x
 	end
+
+	if self.clock then
+		getClock(self).x = self.x
+	end
 end
 
 function PeriodicInterpolator:update(dt)
@@ -120,36 +188,37 @@ function PeriodicInterpolator:update(dt)
 		return
 	end
 
-	local targets = {}
-	for i, t in ipairs(self.targets) do
-		local object, key = collections.getkey(self, unpack(t))
-		targets[i] = {object, key}
-	end
+	local wrapped
 
-	local tmp = self.x
+	if self.clock then
+		local clock = getClock(self)
+		local frame = self.gameScene.frame
 
-	if self.sampleLength ~= math.huge then
-		self.x = (self.x + dt * (1 / self.period) * self.sampleLength)
-		--wrap around to offset
-		self.x = ((self.x - self.offset.x) % self.sampleLength) + self.offset.x
-	--if sample length is infinite, x should increase forever
+		if clock.frame ~= frame then
+			clock.wrapped = advance(self, clock, dt)
+			clock.frame = frame
+		end
+
+		wrapped = clock.wrapped
+		self.x, self.y = clock.x, clock.y
 	else
-		self.x = self.x + dt * (1 / self.period)
+		wrapped = advance(self, self, dt)
 	end
 
-	-- if x is lower than tmp, we have completed a cycle and wrapped around
-	if self.x < tmp then
+	if wrapped then
 		self.plays = self.plays + 1
-		self.x = self.offset.x
 	end
 
-	self.y = (self.ifunction(self.x) * self.amplitude) + self.offset.y
+	local delta = self.y - self.lastY
+	local paths = KeyPath.compileList(self.targetPaths, self.targets)
+
+	for i = 1, #paths do
+		local object, key = paths[i]:resolve(self)
 
-	for i, target in ipairs(targets) do
-		if type(target[2]) == "function" then
-			target[1][target[2]](target[1], self.y - self.lastY)
+		if type(key) == "function" then
+			object[key](object, delta)
 		else
-			target[1][target[2]] = target[1][target[2]] + (self.y - self.lastY)
+			object[key] = object[key] + delta
 		end
 	end
 
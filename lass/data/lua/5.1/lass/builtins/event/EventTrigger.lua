@@ -2,19 +2,38 @@ local lass = require("lass")
 local class = require("lass.class")
 local geometry = require("lass.geometry")
 
+--[[
+EventTrigger - posts events when its conditions are met
+
+arguments:
+	events (table) - names of events to play, or {name, action} pairs
+	conditions (table) - the callbacks that trigger the events, mapped to true, a function,
+		or a table of the callback arguments to match
+	queued (boolean) - deliver the events at the end of the scene's update instead of right
+		away, coalescing repeated triggers in the same frame (see GameScene:queueEvent)
+	priority (number) - the priority of queued events
+]]
+
 local EventTrigger = class.define(lass.Component, function(self, arguments)
 
 	arguments.events = arguments.events or {}
+	arguments.queued = arguments.queued or false
+	arguments.priority = arguments.priority or 0
 	lass.Component.init(self, arguments)
 end)
 
 local function postEvents(self)
 
 	for i, event in ipairs(self.events) do
-		if type(event) == "string" then
-			self.globals.events[event]:play(self)
-		elseif type(event) == "table" then
-			self.globals.events[event[1]]:post(event[2], self)
+		local name, action = event, "play"
+		if type(event) == "table" then
+			name, action = event[1], event[2]
+		end
+
+		if self.queued then
+			self.gameScene:queueEvent(name, action, self, nil, self.priority)
+		else
+			self.globals.events[name]:post(action, self)
 		end
 	end
 end
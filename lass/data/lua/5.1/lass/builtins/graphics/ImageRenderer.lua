@@ -30,28 +30,41 @@ function ImageRenderer:awake()
 	Renderer.awake(self)
 end
 
-function ImageRenderer:draw()
+function ImageRenderer:spriteArguments(globalTransform)
+	--return the arguments of love.graphics.draw that come after the image
+	--globalTransform defaults to the game object's global transform
 
-	local globalTransform = self.gameObject.globalTransform
+	globalTransform = globalTransform or self.gameObject.globalTransform
+	local position, size = globalTransform.position, globalTransform.size
 	local ySign = self.globals.ySign
 	local width, height = self.image:getDimensions()
 
+	return
+		position.x,
+		-- position.x - width/2,
+		position.y * ySign,
+		-- (position.y + height/2) * ySign,
+		(globalTransform.rotation/180) * math.pi,
+		size.x,
+		size.y,
+		-self.offset.x + width/2,
+		(-self.offset.y - height/2) * ySign
+end
+
+function ImageRenderer:draw()
+
 	-- love.graphics.setCanvas(self.globals.canvases[self.canvas])
 	self:resetCanvas()
 
 	love.graphics.setColor(self.color)
-	love.graphics.draw(
-		self.image,
-		globalTransform.position.x,
-		-- globalTransform.position.x - width/2,
-		(globalTransform.position.y) * ySign,
-		-- (globalTransform.position.y + height/2) * ySign,
-		(globalTransform.rotation/180) * math.pi,
-		globalTransform.size.x,
-		globalTransform.size.y,
-		-self.offset.x + width/2,
-		(-self.offset.y - height/2) * ySign
-	)
+	love.graphics.draw(self.image, self:spriteArguments())
+end
+
+--images loaded from the same file can be drawn together from a SpriteBatch
+ImageRenderer.batchKind = "sprites"
+
+function ImageRenderer:batchKey()
+	return self.filename
 end
 
 function ImageRenderer:update()
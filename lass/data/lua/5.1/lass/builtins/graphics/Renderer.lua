@@ -18,7 +18,7 @@ end)
 function Renderer:awake()
 
 	if not self.gameObject:getComponent(Camera) then
-		self.globals.drawables[self.gameObject] = true
+		self.gameScene:addDrawable(self.gameObject)
 		self.globals.canvases[self.canvas] = self.globals.canvases[self.canvas] or love.graphics.newCanvas()
 	end
 end
@@ -31,7 +31,7 @@ function Renderer:deactivate()
 
 	--if this is the only renderer on the object, remove the object from drawables
 	if #renderers == 1 then
-		self.globals.drawables[self.gameObject] = nil
+		self.gameScene:removeDrawable(self.gameObject)
 	end
 
 	lass.Component.deactivate(self)
@@ -50,7 +50,7 @@ end
 
 function Renderer:detach()
 
-	self.globals.drawables[self.gameObject] = nil
+	self.gameScene:removeDrawable(self.gameObject)
 end
 
 return Renderer
@@ -85,4 +85,55 @@ function ShapeRenderer:draw()
 	end
 end
 
+--shapes with the same draw mode can be drawn together from a Mesh
+ShapeRenderer.batchKind = "mesh"
+
+function ShapeRenderer:batchKey()
+	return self.mode
+end
+
+function ShapeRenderer:screenOutline(points, globalTransform)
+	--write the x and y values of the shape's vertices, where draw would put them,
+	--into points. returns the number of values written
+	--globalTransform defaults to the game object's global transform
+
+	globalTransform = globalTransform or self.gameObject.globalTransform
+	local ySign = self.globals.ySign
+	local n = 0
+
+	if class.instanceof(self.shape, geometry.Rectangle) and globalTransform.rotation == 0 then
+		local rect = self.shape:globalRectangle(globalTransform)
+		local x = rect.position.x - (rect.width / 2)
+		local y = (rect.position.y + (rect.height / 2)) * ySign
+
+		--the corners of love.graphics.rectangle
+		points[1], points[2] = x, y
+		points[3], points[4] = x + rect.width, y
+		points[5], points[6] = x + rect.width, y + rect.height
+		points[7], points[8] = x, y + rect.height
+		n = 8
+
+	elseif class.instanceof(self.shape, geometry.Rectangle, geometry.Polygon) then
+		for i, vertex in ipairs(self.shape:globalVertices(globalTransform)) do
+			points[n + 1], points[n + 2] = vertex.x, vertex.y * ySign
+			n = n + 2
+		end
+
+	elseif class.instanceof(self.shape, geometry.Circle) then
+		local circle = self.shape:globalCircle(globalTransform)
+		local x, y, radius = circle.position.x, circle.position.y * ySign, circle.radius
+
+		--the same number of segments as love.graphics.circle uses by default
+		local segments = radius > 10 and math.floor(radius) or 10
+
+		for i = 0, segments - 1 do
+			local angle = (i / segments) * 2 * math.pi
+			points[n + 1], points[n + 2] = x + radius * math.cos(angle), y + radius * math.sin(angle)
+			n = n + 2
+		end
+	end
+
+	return n
+end
+
 return ShapeRenderer
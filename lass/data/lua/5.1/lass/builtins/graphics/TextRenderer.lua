@@ -63,14 +63,13 @@ end
 
 function TextRenderer:draw()
 
-	local gt = self.gameObject.globalTransform
+	local gt = geometry.Transform(self.gameObject.globalTransform)
 	local size = gt.size
 	local r = math.rad(gt.rotation)
 	local ySign = self.globals.ySign
 
 	--set size to 1, so we can use the draw function for scaling.
-	--note that globalTransform is accessed via a getter, so modifying it
-	--isn't permanent
+	--globalTransform is cached and read-only, so this is done on a copy
 	gt.size = geometry.Vector3(1,1,1)
 	local rect = self.box:globalRectangle(gt)
 
@@ -2,18 +2,21 @@ local lass = require("lass")
 local class = require("lass.class")
 local geometry = require("lass.geometry")
 local collections = require("lass.collections")
+local KeyPath = require("lass.keypath")
 
 local MouseClickHandler = class.define(lass.Component, function(self, arguments)
 
 	arguments.targetArguments = arguments.targetArguments or {}
 	lass.Component.init(self, arguments)
+	self.targetPaths = {}
 end)
 
 local function mouseEvent(self, f, x, y, button, clickedOnSelf)
 
+	local paths = KeyPath.compileList(self.targetPaths, self.targets)
 	local targets = {}
-	for i, t in ipairs(self.targets) do
-		local object, key = collections.getkey(self, unpack(t))
+	for i, path in ipairs(paths) do
+		local object, key = path:resolve(self)
 		targets[i] = {object, key}
 	end
 
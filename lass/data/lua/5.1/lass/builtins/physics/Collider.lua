@@ -19,6 +19,9 @@ arguments (optional):
 	layers (list, default={"main"}) - names of layers to add the collider to.
 	layersToCheck (list, default=layers) - names of layers to check against for collisions.
 	solid (boolean, default=false) - if true, rigidbodies cannot pass through this object.
+	clickable (boolean, default=nil) - if true, the mousepressed and mousereleased callbacks
+		of the object's components are told when the cursor is over this collider.
+		only the first Collider of an object can be clickable.
 ]]
 
 local Collider = class.define(lass.Component, function(self, arguments)
@@ -39,6 +42,23 @@ local Collider = class.define(lass.Component, function(self, arguments)
 
 end)
 
+local function updateClickable(self)
+	--add the collider to the scene's click grid, or remove it, to match self.clickable
+
+	local globals = self.globals
+	if not (self.gameObject and globals.clickableColliders) then
+		return
+	end
+
+	if self._clickable == true and self.active then
+		globals.clickableColliders[self] = true
+		globals.clickGrid:update(self, self.shape:globalBounds(self.gameObject.globalTransform))
+	else
+		globals.clickableColliders[self] = nil
+		globals.clickGrid:remove(self)
+	end
+end
+
 local function shapeToPhysicsShape(self, shape, physicsShape, oldTransform)
 	-- create or modify a physics shape using a geometry.Shape
 
@@ -118,9 +138,10 @@ function Collider.__set.solid(self, value)
 		if value == true then
 			if (self.body and self.body:isDestroyed()) or not self.body then
 				local pos = self.gameObject.globalTransform.position
-				pos.y = pos.y * self.globals.ySign
 
-				self.body = love.physics.newBody(self.globals.physicsWorld, pos.x, pos.y, "static")
+				self.body = love.physics.newBody(
+					self.globals.physicsWorld, pos.x, pos.y * self.globals.ySign, "static"
+				)
 				self.fixture = love.physics.newFixture(self.body, shapeToPhysicsShape(self, self.shape), 1)
 			end
 		elseif value == false and self.body and not self.body:isDestroyed() then
@@ -140,6 +161,17 @@ function Collider.__set.solid(self, value)
 	end
 end
 
+function Collider.__get.clickable(self)
+
+	return self._clickable
+end
+
+function Collider.__set.clickable(self, value)
+
+	self._clickable = value
+	updateClickable(self)
+end
+
 function Collider.__get.fixture(self)
 
 	return self._fixture
@@ -317,6 +349,8 @@ function Collider:awake(firstAwake)
 		end
 	end
 
+	updateClickable(self)
+
 	self.gameScene:addEventListener("physicsPreUpdate", self.gameObject, true)
 	self.gameScene:addEventListener("physicsPostUpdate", self.gameObject, true)
 
@@ -412,8 +446,15 @@ function Collider:deactivate()
 		assert(index, "Collider missing from globals.colliders." .. layerName)
 
 		table.remove(layer, index)
+
+		if self.globals.collisionGrids[layerName] then
+			self.globals.collisionGrids[layerName]:remove(self)
+		end
 	end
 
+	self.globals.clickableColliders[self] = nil
+	self.globals.clickGrid:remove(self)
+
 	if self.body and not self.rigidbody then
 		self.body:destroy()
 	end
@@ -498,7 +539,14 @@ function Collider:detach()
 	for i, layer in ipairs(self.layers) do
 		l = self.globals.colliders[layer]
 		table.remove(l, collections.index(l, self))
+
+		if self.globals.collisionGrids[layer] then
+			self.globals.collisionGrids[layer]:remove(self)
+		end
 	end
+
+	self.globals.clickableColliders[self] = nil
+	self.globals.clickGrid:remove(self)
 end
 
 return Collider
@@ -10,311 +10,212 @@ local SimpleRigidbody = class.define(lass.Component, function(self, arguments)
 	arguments.velocity = geometry.Vector2(arguments.velocity)
 
 	self.collisions = {}
+	-- the colliders each of this body's colliders could hit, gathered once per frame
+	self.candidates = {}
+	-- counts of the last update's work: colliders gathered as candidates, pairs of
+	-- colliders swept against each other, and moves
+	self.stats = {candidates = 0, pairs = 0, iterations = 0}
 	lass.Component.init(self, arguments)
 end)
 
-local function checkCollisions(gameObject, oldPositions, moveBy, alwaysFailOnCollision)
+--[[internal]]
 
+-- contacts closer together than this (as a fraction of a move) are treated as one
+local CONTACT_EPSILON = 1e-9
 
-	local directionOverlaps = {}
-	local collisions = {}
-	local others = {}
+local function gatherColliders(gameObject, colliders, own)
+	--list the solid colliders of a game object and its descendants, which all move together
 
-	-- we need to update the global transform for the collision detection to work immediately
-	gameObject:maintainTransform()
+	colliders = colliders or {}
+	own = own or {}
+
+	local collider = gameObject:getComponent(Collider)
+	if collider and collider.solid then
+		colliders[#colliders + 1] = collider
+		own[collider] = true
+	end
 
 	for i, child in ipairs(gameObject.children) do
-		local cols, overlaps = checkCollisions(child, oldPositions, moveBy)
-		if cols then
-			for j, col in ipairs(cols) do
-				collisions[#collisions + j] = col
-			end
-			for j, over in ipairs(overlaps) do
-				directionOverlaps[#directionOverlaps + j] = over
-			end
-		else
-			gameObject.transform.position = oldPositions[gameObject]
-			--reset transform of every descendant except the child and its descendants
-			--(because they've already been reset)
-			gameObject:maintainTransform(true, child)
-			return false
+		gatherColliders(child, colliders, own)
+	end
+
+	return colliders, own
+end
+
+local function checksLayer(layersToCheck, layers)
+
+	for i, layerName in ipairs(layers) do
+		if collections.index(layersToCheck, layerName) then
+			return true
 		end
 	end
 
-	local collider = gameObject:getComponent(Collider)
-	if not (collider and collider.solid) then
-		return {}, {}
+	return false
+end
+
+local function getCandidates(self, collider)
+	--return the colliders in the layers that collider checks, and the colliders that check
+	--collider's layers. they are gathered once per frame, and shared by every move in it
+
+	local frame = self.gameScene.frame
+
+	if self.candidates.frame ~= frame then
+		self.candidates = {frame = frame}
+	end
+
+	local candidates = self.candidates[collider]
+	if candidates then
+		return candidates
 	end
 
+	candidates = {}
+	local added = {}
+
 	for layerName, layer in pairs(collider.globals.colliders) do
-		-- add everything from layersToCheck to possible collisions
-		if collections.index(collider.layersToCheck, layerName) then
-			others[layerName] = collections.copy(layer)
-		-- add everything whose layersToCheck include this collider's layers
-		else
-			for i, o in ipairs(layer) do
-				for j, layerName2 in ipairs(collider.layers) do
-					if collections.index(o.layersToCheck, layerName2) then
-						if others[layerName2] then
-							others[layerName2][#others[layerName2]] = o
-						else
-							others[layerName2] = {o}
-						end
-						break
-					end
-				end
+		local checked = collections.index(collider.layersToCheck, layerName) ~= nil
+
+		for i, other in ipairs(layer) do
+			if
+				not added[other] and
+				other ~= collider and
+				(checked or checksLayer(other.layersToCheck, collider.layers))
+			then
+				added[other] = true
+				candidates[#candidates + 1] = other
 			end
 		end
 	end
 
-	for layerName, layer in pairs(others) do
-		for i, other in ipairs(layer) do
+	self.candidates[collider] = candidates
+	self.stats.candidates = self.stats.candidates + #candidates
 
-			if other ~= collider and other.solid then
-
-				local r, data
-				local oldData = collider.collidingWith[other]
-				local oldDataNeg = collider.notCollidingWith[other]
-
-				r, data = collider:isCollidingWith(other, moveBy, false, not alwaysFailOnCollision)
-
-				if r then
-					debug.log(other.gameObject.name, data.shortestOverlap, data.directionOverlap)
-					-- return false if we were already colliding with this collider,
-					-- and the overlap increased
-
-					if (
-						oldData and
-						oldData.frame == gameObject.gameScene.frame - 1 and (
-							(
-								oldData.directionOverlap and
-								data.directionOverlap and
-								oldData.directionOverlap < data.directionOverlap and
-								oldData.direction:angle() == data.direction:angle()
-							) or
-							oldData.shortestOverlap < data.shortestOverlap
-						)
-					) then
-						debug.log(other.gameObject.name, oldData.shortestOverlap, oldData.directionOverlap, "overlap increased")
-
-						gameObject.transform.position = oldPositions[gameObject]
-						gameObject:maintainTransform()
-
-						--reset collision data
-						if not alwaysFailOnCollision then
-							collider.collidingWith[other] = collections.deepcopy(oldData)
-							collider.collidingWith[other].frame = gameObject.gameScene.frame
-							other.collidingWith[collider] = collections.deepcopy(oldData)
-							other.collidingWith[collider].frame = gameObject.gameScene.frame
-						end
+	return candidates
+end
+
+local function sweep(self, colliders, own, moveBy)
+	--find how far along moveBy the colliders can move before one of them touches a solid
+	--collider. returns the fraction of moveBy, and the pairs that touch at that point as
+	--{other, collider, normal}. returns nil if nothing is in the way
+
+	local first, hits = math.huge, nil
 
-						return false
-					-- only add colliders that we weren't already colliding with, and have non-zero overlap
-					elseif
-						(not oldData or oldData.frame < gameObject.gameScene.frame - 1) and
-						data.shortestOverlap ~= 0
-					then
-						debug.log(other.gameObject.name, "nonzero overlap")
-
-						if alwaysFailOnCollision then
-							gameObject.transform.position = oldPositions[gameObject]
-							gameObject:maintainTransform()
-							return false
-						else
-							collisions[#collisions + 1] = {other, collider}
-							if data.directionOverlap then
-								directionOverlaps[#directionOverlaps + 1] = data.directionOverlap
-							end
+	for i, collider in ipairs(colliders) do
+
+		local transform = collider.gameObject.globalTransform
+		local minX, minY, maxX, maxY = collider.shape:globalBounds(transform)
+
+		--the box covering the whole move
+		minX, maxX = minX + math.min(moveBy.x, 0), maxX + math.max(moveBy.x, 0)
+		minY, maxY = minY + math.min(moveBy.y, 0), maxY + math.max(moveBy.y, 0)
+
+		for j, other in ipairs(getCandidates(self, collider)) do
+
+			local otherTransform = other.gameObject.globalTransform
+
+			if
+				other.solid and
+				not own[other] and
+				(
+					transform.position.z == otherTransform.position.z or
+					collider.ignoreZ or
+					other.ignoreZ
+				)
+			then
+				local otherMinX, otherMinY, otherMaxX, otherMaxY = other.shape:globalBounds(otherTransform)
+
+				if otherMinX <= maxX and otherMaxX >= minX and otherMinY <= maxY and otherMaxY >= minY then
+					self.stats.pairs = self.stats.pairs + 1
+
+					local t, normal = geometry.timeOfImpact(
+						collider.shape, other.shape, transform, otherTransform, moveBy
+					)
+
+					if t then
+						if t < first - CONTACT_EPSILON then
+							first, hits = t, {{other, collider, normal}}
+						elseif t <= first + CONTACT_EPSILON then
+							hits[#hits + 1] = {other, collider, normal}
 						end
-					elseif (not oldData or oldData.frame < gameObject.gameScene.frame - 1) then
-						debug.log(other.gameObject.name, "zero overlap")
 					end
 				end
 			end
 		end
 	end
 
-	return collisions, directionOverlaps
+	if hits then
+		return first, hits
+	end
 end
 
-local function gatherPositions(gameObject)
+local function recordContacts(gameObject, hits, moveBy)
+	--store the touching pairs in the colliders' collision data, like Collider:isCollidingWith
 
-	local positions = {}
-	positions[gameObject] = geometry.Vector3(gameObject.transform.position)
+	local frame = gameObject.gameScene.frame
+	local collisions = {}
 
-	for i, child in ipairs(gameObject.children) do
-		for k,v in pairs(gatherPositions(child)) do
-			positions[k] = v
-		end
+	for i, hit in ipairs(hits) do
+		local other, collider, normal = hit[1], hit[2], hit[3]
+
+		collider.collidingWith[other] = {
+			frame = frame,
+			shortestOverlap = 0,
+			directionOverlap = 0,
+			direction = geometry.Vector2(moveBy),
+			normal = normal,
+		}
+		other.collidingWith[collider] = {
+			frame = frame,
+			shortestOverlap = 0,
+			directionOverlap = 0,
+			direction = -moveBy,
+			normal = -normal,
+		}
+
+		collisions[i] = {other, collider}
 	end
 
-	return positions
+	return collisions
 end
 
 local function move(self, moveBy, alwaysFailOnCollision)
+	--move as far along moveBy as possible. returns false if the body couldn't move at all
+	--(or it would have hit something, and alwaysFailOnCollision is true), otherwise true,
+	--and the pairs of colliders that were hit as {other, collider}
 
 	local gameObject = self.gameObject
-	local oldPositions = gatherPositions(gameObject)
 
-	gameObject:moveGlobal(moveBy)
-	local newPosition = gameObject.transform.position
-
-	if
-		oldPositions[gameObject].x == newPosition.x and
-		oldPositions[gameObject].y == newPosition.y and
-		oldPositions[gameObject].z == newPosition.z
-	then
+	if moveBy.x == 0 and moveBy.y == 0 then
 		return false
 	end
 
-	-- check collisions and respond
+	self.stats.iterations = self.stats.iterations + 1
 
-	local collisions, directionOverlaps = checkCollisions(gameObject, oldPositions, moveBy, alwaysFailOnCollision)
+	local colliders, own = gatherColliders(gameObject)
+	local t, hits = sweep(self, colliders, own, moveBy)
 
-	-- collisions would only be false if the object failed to move
-	-- (for example, if it was already stuck inside an object)
-	if not collisions then
-		return false
-	-- if no collisions occurred, movement is successful
-	elseif #collisions < 1 then
-		-- debug.log("no collisions")
+	if not t then
+		gameObject:moveGlobal(moveBy)
 		return true
 	elseif alwaysFailOnCollision then
 		return false
-	-- if we have directionOverlap information for all of the collisions,
-	-- we can simply move in the opposite direction of the highest directionOverlap
-	elseif #directionOverlaps == #collisions then
-		--we want to pull back by the greatest overlap distance
-		table.sort(directionOverlaps, function(a,b) return a > b end)
-		local dist = directionOverlaps[1]
-
-		if moveBy.x ~= 0 then
-			gameObject:moveGlobal(-(math.sign(moveBy.x) * dist), 0)
-		elseif moveBy.y ~= 0 then
-			gameObject:moveGlobal(0, -(math.sign(moveBy.y) * dist))
-		end
-
-		-- now that we've moved the objects after the isCollidingWith call,
-		-- the collision data needs to be updated
-		for i, c in ipairs(collisions) do
-			if c[1].collidingWith[c[2]].directionOverlap == directionOverlaps[1] then
-				c[1].collidingWith[c[2]].directionOverlap = 0
-				c[1].collidingWith[c[2]].shortestOverlap = 0
-				c[2].collidingWith[c[1]].directionOverlap = 0
-				c[2].collidingWith[c[1]].shortestOverlap = 0
-			elseif c[1].collidingWith[c[2]].directionOverlap < directionOverlaps[1] then
-				c[1].collidingWith[c[2]] = nil
-				c[1].collidingWith[c[2]] = nil
-				c[2].notCollidingWith[c[1]] = {frame = gameObject.gameScene.frame}
-				c[2].notCollidingWith[c[1]] = {frame = gameObject.gameScene.frame}
-			end
-		end
-
-		gameObject:maintainTransform()
-		return true, collisions
 	end
 
-	-- if we're still here, it means our movement resulted in a collision for which
-	-- we have no directionOverlap data. we need to do a binary search to determine
-	-- how far back to move
-	-- if there is no directionOverlap data, the colliders are not rectangles
-
-	local backward = true
-	local lastBackward = backward
-	local skip = newPosition - oldPositions[gameObject]
-	local oldSkip
-
-	skip = geometry.Vector2(skip.x/2, skip.y/2)
-	for i, a in ipairs({"x", "y"}) do
-		if skip[a] < 0 then
-			skip[a] = math.ceil(skip[a])
-		else
-			skip[a] = math.floor(skip[a])
-		end
-	end
-	local done = false
-	local maintainSkip = false
-	local counter = 0
+	local collisions = recordContacts(gameObject, hits, moveBy)
 
-	if skip.x == 0 and skip.y == 0 then
-		gameObject.transform.position = oldPositions[gameObject]
-		gameObject:maintainTransform()
+	if t == 0 then
 		return false
 	end
 
-	if moveBy.x ~= 0 then
-		gameObject.transform.position.x = math.floor(gameObject.transform.position.x)
-	elseif moveBy.y ~= 0 then
-		gameObject.transform.position.y = math.floor(gameObject.transform.position.y)
-	end
-
-	while not done do
-		if backward then
-			gameObject:moveGlobal(-skip)
-			-- gameObject:move(-skip)
-		else
-			gameObject:moveGlobal(skip)
-			-- gameObject:move(skip)
-		end
-
-		gameObject:maintainTransform(true)
-
-		lastBackward = backward
-		for i, c in ipairs(collisions) do
-			local r, d = c[1]:isCollidingWith(c[2], nil, false)
-			--if colliding...
-			if r then
-				backward = true
-				break
-			end
-
-			--if not colliding, move forward next time
-			backward = false
-		end
-
-		local axesLessThanOne = 0
-		if not maintainSkip then
-			oldSkip = skip
-			skip = geometry.Vector2(skip.x/2, skip.y/2)
-			for i, a in ipairs({"x", "y"}) do
-				if skip[a] < 0 then
-					skip[a] = math.ceil(skip[a])
-					if skip[a] > -1 then
-						-- skip[a] = -1
-						axesLessThanOne = axesLessThanOne + 1
-					end
-				elseif skip[a] > 0 then
-					skip[a] = math.floor(skip[a])
-					if skip[a] < 1 then
-						-- skip[a] = 1
-						axesLessThanOne = axesLessThanOne + 1
-					end
-				else
-					axesLessThanOne = axesLessThanOne + 1
-				end
-			end
-		end
-
-		if axesLessThanOne == 2 then
-			skip = oldSkip
-			maintainSkip = true
-		end
-
-		-- even if collision overlaps aren't exactly 0, we can stop here if
-		-- we're just moving the collider back and forth
-		if maintainSkip and not backward and lastBackward then
-			done = true
-		end
-
-		counter = counter + 1
-	end
-
+	gameObject:moveGlobal(moveBy * t)
 	return true, collisions
 end
 
+--[[public]]
+
 function SimpleRigidbody:update(dt)
 
 	self.collisionData = {colliding={}, notColliding={}}
+	self.stats.candidates, self.stats.pairs, self.stats.iterations = 0, 0, 0
 
 	self.velocity = self.velocity - self.globals.gravity
 
@@ -365,8 +266,6 @@ function SimpleRigidbody:update(dt)
 	local breakAfterY = true
 	local alwaysFailOnCollision = self.velocity.y ~= 0
 	for i, axis in ipairs({"x", "y", "x"}) do
-		debug.log(i, alwaysFailOnCollision)
-
 		local moveBy = geometry.Vector2()
 		moveBy[axis] = self.velocity[axis] * dt
 
@@ -377,9 +276,6 @@ function SimpleRigidbody:update(dt)
 			-- if collision happened during horizontal movement, try again after vertical movement
 			if i == 1 then
 				breakAfterY = false
-				if moveBy.x ~= 0 then
-					debug.log("colliding horizontally")
-				end
 			else
 				self.velocity[axis] = 0
 			end
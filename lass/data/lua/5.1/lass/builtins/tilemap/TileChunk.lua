@@ -0,0 +1,244 @@
+local lass = require("lass")
+local class = require("lass.class")
+local geometry = require("lass.geometry")
+local collections = require("lass.collections")
+local RenderBatches = require("lass.batching")
+local Renderer = require("lass.builtins.graphics.Renderer")
+local Collider = require("lass.builtins.physics.Collider")
+
+--[[
+TileChunk - a square of tiles in a chunked TileMap
+the tiles are drawn from batches that are only rebuilt when the chunk changes, and the
+tiles with colliders are covered by a few rectangular Colliders.
+TileMap adds these; do not use this as a component directly!
+
+arguments:
+	tileMap (TileMap)
+	column (number) - the first column of the chunk in the map
+	row (number) - the first row of the chunk in the map
+]]
+
+local TileChunk = class.define(Renderer, function(self, arguments)
+
+	Renderer.init(self, arguments)
+end)
+
+--[[internal]]
+
+local function bounds(self)
+	--return the first and last columns and rows of the chunk
+
+	local tileMap = self.tileMap
+	local size = tileMap.chunkSize
+
+	return
+		self.column,
+		self.row,
+		math.min(self.column + size - 1, tileMap.width),
+		math.min(self.row + size - 1, tileMap.height)
+end
+
+local function buildBatches(self)
+
+	local tileMap = self.tileMap
+	local tileSize, ySign = tileMap.tileSize, self.globals.ySign
+	local firstColumn, firstRow, lastColumn, lastRow = bounds(self)
+
+	--the renderers of the tile prefabs are used to place each tile, relative to the chunk
+	local transform = geometry.Transform()
+	local points = {}
+	local images, meshes, order = {}, {}, {}
+
+	for row = firstRow, lastRow do
+		for column = firstColumn, lastColumn do
+			local renderer = tileMap.tileRenderers[tileMap:getTile(column, row)]
+
+			if renderer then
+				transform.position.x = (column - firstColumn) * tileSize.x
+				transform.position.y = (row - firstRow) * tileSize.y * ySign
+
+				local key = renderer:batchKey()
+
+				if renderer.batchKind == "sprites" then
+					local sprites = images[key]
+					if not sprites then
+						sprites = {}
+						images[key] = sprites
+						order[#order + 1] = sprites
+					end
+
+					sprites[#sprites + 1] = {renderer, renderer:spriteArguments(transform)}
+				else
+					local vertices = meshes[key]
+					if not vertices then
+						vertices = {count = 0}
+						meshes[key] = vertices
+						order[#order + 1] = vertices
+					end
+
+					local c = renderer.color
+					vertices.count = RenderBatches.outlineTriangles(
+						vertices, vertices.count, points, renderer:screenOutline(points, transform), key,
+						c[1] or 255, c[2] or 255, c[3] or 255, c[4] or 255
+					)
+				end
+			end
+		end
+	end
+
+	local drawables = {}
+
+	for i, batch in ipairs(order) do
+		if batch.count then
+			if batch.count > 0 then
+				local mesh = love.graphics.newMesh(batch.count, "triangles", "static")
+
+				for n = 1, batch.count do
+					local j = (n - 1) * 6
+					mesh:setVertex(
+						n, batch[j + 1], batch[j + 2], 0, 0,
+						batch[j + 3], batch[j + 4], batch[j + 5], batch[j + 6]
+					)
+				end
+				drawables[#drawables + 1] = mesh
+			end
+		else
+			local spriteBatch = love.graphics.newSpriteBatch(batch[1][1].image, #batch, "static")
+
+			for j, sprite in ipairs(batch) do
+				local c = sprite[1].color
+				spriteBatch:setColor(c[1] or 255, c[2] or 255, c[3] or 255, c[4] or 255)
+				spriteBatch:add(unpack(sprite, 2, 8))
+			end
+			drawables[#drawables + 1] = spriteBatch
+		end
+	end
+
+	self.drawables = drawables
+	self.dirty = false
+end
+
+local function addCollider(self, arguments, column, row, lastColumn, lastRow)
+	--add a Collider covering a rectangle of tiles
+
+	local tileSize, ySign = self.tileMap.tileSize, self.globals.ySign
+	local object = lass.GameObject(self.gameScene, self.gameObject.name .. " collider", {
+		position = {
+			x = ((column + lastColumn) / 2 - self.column) * tileSize.x,
+			y = ((row + lastRow) / 2 - self.row) * tileSize.y * ySign,
+		}
+	}, self.gameObject)
+
+	arguments = collections.deepcopy(arguments)
+	arguments.shape = {
+		"Rectangle", (lastColumn - column + 1) * tileSize.x, (lastRow - row + 1) * tileSize.y
+	}
+	arguments.shapeSource = nil
+
+	object:addComponent(Collider(arguments))
+	self.colliderObjects[#self.colliderObjects + 1] = object
+end
+
+local function buildColliders(self)
+	--cover the tiles with colliders using as few rectangles as possible, by growing
+	--each rectangle right, and then down. only tiles of the same kind are merged
+
+	for i, object in ipairs(self.colliderObjects) do
+		self.gameScene:removeGameObject(object)
+	end
+	self.colliderObjects = {}
+
+	local tileMap = self.tileMap
+	local size = tileMap.chunkSize
+	local firstColumn, firstRow, lastColumn, lastRow = bounds(self)
+	local covered = {}
+
+	for row = firstRow, lastRow do
+		for column = firstColumn, lastColumn do
+			local tile = tileMap:getTile(column, row)
+			local arguments = tileMap.tileColliders[tile]
+			local index = (row - firstRow) * size + (column - firstColumn) + 1
+
+			if arguments and not covered[index] then
+				local right = column
+				while
+					right < lastColumn and
+					tileMap:getTile(right + 1, row) == tile and
+					not covered[index + right + 1 - column]
+				do
+					right = right + 1
+				end
+
+				local bottom = row
+				local grow = true
+				while grow and bottom < lastRow do
+					for c = column, right do
+						if
+							tileMap:getTile(c, bottom + 1) ~= tile or
+							covered[index + (bottom + 1 - row) * size + c - column]
+						then
+							grow = false
+							break
+						end
+					end
+
+					if grow then
+						bottom = bottom + 1
+					end
+				end
+
+				for r = row, bottom do
+					for c = column, right do
+						covered[index + (r - row) * size + c - column] = true
+					end
+				end
+
+				addCollider(self, arguments, column, row, right, bottom)
+			end
+		end
+	end
+end
+
+--[[public]]
+
+function TileChunk:awake(firstAwake)
+
+	if firstAwake then
+		self.colliderObjects = {}
+		buildColliders(self)
+	end
+
+	self.dirty = true
+	Renderer.awake(self)
+end
+
+function TileChunk:refresh()
+	--rebuild the chunk after its tiles have changed
+
+	self.dirty = true
+	buildColliders(self)
+end
+
+function TileChunk:draw()
+
+	if self.dirty then
+		buildBatches(self)
+	end
+
+	local transform = self.gameObject.globalTransform
+
+	self:resetCanvas()
+	love.graphics.push()
+	love.graphics.translate(transform.position.x, transform.position.y * self.globals.ySign)
+	love.graphics.rotate((transform.rotation / 180) * math.pi)
+	love.graphics.scale(transform.size.x, transform.size.y)
+	love.graphics.setColor(255, 255, 255)
+
+	for i, drawable in ipairs(self.drawables) do
+		love.graphics.draw(drawable)
+	end
+
+	love.graphics.pop()
+end
+
+return TileChunk
@@ -3,6 +3,26 @@ local class = require("lass.class")
 local geometry = require("lass.geometry")
 local collections = require("lass.collections")
 local csv = require("lass.collections.csv")
+local DelayObject = require("lass.delay")
+local Collider = require("lass.builtins.physics.Collider")
+local TileChunk = require("lass.builtins.tilemap.TileChunk")
+
+--[[
+TileMap
+
+arguments (optional):
+	map (list) - rows of tile values. 0 is an empty tile
+	mapFile (string) - csv or image file to load the map from
+	mapFilePalette (list) - if mapFile is an image, the rgb color of each tile value
+	tileSize (Vector2)
+	tiles (list) - the prefab, or the filename of the prefab, for each tile value
+	chunkSize (number, default=nil) - if specified, tiles are not game objects.
+		instead, the map is stored as one list of tile values, and split into chunks
+		of chunkSize by chunkSize tiles. each chunk draws its tiles from cached batches,
+		using the first ImageRenderer or ShapeRenderer of each tile's prefab, and covers
+		the tiles whose prefabs have a Collider with as few tile-sized rectangles as it
+		can. the other components of the prefabs are ignored
+]]
 
 local TileMap = class.define(lass.Component, function(self, arguments)
 
@@ -12,6 +32,43 @@ local TileMap = class.define(lass.Component, function(self, arguments)
 	lass.Component.init(self, arguments)
 end)
 
+local function evaluateDelayObjects(collection)
+
+	for k, v in pairs(collection) do
+		if class.instanceof(v, DelayObject) then
+			collection[k] = v()
+		elseif type(v) == "table" then
+			evaluateDelayObjects(v)
+		end
+	end
+end
+
+local function createTileTemplates(self)
+	--build the renderer and collider arguments that chunks use for each tile value
+
+	self.tileRenderers = {}
+	self.tileColliders = {}
+
+	for tile, prefab in pairs(self.prefabs) do
+		for i, component in ipairs(prefab.components or {}) do
+			local componentClass = require(component.script)
+			local arguments = collections.deepcopy(component.arguments or {})
+			evaluateDelayObjects(arguments)
+
+			if componentClass.batchKind and not self.tileRenderers[tile] then
+				local renderer = componentClass(arguments)
+				renderer.globals = self.globals
+				self.tileRenderers[tile] = renderer
+			elseif
+				(componentClass == Collider or class.subclassof(componentClass, Collider)) and
+				not self.tileColliders[tile]
+			then
+				self.tileColliders[tile] = arguments
+			end
+		end
+	end
+end
+
 function TileMap:awake()
 
 	local prefabs = {}
@@ -30,6 +87,11 @@ function TileMap:awake()
 	end
 
 	self.prefabs = prefabs
+
+	if self.chunkSize then
+		createTileTemplates(self)
+	end
+
 	self:load(self.mapFile)	
 end
 
@@ -59,6 +121,51 @@ local function imageDataToTileMap(self, imageData)
 	return map
 end
 
+local function createChunks(self)
+
+	local ySign = self.globals.ySign
+	local size = self.chunkSize
+
+	if self.map then
+		--store the map as one list of tile values, row after row
+		local cells, width = {}, 0
+
+		for i, row in ipairs(self.map) do
+			width = math.max(width, #row)
+		end
+
+		for i, row in ipairs(self.map) do
+			for j = 1, width do
+				cells[(i-1) * width + j] = row[j] or 0
+			end
+		end
+
+		self.cells, self.width, self.height = cells, width, #self.map
+		self.map = nil
+	end
+
+	self.chunks = {}
+	self.chunkColumns = math.ceil(self.width / size)
+
+	for row = 1, self.height, size do
+		for column = 1, self.width, size do
+			local chunk = lass.GameObject(
+				self.gameScene,
+				"chunk " .. tostring((column - 1) / size + 1) .. " " .. tostring((row - 1) / size + 1),
+				{position = {
+					x = (column-1) * self.tileSize.x,
+					y = (row-1) * self.tileSize.y * ySign,
+				}},
+				self.gameObject
+			)
+
+			local component = TileChunk({tileMap = self, column = column, row = row, canvas = self.canvas})
+			chunk:addComponent(component)
+			self.chunks[#self.chunks + 1] = component
+		end
+	end
+end
+
 function TileMap:load(filename)
 
 	local ySign = self.globals.ySign
@@ -76,18 +183,19 @@ function TileMap:load(filename)
 
 			self.map = imageDataToTileMap(self, image:getData())
 		else
-			local data, msg = csv.open(self.mapFile)
+			local data, msg = csv.open(self.mapFile, {types = "number"})
 			assert(data, msg)
 
-			local i = 1
-			for line in data:lines() do
-				self.map[i] = {}
-
-				for j, v in ipairs(line) do
-					self.map[i][j] = tonumber(v)
+			if self.chunkSize then
+				--chunks use a flat list of tile values, which csv can fill directly
+				self.cells, self.width, self.height = data:fill(self.cells)
+				self.map = nil
+			else
+				local i = 1
+				for line in data:lines() do
+					self.map[i] = line
+					i = i + 1
 				end
-
-				i = i + 1
 			end
 		end
 	end
@@ -98,6 +206,11 @@ function TileMap:load(filename)
 		self:clear()
 	end
 
+	if self.chunkSize then
+		createChunks(self)
+		return
+	end
+
 	-- instantiate tiles
 
 	for i, row in ipairs(self.map) do
@@ -121,6 +234,55 @@ function TileMap:load(filename)
 	end
 end
 
+function TileMap:getTile(column, row)
+	--return the tile value at a column and row of the map (0 if there is none)
+
+	if self.chunkSize then
+		if column < 1 or column > self.width or row < 1 or row > self.height then
+			return 0
+		end
+
+		return self.cells[(row-1) * self.width + column]
+	end
+
+	return self.map[row] and self.map[row][column] or 0
+end
+
+function TileMap:setTile(column, row, tile)
+	--change the tile value at a column and row of a chunked map
+
+	assert(self.chunkSize, "setTile requires a chunked TileMap (see chunkSize)")
+	assert(
+		column >= 1 and column <= self.width and row >= 1 and row <= self.height,
+		"tile " .. tostring(column) .. " " .. tostring(row) .. " is outside the map"
+	)
+
+	local index = (row-1) * self.width + column
+
+	if self.cells[index] ~= tile then
+		self.cells[index] = tile
+
+		local size = self.chunkSize
+		local chunk = math.floor((row-1) / size) * self.chunkColumns + math.floor((column-1) / size) + 1
+		self.chunks[chunk]:refresh()
+	end
+end
+
+function TileMap:tileAt(position)
+	--return the tile value, column and row of the tile at a global position
+	--(rotation of the tile map is not taken into account)
+
+	local transform = self.gameObject.globalTransform
+	local column = math.floor(
+		(position.x - transform.position.x) / (self.tileSize.x * transform.size.x) + 0.5
+	) + 1
+	local row = math.floor(
+		(position.y - transform.position.y) * self.globals.ySign / (self.tileSize.y * transform.size.y) + 0.5
+	) + 1
+
+	return self:getTile(column, row), column, row
+end
+
 function TileMap:clear()
 
 	for i, child in ipairs(collections.copy(self.gameObject.children)) do
@@ -24,6 +24,30 @@ local accessorReserved = {
     __class = true,
 }
 
+-- a function for each class that clears its lookup caches. they are cleared whenever
+-- the class, one of its accessor tables, or one of its ancestors gains a key
+local clearCaches = setmetatable({}, {__mode = "k"})
+
+-- the subclasses of each class, as a set
+local subclasses = setmetatable({}, {__mode = "k"})
+
+-- stands in for nil in lookup caches
+local NONE = {}
+
+local function invalidateCaches(c)
+    --clear the lookup caches of a class and its subclasses
+
+    if clearCaches[c] then
+        clearCaches[c]()
+    end
+
+    if subclasses[c] then
+        for subclass in pairs(subclasses[c]) do
+            invalidateCaches(subclass)
+        end
+    end
+end
+
 local function isCallable(v)
 
     if type(v) == "function" then
@@ -64,6 +88,8 @@ end
 function class.metaclass:__newindex(key, value)
     -- automatically wrap all class functions to prevent infinite self.__base loops
 
+    invalidateCaches(self)
+
     if key == "__get" then
         rawset(self, key, class.GetterTable(self, value))
     elseif key == "__set" then
@@ -79,6 +105,40 @@ module functions
 
 --[[internal]]
 
+local function resolve(c, accessor, key)
+    --find key on a class or its ancestors, or in their accessor tables if accessor
+    --("__get" or "__set") is given. returns the value and the table it was found in
+
+    while c do
+        local t = c
+
+        if accessor then
+            t = rawget(c, accessor)
+        end
+
+        local v = t and rawget(t, key)
+
+        if v ~= nil then
+            return v, t
+        end
+
+        c = rawget(c, "__base")
+    end
+end
+
+local function cacheOwner(c, owners, accessor, key)
+    --resolve a key that isn't in a lookup cache yet, and remember where it was found
+
+    local v, owner = resolve(c, accessor, key)
+
+    -- only cache string keys, so that tables used as keys aren't kept alive
+    if type(key) == "string" then
+        owners[key] = owner or NONE
+    end
+
+    return v
+end
+
 local function defineClass(base, init, noAccessors)
     --[[
         params (signature 1):
@@ -117,6 +177,9 @@ local function defineClass(base, init, noAccessors)
             end
         end
         c.__base = base
+
+        subclasses[base] = subclasses[base] or setmetatable({}, {__mode = "k"})
+        subclasses[base][c] = true
     end
 
     -- when overriding __index or __newindex, make sure that the new function calls
@@ -126,6 +189,54 @@ local function defineClass(base, init, noAccessors)
 
     if not noAccessors then
 
+        -- lookups are resolved once per key, and then cached until the class or one
+        -- of its ancestors gains a key. getters, setters and values map each key to
+        -- the getter table, setter table, or class it was found in (or NONE). the
+        -- value itself is read from there every time, since assigning to a key that a
+        -- table already has doesn't reach __newindex. if the key has been removed from
+        -- that table, indexing it finds the key further up, as resolving it would
+        local getters, setters, values = {}, {}, {}
+
+        clearCaches[c] = function()
+            getters, setters, values = {}, {}, {}
+        end
+
+        local function findGetter(key)
+
+            local owner = getters[key]
+
+            if owner == nil then
+                if accessorReserved[key] then
+                    return nil
+                end
+                return cacheOwner(c, getters, "__get", key)
+            elseif owner ~= NONE then
+                return owner[key]
+            end
+        end
+
+        local function findSetter(key)
+
+            local owner = setters[key]
+
+            if owner == nil then
+                return cacheOwner(c, setters, "__set", key)
+            elseif owner ~= NONE then
+                return owner[key]
+            end
+        end
+
+        local function findValue(key)
+
+            local owner = values[key]
+
+            if owner == nil then
+                return cacheOwner(c, values, nil, key)
+            elseif owner ~= NONE then
+                return owner[key]
+            end
+        end
+
         -- the __index metamethod for objects.
         -- when attempting to index an object, we resolve the lookup in the
         -- following order:
@@ -137,34 +248,31 @@ local function defineClass(base, init, noAccessors)
 
         c.__index = function(self, key)
 
-            -- first, we attempt to find the key in the object's class's getter
-            -- table.
-            -- if it isn't found, the getter table will attempt to find it in the
-            -- ancestor classes' getter tables
-            if not accessorReserved[key] and c.__get[key] then
-                return c.__get[key](self)
+            -- first, we attempt to find the key in the getter tables of the object's
+            -- class and its ancestors
+            local getter = findGetter(key)
+
+            if getter then
+                return getter(self)
 
             -- next, we check if the key is "__class"
             elseif key == "__class" then
                 return getmetatable(self)
 
             else
-                -- next, we attempt to find the key on the class itself.
-                -- if it isn't found, metaclass.__index will attempt to find it in
-                -- the ancestor classes
-
-                -- call metaclass.__index
-                local v = c[key]
+                -- next, we attempt to find the key on the class or its ancestors
+                local v = findValue(key)
 
                 -- if the key is found or is a reserved key, then we can stop here
                 if v ~= nil or reserved[key] then
                     return v
+                end
 
                 -- finally, since all else has failed, we run genericget
-                elseif c.__genericget then
+                local genericget = findValue("__genericget")
 
-                    local r = c.__genericget(self, key)
-                    return r
+                if genericget then
+                    return genericget(self, key)
                 end
             end
         end
@@ -172,15 +280,22 @@ local function defineClass(base, init, noAccessors)
         -- the __newindex metamethod for objects
 
         c.__newindex = function(self, key, value)
+
             if not accessorReserved[key] then
-                if c.__set[key] then
-                    c.__set[key](self, value)
-                elseif c.__get[key] then
+                local setter = findSetter(key)
+
+                if setter then
+                    setter(self, value)
+                elseif findGetter(key) then
                     error("attempt to set read-only property '" .. key .. "'")
-                elseif c.__genericset then
-                    c.__genericset(self, key, value)
                 else
-                    rawset(self, key, value)
+                    local genericset = findValue("__genericset")
+
+                    if genericset then
+                        genericset(self, key, value)
+                    else
+                        rawset(self, key, value)
+                    end
                 end
             elseif key == "__class" then
                 setmetatable(self, value)
@@ -336,6 +451,15 @@ for i, cl in ipairs({
         end
     end)
 
+    -- adding a getter or setter may change how keys of the class are looked up
+    rawset(newCl, "__newindex", function(self, key, value)
+        if not accessorReserved[key] then
+            invalidateCaches(rawget(self, "__accessing"))
+        end
+
+        rawset(self, key, value)
+    end)
+
     -- rawset(newCl, "__newindex", function(self, key, value)
     --     if not accessorReserved[key] then
     --         class.bind(self.__accessing, accessor, key, value)
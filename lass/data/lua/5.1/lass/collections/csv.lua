@@ -174,6 +174,44 @@ function column_map:transform(value, index)
 end
 
 
+------------------------------------------------------------------------------
+
+-- Decoders turn the text of a field into a value, or return nil and a message.
+local decoders = {}
+
+
+function decoders.string(value)
+  return value
+end
+
+
+function decoders.number(value)
+  local n = tonumber(value)
+  if not n and value ~= "" then
+    return nil, ("'%s' is not a number"):format(value)
+  end
+  return n
+end
+
+
+--- Work out the decoder for each column from parameters.types, which is
+--  either the name of one type for every column, or a list of type names.
+local function column_decoders(types)
+  if not types then return end
+
+  if type(types) == "string" then
+    local decoder = assert(decoders[types], "unknown column type '"..types.."'")
+    return setmetatable({}, { __index = function() return decoder end })
+  end
+
+  local result = {}
+  for i, name in pairs(types) do
+    result[i] = assert(decoders[name], "unknown column type '"..tostring(name).."'")
+  end
+  return setmetatable(result, { __index = function() return decoders.string end })
+end
+
+
 ------------------------------------------------------------------------------
 
 local file_buffer = {}
@@ -185,13 +223,41 @@ function file_buffer:new(file, buffer_block_size)
       buffer_block_size = buffer_block_size or DEFAULT_BUFFER_BLOCK_SIZE,
       buffer_start      = 0,
       buffer            = "",
+      -- blocks that have been read but not yet joined onto the buffer, and
+      -- their total length
+      chunks            = {},
+      chunks_size       = 0,
     }, file_buffer)
 end
 
 
+--- Read size more bytes into the list of chunks. Returns false at the end
+--  of the file
+function file_buffer:read(size)
+  local s = self.file:read(size)
+  if not s then return false end
+  self.chunks[#self.chunks+1] = s
+  self.chunks_size = self.chunks_size + #s
+  return true
+end
+
+
+--- Join the chunks that have been read onto the buffer, in one copy
+function file_buffer:join()
+  if self.chunks[1] then
+    self.buffer = self.buffer..table.concat(self.chunks)
+    self.chunks = {}
+    self.chunks_size = 0
+  end
+end
+
+
 --- Cut the front off the buffer if we've already read it
 function file_buffer:truncate(p)
   p = p - self.buffer_start
+  if p > #self.buffer then
+    self:join()
+  end
   if p > self.buffer_block_size then
     local remove = self.buffer_block_size *
       math.floor((p-1) / self.buffer_block_size)
@@ -203,6 +269,8 @@ end
 
 --- Find something in the buffer, extending it if necessary
 function file_buffer:find(pattern, init)
+  self:join()
+  local read_size = self.buffer_block_size
   while true do
     local first, last, capture =
       self.buffer:find(pattern, init - self.buffer_start)
@@ -210,15 +278,17 @@ function file_buffer:find(pattern, init)
     -- buffer (and the match could potentially be longer) then read some
     -- more.
     if not first or last == #self.buffer then
-      local s = self.file:read(self.buffer_block_size)
-      if not s then
+      if not self:read(read_size) then
         if not first then
           return
         else
           return first + self.buffer_start, last + self.buffer_start, capture
         end
       end
-      self.buffer = self.buffer..s
+      self:join()
+      -- read twice as much next time, so that a long search copies the buffer
+      -- a few times rather than once per block
+      read_size = read_size * 2
     else
       return first + self.buffer_start, last + self.buffer_start, capture
     end
@@ -226,15 +296,14 @@ function file_buffer:find(pattern, init)
 end
 
 
---- Extend the buffer so we can see more
+--- Extend the buffer so we can see more. The blocks read are only joined
+--  onto the buffer when something in them is needed
 function file_buffer:extend(offset)
-  local extra = offset - #self.buffer - self.buffer_start
+  local extra = offset - #self.buffer - self.chunks_size - self.buffer_start
   if extra > 0 then
     local size = self.buffer_block_size *
       math.ceil(extra / self.buffer_block_size)
-    local s = self.file:read(size)
-    if not s then return end
-    self.buffer = self.buffer..s
+    self:read(size)
   end
 end
 
@@ -243,6 +312,9 @@ end
 function file_buffer:sub(a, b)
   self:extend(b)
   b = b == -1 and b or b - self.buffer_start
+  if b == -1 or b > #self.buffer then
+    self:join()
+  end
   return self.buffer:sub(a - self.buffer_start, b)
 end
 
@@ -421,6 +493,12 @@ local function separated_values_iterator(buffer, parameters)
     if #value > 0 then nonblanks = true end
     field_count = field_count + 1
 
+    if parameters.decoders and (header_read or not (parameters.header or parameters.column_map)) then
+      local message
+      value, message = parameters.decoders[field_count](value)
+      if message then problem(message) end
+    end
+
     -- Insert the value into the table for this "line"
     local key
     if parameters.column_map and header_read then
@@ -477,6 +555,121 @@ local function separated_values_iterator(buffer, parameters)
 end
 
 
+------------------------------------------------------------------------------
+
+--- Read every record of an unquoted string into a flat array.
+--  This skips most of the work done by separated_values_iterator (quotes,
+--  tables per record, positions of fields), so it only handles the simple case.
+local function fill_unquoted(s, parameters, array)
+  local decoders = parameters.decoders
+  local sep = parameters.separator or
+    guess_separator(s, separated_values_iterator)
+  local length = #s
+  local position = find_unicode_BOM(function(a, b) return s:sub(a, b) end) + 1
+  local line = 1
+  local n, width, height = 0, nil, 0
+  local skip_header = parameters.header
+
+  while position <= length do
+    local line_end = s:find("[\r\n]", position) or length + 1
+
+    -- ignore blank lines
+    local nonblank = s:find("[^%s]", position)
+    if nonblank and nonblank < line_end then
+      local field_start, column = position, 0
+
+      while true do
+        local field_end = sep ~= "" and s:find(sep, field_start, true)
+        if not field_end or field_end > line_end then field_end = line_end end
+
+        local value = s:sub(field_start, field_end - 1)
+        local first, last = value:byte(1), value:byte(-1)
+        if first and (first <= 32 or last <= 32) then
+          value = trim_space(value)
+        end
+
+        -- a separator at the end of a line doesn't start another field
+        if field_end == line_end and value == "" and column > 0 then break end
+
+        column = column + 1
+
+        if not skip_header then
+          if decoders then
+            local message
+            value, message = decoders[column](value)
+            if message then
+              error(("%s:%d:%d: %s"):
+                format(parameters.filename, line, field_start - position + 1, message), 0)
+            end
+          end
+          if value == nil then
+            error(("%s:%d:%d: missing value"):
+              format(parameters.filename, line, field_start - position + 1), 0)
+          end
+          n = n + 1
+          array[n] = value
+        end
+
+        if field_end == line_end then break end
+        field_start = field_end + 1
+      end
+
+      if skip_header then
+        skip_header = false
+      else
+        width = width or column
+        if column ~= width then
+          error(("%s:%d: expected %d fields, found %d"):
+            format(parameters.filename, line, width, column), 0)
+        end
+        height = height + 1
+      end
+    end
+
+    if s:sub(line_end, line_end + 1) == "\r\n" then line_end = line_end + 1 end
+    position = line_end + 1
+    line = line + 1
+  end
+
+  return n, width or 0, height
+end
+
+
+--- Read every record into a flat array, row after row.
+--  Every record must have the same number of fields.
+--  @return the array, the number of fields per record and the number of records
+local function fill(t, array)
+  array = array or {}
+  local buffer = t.buffer
+  local n, width, height
+
+  if type(buffer) == "string" and not buffer:find('"', 1, true) then
+    n, width, height = fill_unquoted(buffer, t.parameters, array)
+  else
+    n, width, height = 0, nil, 0
+    for fields in t:lines() do
+      width = width or #fields
+      if #fields ~= width then
+        error(("%s: expected %d fields, found %d"):
+          format(t.parameters.filename, width, #fields), 0)
+      end
+      for i = 1, width do
+        n = n + 1
+        array[n] = fields[i]
+      end
+      height = height + 1
+    end
+  end
+
+  -- clear anything left over from a previous use of the array
+  for i = #array, n + 1, -1 do
+    array[i] = nil
+  end
+
+  return array, width or 0, height
+end
+
+
 ------------------------------------------------------------------------------
 
 local buffer_mt =
@@ -486,6 +679,7 @@ local buffer_mt =
           separated_values_iterator(t.buffer, t.parameters)
         end)
     end,
+  fill = fill,
   close = function(t)
       if t.buffer.close then t.buffer:close() end
     end,
@@ -512,6 +706,7 @@ local function use(
   parameters.filename = parameters.filename or "<unknown>"
   parameters.column_map = parameters.columns and
     column_map:new(parameters.columns)
+  parameters.decoders = column_decoders(parameters.types)
 
   if not buffer then
     buffer = file_buffer:new(io.stdin)
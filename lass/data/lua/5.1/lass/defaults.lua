@@ -6,7 +6,8 @@ return {
   },
   graphics = {
     backgroundColor = {255,255,255},
-    invertYAxis = false
+    invertYAxis = false,
+    batching = false
   },
   physics = {
     gravity = {
@@ -14,8 +15,15 @@ return {
       y = -9.80665 * 20
     },
     pixelsPerMeter = 20,
+    collisionCellSize = 128,
+    fixedTimestep = false,
+    maxSubsteps = 5,
+    interpolate = true,
     layers = {
       "main"
     }
+  },
+  events = {
+    budget = false
   }
 }
\ No newline at end of file
@@ -260,9 +260,14 @@ local function sanitizeOperandZAxis(a, b, fallbackValue)
 	--if a.z or b.z is nil, set it to fallbackValue
 	--(assumes that you have already asserted a and b are Vector2)
 
+	--only assign missing axes, so that operands' callbacks aren't triggered needlessly
 	fallbackValue = fallbackValue or 0
-	a.z = a.z or fallbackValue
-	b.z = b.z or fallbackValue
+	if a.z == nil then
+		a.z = fallbackValue
+	end
+	if b.z == nil then
+		b.z = fallbackValue
+	end
 	return a, b
 end
 
@@ -381,8 +386,53 @@ end
 
 --[[Transform]]
 
+--[[internal]]
+
+-- callbacks installed by watchVector, and the transforms they belong to
+local vectorWatchers = setmetatable({}, {__mode = "k"})
+
+local function watchVector(transform, property, vector, validate)
+	-- report changes to the axes of a transform's position or size vector through the
+	-- transform's own callback
+
+	local oldCallback = vector.callback
+
+	if oldCallback and vectorWatchers[oldCallback] == transform then
+		return
+	end
+
+	local callback = function(self, key, value)
+
+		if validate then
+			validate(self, key, value)
+		end
+
+		if oldCallback ~= nil then
+			oldCallback(self, key, value)
+		end
+
+		transform._version = transform._version + 1
+
+		if transform.callback then
+			transform.callback(transform, property, self)
+		end
+	end
+
+	vectorWatchers[callback] = transform
+	vector.callback = callback
+end
+
+local function validateSizeAxis(self, key, value)
+	assertValueIsValidNumber("Transform.size", key, value, false, false)
+end
+
+--[[public]]
+
 local Transform = class.define(function(self, position, rotation, size)
 
+	-- incremented on every change, so that data derived from the transform can be cached
+	self._version = 0
+
 	if type(position) == "table" and (position.position or position.rotation or position.size) then
 		size = position.size
 		rotation = position.rotation
@@ -410,10 +460,9 @@ local Transform = class.define(function(self, position, rotation, size)
 	self.rotation = rotation
 
 	if size then
-		size.x = size.x or 1
-		size.y = size.y or 1
-		size.z = size.z or 1
-		safe, self.size = pcall(Vector3, size)
+		-- don't fill in missing axes on the argument itself, since it may belong to
+		-- another transform
+		safe, self.size = pcall(Vector3, size.x or 1, size.y or 1, size.z or 1)
 		if not safe then
 			error("the x, y, and z values of size must be numbers")
 		end
@@ -432,17 +481,34 @@ function Transform.__set.rotation(self, value)
 
 	-- clamp rotation between 0 and 360 degrees (e.g., -290 => 70)
 	self._rotation = value % 360
+	self._version = self._version + 1
 
 	if self.callback then
 		self.callback(self, "rotation", self._rotation)
 	end
 end
 
+function Transform.__get.position(self)
+	return self._position
+end
+
+function Transform.__set.position(self, value)
+
+	assert(class.instanceof(value, Vector3), "Transform.position must be Vector3")
+
+	watchVector(self, "position", value)
+	self._position = value
+	self._version = self._version + 1
+
+	if self.callback then
+		self.callback(self, "position", self._position)
+	end
+end
+
 function Transform.__get.size(self)
 	return self._size
 end
 
--- TODO: make a callback for transform.size
 function Transform.__set.size(self, value)
 
 	assert(class.instanceof(value, Vector3), "Transform.size must be Vector3")
@@ -452,19 +518,9 @@ function Transform.__set.size(self, value)
 		assertValueIsValidNumber("Transform.size", axis, value[axis], false, false)
 	end
 
-	-- callback definition goes here
-	local oldCallback = value.callback
-    
-    value.callback = function(self, key, value)
-
-    	assertValueIsValidNumber("Transform.size", key, value, false, false)
-    	
-    	if oldCallback ~= nil then
-	    	oldCallback(self, key, value)
-	    end
-    end
-
+	watchVector(self, "size", value, validateSizeAxis)
 	self._size = value
+	self._version = self._version + 1
 
 	if self.callback then
 		self.callback(self, "size", self._size)
@@ -478,6 +534,22 @@ Shape
 --this is basically just an interface
 local Shape = class.define()
 
+--[[internal]]
+
+local function rotationFactors(angle)
+	--return the cosine and sine used by Vector2:rotate for a clockwise rotation of [angle] degrees
+
+	angle = math.rad(-angle)
+	return math.round(math.cos(angle), 10), math.round(math.sin(angle), 10)
+end
+
+--[[public]]
+
+-- incremented whenever a property of a shape is assigned, so that data derived from
+-- the shape can be cached. changes made inside a property (e.g. to a vertex) are not
+-- counted
+Shape._version = 0
+
 --[[Circle]]
 
 local Circle = class.define(Shape, function(self, radius, position)
@@ -508,6 +580,18 @@ function Circle:globalCircle(transform)
 	return Circle(self.radius * transform.size.x, self.position + transform.position)
 end
 
+function Circle:globalBounds(transform)
+	--return the edges of a box containing the circle: minX, minY, maxX, maxY.
+	--the box may be larger than necessary, since collisions between two circles
+	--use the unscaled radius
+
+	local radius = self.radius * math.max(transform.size.x, 1)
+	local x = self.position.x + transform.position.x
+	local y = self.position.y + transform.position.y
+
+	return x - radius, y - radius, x + radius, y + radius
+end
+
 function Circle:contains(vector)
 	return (vector - self.position):magnitude() <= self.radius
 end
@@ -517,159 +601,9 @@ Polygon
 ]]
 
 --[[internal]]
-local function intersectingPolygonAndOther(poly1, other, transform1, transform2)
-
-	transform1 = transform1 or Transform()
-	local gc = nil
-
-	-- print(transform1.rotation)
-	-- for i, v in ipairs(poly1:globalVertices(transform1)) do print(i,v) end
-
-	local poly1Verts = poly1:globalVertices(transform1)
-	local otherVerts = nil
-	local otherType = class.instanceof(other, Vector2, Circle)
-	if otherType == Vector2 then
-		otherVerts = {other}
-	elseif otherType == Circle then
-		gc = other:globalCircle(transform2)
-		--we will rotate the "vertices" (position and two outmost points) on each new axis
-		otherVerts = {
-			-- gc.position - Vector2(gc.radius, 0),
-			gc.position,
-			-- gc.position + Vector2(gc.radius, 0)
-		}
-	else
-		otherVerts = other:globalVertices(transform2)
-	end
-
-	local minDistance = nil
-
-	--check against every axis of both colliders
-	--if collider is polygon, axis is normal of a side
-	--if collider is circle, axis is the line between the closest polygon vertex and the circle center
-	for icollider, collider in ipairs({poly1Verts, otherVerts}) do
-		local len = #collider
-		-- print("len", len)
-
-		--if the 2nd collider has only one vertex, we've already checked it
-		if otherType == Vector2 and icollider == 2 then
-			return true
-		end
-
-		local normal = nil
-		local minSm = nil
-		local closest = nil
-
-		--if this collider is a circle, we generate the "normal" here
-		if icollider == 2 and otherType == Circle then
-
-			-- naively find the point on the polygon that is closest to the circle
-			-- TODO: find the point by using voronoi regions instead
-			for i, vertex in ipairs(poly1Verts) do
-				local sm = (vertex - gc.position):sqrMagnitude()
-				if not minSm or sm <= minSm then
-					minSm = sm
-					closest = vertex
-				end
-			end
-			normal = Vector2(gc.position - closest)
-		end
-
-		--if this is a polygon, we will check each side
-		--if this is not a polygon, we will break at the end of the loop
-		for i, vertex in ipairs(collider) do
-			if icollider == 1 or otherType ~= Circle then
-				normal = Vector2.rotate(collider[i%len + 1] - vertex, 90)
-			end
-
-			--the vector might be (0,0) if the 2nd collider is a circle,
-			--and the 1st collider is touching its center
-			if normal.x == 0 and normal.y == 0 then
-				return true, {shortestOverlap=other.radius}
-			end
-
-			local normalAngle = normal:angle()
-
-			local minPoint1 = nil
-			local maxPoint1 = nil
-
-			--project the first collider's vertices against the normal
-
-			--we 'adjust' the projections by rotating them to y=0, to make them easier to sort
-			for j, vertex2 in ipairs(poly1Verts) do
-				local projected = vertex2:project(normal)
-				local adjustedProjected = projected:rotate(normalAngle)
-
-				if not minPoint1 then
-					minPoint1 = adjustedProjected
-				end
-
-				if not maxPoint1 then
-					maxPoint1 = adjustedProjected
-				elseif adjustedProjected.x < minPoint1.x then
-					minPoint1 = adjustedProjected
-				elseif adjustedProjected.x > maxPoint1.x then
-					maxPoint1 = adjustedProjected
-				end
-			end
-
-			local minPoint2 = nil
-			local maxPoint2 = nil
-
-			--project the second collider's vertices against the normal
-			for j, vertex2 in ipairs(otherVerts) do
-				local projected = vertex2:project(normal)
-				local adjustedProjected = projected:rotate(normalAngle)
-
-
-				if otherType == Circle then
-					minPoint2 = adjustedProjected - Vector2(gc.radius, 0)
-					maxPoint2 = adjustedProjected + Vector2(gc.radius, 0)
-				else
-					if not minPoint2 then
-						minPoint2 = adjustedProjected
-					end
-
-					if not maxPoint2 then
-						maxPoint2 = adjustedProjected
-					elseif adjustedProjected.x < minPoint2.x then
-						minPoint2 = adjustedProjected
-					elseif adjustedProjected.x > maxPoint2.x then
-						maxPoint2 = adjustedProjected
-					end
-				end
-			end
-
-			local points = {{minPoint1,1}, {minPoint2,2}, {maxPoint1,1}, {maxPoint2,2}}
-			table.sort(points, function(a,b) return a[1].x < b[1].x end)
-
-			--if the first two sorted points are from the same collider, we've found a gap
-			--(unless the min of one is exactly the max of the other)
-			if points[1][2] == points[2][2] and points[2][1].x ~= points[3][1].x then
-				return false
-			end
-
-			--calculate the lowest distance at which the shapes overlap
-			if not minDistance then
-				minDistance = points[3][1].x - points[2][1].x
-			else
-				local d = points[3][1].x - points[2][1].x
-				if d < minDistance then
-					minDistance = d
-				end
-			end
-
-			--if this is a circle, there is only one "normal" to check, so we can break now
-			if icollider == 2 and otherType == Circle then
-				break
-			end 
-		end
-	end
-
-	--if no gaps have been found, there must be a collision
-	return true, {shortestOverlap=minDistance}
-end
 
+-- defined with the other intersection functions below
+local intersectingPolygonAndOther
 
 --[[public]]
 
@@ -714,8 +648,27 @@ function Polygon:globalPolygon(transform)
 	return Polygon(self:globalVertices(transform))
 end
 
+function Polygon:globalBounds(transform)
+	--return the edges of a box containing the global vertices: minX, minY, maxX, maxY
+
+	local cosine, sine = rotationFactors(transform.rotation)
+	local sx, sy = transform.size.x, transform.size.y
+	local px, py = transform.position.x, transform.position.y
+	local minX, minY, maxX, maxY = math.huge, math.huge, -math.huge, -math.huge
+
+	for i, vertex in ipairs(self.vertices) do
+		local x, y = vertex.x * sx, vertex.y * sy
+		x, y = (x * cosine) - (y * sine) + px, (x * sine) + (y * cosine) + py
+
+		minX, maxX = math.min(minX, x), math.max(maxX, x)
+		minY, maxY = math.min(minY, y), math.max(maxY, y)
+	end
+
+	return minX, minY, maxX, maxY
+end
+
 function Polygon:contains(vector)
-	return intersectingPolygonAndOther(self, vector)
+	return intersectingPolygonAndOther(self, Polygon, vector, Vector2)
 end
 
 function Polygon:isConvex()
@@ -812,6 +765,35 @@ function Rectangle:globalRectangle(transform)
 	return Rectangle(width, height, position)
 end
 
+function Rectangle:globalBounds(transform)
+	--return the edges of a box containing the global rectangle: minX, minY, maxX, maxY
+
+	local r = transform.rotation
+	local cosine, sine = rotationFactors(r)
+	local sx, sy = transform.size.x, transform.size.y
+	local px, py = transform.position.x, transform.position.y
+
+	--half the width and height of the box around the rotated rectangle
+	local hw, hh = self.width * sx / 2, self.height * sy / 2
+	local ex = math.abs(cosine) * hw + math.abs(sine) * hh
+	local ey = math.abs(sine) * hw + math.abs(cosine) * hh
+
+	--globalVertices scales the rectangle's position along with its size
+	local x, y = self.position.x * sx, self.position.y * sy
+	local cx, cy = (x * cosine) - (y * sine) + px, (x * sine) + (y * cosine) + py
+	local minX, minY, maxX, maxY = cx - ex, cy - ey, cx + ex, cy + ey
+
+	--but globalRectangle, which is used when the rotation is a multiple of 90, doesn't
+	if r % 90 == 0 then
+		x, y = self.position.x, self.position.y
+		cx, cy = (x * cosine) - (y * sine) + px, (x * sine) + (y * cosine) + py
+		minX, maxX = math.min(minX, cx - ex), math.max(maxX, cx + ex)
+		minY, maxY = math.min(minY, cy - ey), math.max(maxY, cy + ey)
+	end
+
+	return minX, minY, maxX, maxY
+end
+
 function Rectangle:toPolygon()
 	return Polygon(self:vertices())
 end
@@ -830,10 +812,357 @@ intersection functions
 
 --[[internal]]
 
+-- the factors used by Vector2:rotate to turn an edge into its normal
+local NORMAL_COSINE, NORMAL_SINE = rotationFactors(90)
+
+-- transform used when none is given
+local IDENTITY = Transform()
+
+-- world-space vertices and separating axes of polygons (and rectangles treated as
+-- polygons), kept until the shape or its transform changes. the data is kept per shape
+-- and per transform, so a shape can be tested against itself at another transform.
+-- the data doesn't refer to its transform, which would keep the weak key alive
+local polygonCache = setmetatable({}, {__mode = "k"})
+
+local function figureType(fig)
+	--the same as class.instanceof(fig, Vector2, Rectangle, Circle, Polygon),
+	--without building a table of classes on every call
+
+	local cl = type(fig) == "table" and fig.__class
+
+	while cl do
+		if cl == Vector2 or cl == Rectangle or cl == Circle or cl == Polygon then
+			return cl
+		end
+		cl = cl.__base
+	end
+
+	return false
+end
+
+local function narrowPhaseTransform(transform, ignoreRotation)
+	--return a Transform that can be used as a cache key without being copied
+
+	if ignoreRotation then
+		transform = Transform(transform)
+		transform.rotation = 0
+		return transform
+	elseif transform == nil then
+		return IDENTITY
+	elseif type(transform) == "table" and transform.__class == Transform then
+		return transform
+	end
+
+	return Transform(transform)
+end
+
+local function vectorAngle(x, y)
+	--Vector2.angle, for numbers
+
+	local c = 180/math.pi
+
+	if x == 0 then
+		if y > 0 then
+			return 0.5 * math.pi * c
+		else
+			return 1.5 * math.pi * c
+		end
+	end
+
+	local ang = math.atan(y / x)
+
+	if x < 0 then
+		return (ang + math.pi) * c
+	elseif y < 0 then
+		return (ang + (2 * math.pi)) * c
+	else
+		return ang * c
+	end
+end
+
+local function projectOnAxis(x, y, nx, ny, nn, cosine, sine)
+	--project a point onto an axis, and return its distance along the axis.
+	--this is Vector2.project followed by Vector2.rotate, for numbers
+
+	local k = ((x * nx) + (y * ny)) / nn
+	local px, py = nx * k, ny * k
+
+	return (px * cosine) - (py * sine)
+end
+
+local function setLocalVertex(data, i, x, y)
+
+	if data.lx[i] ~= x or data.ly[i] ~= y then
+		data.lx[i], data.ly[i] = x, y
+		data.version = nil
+	end
+end
+
+local function polygonData(shape, shapeType, transform)
+	--return the world-space data of a Polygon, or of a Rectangle as Rectangle:toPolygon
+	--would make it. the data is only recalculated if the shape or transform has changed
+
+	local transforms = polygonCache[shape]
+
+	if not transforms then
+		transforms = setmetatable({}, {__mode = "k"})
+		polygonCache[shape] = transforms
+	end
+
+	local data = transforms[transform]
+
+	if not data then
+		data = {
+			n = 0,
+			-- local vertices
+			lx = {}, ly = {},
+			-- world vertices
+			x = {}, y = {},
+			-- axes: normal, its dot product with itself, rotation factors for projections,
+			-- and the range of the polygon's own projection
+			nx = {}, ny = {}, nn = {}, cosine = {}, sine = {}, min = {}, max = {},
+		}
+		transforms[transform] = data
+	end
+
+	local n
+
+	if shapeType == Rectangle then
+		local x, y = shape.position.x, shape.position.y
+		local width, height = shape.width, shape.height
+
+		-- from top left clockwise, like Rectangle:vertices
+		setLocalVertex(data, 1, x + (-width/2), y + height/2)
+		setLocalVertex(data, 2, x + width/2, y + height/2)
+		setLocalVertex(data, 3, x + width/2, y + (-height/2))
+		setLocalVertex(data, 4, x + (-width/2), y + (-height/2))
+		n = 4
+	else
+		local vertices = shape.vertices
+		n = #vertices
+
+		for i = 1, n do
+			local vertex = vertices[i]
+			setLocalVertex(data, i, vertex.x, vertex.y)
+		end
+	end
+
+	if data.n ~= n then
+		for i = n + 1, data.n do
+			data.lx[i], data.ly[i] = nil, nil
+		end
+		data.n = n
+		data.version = nil
+	end
+
+	if data.version == transform._version then
+		return data
+	end
+
+	local lx, ly, wx, wy = data.lx, data.ly, data.x, data.y
+	local nx, ny, nn = data.nx, data.ny, data.nn
+
+	-- world vertices, like Polygon:globalVertices
+	local cosine, sine = rotationFactors(transform.rotation)
+	local sx, sy = transform.size.x, transform.size.y
+	local px, py = transform.position.x, transform.position.y
+
+	for i = 1, n do
+		local x, y = lx[i] * sx, ly[i] * sy
+		wx[i] = (x * cosine) - (y * sine) + px
+		wy[i] = (x * sine) + (y * cosine) + py
+	end
+
+	-- the normal of each side, and the polygon's own projection onto it
+	for i = 1, n do
+		local j = i % n + 1
+		local dx, dy = wx[j] - wx[i], wy[j] - wy[i]
+		local x, y = (dx * NORMAL_COSINE) - (dy * NORMAL_SINE), (dx * NORMAL_SINE) + (dy * NORMAL_COSINE)
+
+		nx[i], ny[i] = x, y
+
+		-- a side of length 0 has no normal. the intersection test handles it separately
+		if not (x == 0 and y == 0) then
+			local c, s = rotationFactors(vectorAngle(x, y))
+			local dot = x * x + y * y
+			local min, max
+
+			for k = 1, n do
+				local p = projectOnAxis(wx[k], wy[k], x, y, dot, c, s)
+				if not min or p < min then
+					min = p
+				end
+				if not max or p > max then
+					max = p
+				end
+			end
+
+			nn[i], data.cosine[i], data.sine[i] = dot, c, s
+			data.min[i], data.max[i] = min, max
+		end
+	end
+
+	for i = n + 1, #wx do
+		wx[i], wy[i], nx[i], ny[i], nn[i] = nil, nil, nil, nil, nil
+		data.cosine[i], data.sine[i], data.min[i], data.max[i] = nil, nil, nil, nil
+	end
+
+	data.version = transform._version
+
+	return data
+end
+
+local function polygonRange(data, nx, ny, nn, cosine, sine)
+	--return the range of a polygon's projection onto an axis
+
+	local wx, wy = data.x, data.y
+	local min, max
+
+	for i = 1, data.n do
+		local p = projectOnAxis(wx[i], wy[i], nx, ny, nn, cosine, sine)
+		if not min or p < min then
+			min = p
+		end
+		if not max or p > max then
+			max = p
+		end
+	end
+
+	return min, max
+end
+
+local function rangeOverlap(min1, max1, min2, max2)
+	--return the length of the overlap of two ranges, or nil if there is a gap between them
+
+	local low = min1 > min2 and min1 or min2
+	local high = max1 < max2 and max1 or max2
+
+	if low > high then
+		return nil
+	end
+
+	return high - low
+end
+
+intersectingPolygonAndOther = function(poly1, poly1Type, other, otherType, transform1, transform2)
+	--separating axis test between a polygon and a polygon, circle or point.
+	--rectangles passed as poly1 or other are treated as polygons
+
+	local p1 = polygonData(poly1, poly1Type, transform1 or IDENTITY)
+	local p2, gx, gy, gr
+
+	if otherType == Vector2 then
+		gx, gy = other.x, other.y
+	elseif otherType == Circle then
+		gx = other.position.x + transform2.position.x
+		gy = other.position.y + transform2.position.y
+		gr = other.radius * transform2.size.x
+	else
+		p2 = polygonData(other, otherType, transform2)
+	end
+
+	local minDistance = nil
+
+	--check against every normal of the first polygon
+	for i = 1, p1.n do
+
+		local nx, ny = p1.nx[i], p1.ny[i]
+
+		if nx == 0 and ny == 0 then
+			return true, {shortestOverlap=other.radius}
+		end
+
+		local nn, cosine, sine = p1.nn[i], p1.cosine[i], p1.sine[i]
+		local min2, max2
+
+		if p2 then
+			min2, max2 = polygonRange(p2, nx, ny, nn, cosine, sine)
+		else
+			local p = projectOnAxis(gx, gy, nx, ny, nn, cosine, sine)
+			if gr then
+				min2, max2 = p - gr, p + gr
+			else
+				min2, max2 = p, p
+			end
+		end
+
+		local d = rangeOverlap(p1.min[i], p1.max[i], min2, max2)
+
+		if not d then
+			return false
+		elseif not minDistance or d < minDistance then
+			minDistance = d
+		end
+	end
+
+	--a point has no axes of its own
+	if otherType == Vector2 then
+		return true
+	end
+
+	if p2 then
+		--check against every normal of the second polygon
+		for i = 1, p2.n do
+
+			local nx, ny = p2.nx[i], p2.ny[i]
+
+			if nx == 0 and ny == 0 then
+				return true, {shortestOverlap=other.radius}
+			end
+
+			local min1, max1 = polygonRange(p1, nx, ny, p2.nn[i], p2.cosine[i], p2.sine[i])
+			local d = rangeOverlap(min1, max1, p2.min[i], p2.max[i])
+
+			if not d then
+				return false
+			elseif not minDistance or d < minDistance then
+				minDistance = d
+			end
+		end
+	else
+		--for a circle, the axis is the line between the closest polygon vertex and the
+		--circle center
+		-- TODO: find the point by using voronoi regions instead
+		local wx, wy = p1.x, p1.y
+		local minSm, closest
+
+		for i = 1, p1.n do
+			local sm = (wx[i] - gx)^2 + (wy[i] - gy)^2
+			if not minSm or sm <= minSm then
+				minSm = sm
+				closest = i
+			end
+		end
+
+		local nx, ny = gx - wx[closest], gy - wy[closest]
+
+		--the vector might be (0,0) if the polygon is touching the circle's center
+		if nx == 0 and ny == 0 then
+			return true, {shortestOverlap=other.radius}
+		end
+
+		local nn = nx * nx + ny * ny
+		local cosine, sine = rotationFactors(vectorAngle(nx, ny))
+		local min1, max1 = polygonRange(p1, nx, ny, nn, cosine, sine)
+		local p = projectOnAxis(gx, gy, nx, ny, nn, cosine, sine)
+		local d = rangeOverlap(min1, max1, p - gr, p + gr)
+
+		if not d then
+			return false
+		elseif not minDistance or d < minDistance then
+			minDistance = d
+		end
+	end
+
+	--if no gaps have been found, there must be a collision
+	return true, {shortestOverlap=minDistance}
+end
+
 local function intersectingCircles(cir1, cir2, transform1, transform2)
 
-	local gcir1, gcir2 = cir1:globalCircle(transform1), cir2:globalCircle(transform2)
-	local distance = Vector2(gcir1.position - gcir2.position):magnitude()
+	local dx = (cir1.position.x + transform1.position.x) - (cir2.position.x + transform2.position.x)
+	local dy = (cir1.position.y + transform1.position.y) - (cir2.position.y + transform2.position.y)
+	local distance = math.sqrt(dx^2 + dy^2)
 	local intersecting = distance <= cir1.radius + cir2.radius
 
 	local data
@@ -845,61 +1174,65 @@ local function intersectingCircles(cir1, cir2, transform1, transform2)
 	return intersecting, data
 end
 
+local function fixedRectangle(rect, transform)
+	--return the center, width and height of Rectangle:globalRectangle(transform)
+
+	local r = transform.rotation
+	local width = rect.width * transform.size.x
+	local height = rect.height * transform.size.y
+
+	--width and height are switched if rectangle is on its side
+	if r % 90 == 0 and r % 180 ~= 0 then
+		width, height = height, width
+	end
+
+	local cosine, sine = rotationFactors(r)
+	local x, y = rect.position.x, rect.position.y
+
+	return
+		((x * cosine) - (y * sine)) + transform.position.x,
+		((x * sine) + (y * cosine)) + transform.position.y,
+		width, height
+end
+
 local function intersectingFixedRectangles(rect1, rect2, transform1, transform2, direction)
 	--checks intersection of two rectangles, where rotation is assumed to be divisible by 90
 
-	local rect1 = rect1:globalRectangle(transform1)
-	local rect2 = rect2:globalRectangle(transform2)
-
-	-- return
-	-- 	--is 1's left edge on, or to the left of, 2's right edge?
-	-- 	rect1.position.x <= rect2.position.x + rect2.width and
-	-- 	--is 1's right edge on, or to the right of, 2's left edge?
-	-- 	rect1.position.x + rect1.width >= rect2.position.x and
-	-- 	--is 1's top edge on or above 2's bottom edge?
-	-- 	rect1.position.y >= rect2.position.y - rect2.height and
-	-- 	--is 1's bottom edge on or below 2's top edge?
-	-- 	rect1.position.y - rect1.height <= rect2.position.y
-
-	local overlaps = {
-		--is 1's left edge on, or to the left of, 2's right edge?
-		(rect1.position.x - rect1.width/2) - (rect2.position.x + rect2.width/2),
-		--is 1's right edge on, or to the right of, 2's left edge?
-		(rect2.position.x - rect2.width/2) - (rect1.position.x + rect1.width/2),
-		--is 1's top edge on or above 2's bottom edge?
-		(rect2.position.y - rect2.height/2) - (rect1.position.y + rect1.height/2),
-		--is 1's bottom edge on or below 2's top edge?
-		(rect1.position.y - rect1.height/2) - (rect2.position.y + rect2.height/2)
-	}
-	local minDistance = nil
+	local x1, y1, width1, height1 = fixedRectangle(rect1, transform1)
+	local x2, y2, width2, height2 = fixedRectangle(rect2, transform2)
 
-	for i, o in ipairs(overlaps) do
-		if o > 0 then
-			return false
-		elseif not minDistance then
-			minDistance = math.abs(o)
-		elseif math.abs(o) < minDistance then
-			minDistance = math.abs(o)
-		end
+	--is 1's left edge on, or to the left of, 2's right edge?
+	local left = (x1 - width1/2) - (x2 + width2/2)
+	--is 1's right edge on, or to the right of, 2's left edge?
+	local right = (x2 - width2/2) - (x1 + width1/2)
+	--is 1's top edge on or above 2's bottom edge?
+	local top = (y2 - height2/2) - (y1 + height1/2)
+	--is 1's bottom edge on or below 2's top edge?
+	local bottom = (y1 - height1/2) - (y2 + height2/2)
+
+	if left > 0 or right > 0 or top > 0 or bottom > 0 then
+		return false
 	end
 
-	local data = {shortestOverlap=minDistance}
+	local data = {
+		shortestOverlap = math.min(math.abs(left), math.abs(right), math.abs(top), math.abs(bottom))
+	}
 
 	--TODO: deal with diagonal directions
 
 	if direction then
 		--1 approaching from the left
 		if direction.x > 0 then
-			data.directionOverlap = overlaps[2]
+			data.directionOverlap = right
 		--1 approaching from the right
 		elseif direction.x < 0 then
-			data.directionOverlap = overlaps[1]
+			data.directionOverlap = left
 		--1 approaching from the top
 		elseif direction.y < 0 then
-			data.directionOverlap = overlaps[4]
+			data.directionOverlap = bottom
 		--1 approaching from the bottom
 		elseif direction.y > 0 then
-			data.directionOverlap = overlaps[3]
+			data.directionOverlap = top
 		end
 
 		data.directionOverlap = math.abs(data.directionOverlap)
@@ -924,20 +1257,226 @@ end
 -- 	return rect:contains(cir.position)
 -- end
 
+-- overlaps smaller than this are treated as touching, so that shapes which have been
+-- stopped against each other can still slide along each other
+local CONTACT_EPSILON = 1e-7
 
-local function guaranteeOrder(firstValue, ...)
+local function projectVertices(data, nx, ny)
+	--return the range of a polygon's projection onto a unit axis
 
-	local arg = {...}
+	local wx, wy = data.x, data.y
+	local min, max = math.huge, -math.huge
 
-	if arg[1] ~= firstValue then
-		local newarg = {}
-		for i = 1, #arg, 2 do
-			newarg[i] = arg[i+1]
-			newarg[i+1] = arg[i]
+	for i = 1, data.n do
+		local p = wx[i] * nx + wy[i] * ny
+		if p < min then
+			min = p
 		end
-		return unpack(newarg)
-	else
-		return ...
+		if p > max then
+			max = p
+		end
+	end
+
+	return min, max
+end
+
+local function sweptPolygons(p1, p2, vx, vy)
+	--time of impact of polygon 1 moving by (vx, vy) towards polygon 2. on each axis of
+	--the separating axis test, the projections overlap during one interval of the move,
+	--and the polygons only overlap where all of the intervals do
+
+	local first, last, contact = -math.huge, math.huge, 0
+	local normalX, normalY = 0, 0
+	-- the axis with the least penetration, in case the polygons already overlap
+	local depth, pushX, pushY, pushSpeed = math.huge, 0, 0, 0
+
+	for k = 1, 2 do
+		local p = k == 1 and p1 or p2
+
+		for i = 1, p.n do
+			local nx, ny = p.nx[i], p.ny[i]
+
+			if not (nx == 0 and ny == 0) then
+				local length = math.sqrt(nx * nx + ny * ny)
+				nx, ny = nx / length, ny / length
+
+				local min1, max1 = projectVertices(p1, nx, ny)
+				local min2, max2 = projectVertices(p2, nx, ny)
+				local speed = vx * nx + vy * ny
+
+				if max1 - min2 < depth then
+					depth, pushX, pushY, pushSpeed = max1 - min2, -nx, -ny, -speed
+				end
+				if max2 - min1 < depth then
+					depth, pushX, pushY, pushSpeed = max2 - min1, nx, ny, speed
+				end
+
+				if speed == 0 then
+					if max1 <= min2 + CONTACT_EPSILON or min1 >= max2 - CONTACT_EPSILON then
+						return nil
+					end
+				else
+					local enter, exit
+					if speed > 0 then
+						enter, exit = (min2 - max1) / speed, (max2 - min1) / speed
+					else
+						enter, exit = (max2 - min1) / speed, (min2 - max1) / speed
+					end
+
+					local margin = CONTACT_EPSILON / math.abs(speed)
+
+					if enter + margin > first then
+						first, contact = enter + margin, enter
+						normalX, normalY = speed > 0 and -nx or nx, speed > 0 and -ny or ny
+					end
+					if exit - margin < last then
+						last = exit - margin
+					end
+
+					if first >= last or first >= 1 or last <= 0 then
+						return nil
+					end
+				end
+			end
+		end
+	end
+
+	if first >= 0 then
+		return math.max(contact, 0), normalX, normalY
+	end
+
+	--the polygons already overlap. they may move apart, but not any further into each other
+	if pushSpeed < 0 then
+		return 0, pushX, pushY
+	end
+end
+
+local function sweptCircles(x1, y1, r1, x2, y2, r2, vx, vy)
+	--time of impact of circle 1 moving by (vx, vy) towards circle 2
+
+	local dx, dy = x1 - x2, y1 - y2
+	local radius = r1 + r2
+	local distance = math.sqrt(dx * dx + dy * dy)
+	local approach = dx * vx + dy * vy
+
+	-- moving apart, or along each other
+	if approach >= 0 then
+		return nil
+	end
+
+	if distance < radius - CONTACT_EPSILON then
+		return 0, dx / distance, dy / distance
+	end
+
+	local a = vx * vx + vy * vy
+	local b = 2 * approach
+	local c = math.max(distance * distance - radius * radius, 0)
+	local discriminant = b * b - 4 * a * c
+
+	if discriminant < 0 then
+		return nil
+	end
+
+	local t = (-b - math.sqrt(discriminant)) / (2 * a)
+
+	if t > 1 then
+		return nil
+	end
+
+	t = math.max(t, 0)
+	return t, (dx + vx * t) / radius, (dy + vy * t) / radius
+end
+
+local function sweptCircleAndPolygon(cx, cy, r, p, vx, vy)
+	--time of impact of a circle moving by (vx, vy) towards a polygon, found by casting the
+	--circle's center against the polygon grown by the circle's radius: its sides pushed
+	--outwards, and its corners rounded. the normal points from the polygon to the circle
+
+	local wx, wy, n = p.x, p.y, p.n
+
+	--the center of the polygon, to tell which way each side faces
+	local mx, my = 0, 0
+	for i = 1, n do
+		mx, my = mx + wx[i], my + wy[i]
+	end
+	mx, my = mx / n, my / n
+
+	local inside = true
+	local closest, closestX, closestY = math.huge, 0, 0
+	local first, normalX, normalY = math.huge, 0, 0
+
+	for i = 1, n do
+		local j = i % n + 1
+		local ex, ey = wx[j] - wx[i], wy[j] - wy[i]
+		local ee = ex * ex + ey * ey
+
+		if ee > 0 then
+			local length = math.sqrt(ee)
+			local nx, ny = ey / length, -ex / length
+
+			if nx * (mx - wx[i]) + ny * (my - wy[i]) > 0 then
+				nx, ny = -nx, -ny
+			end
+
+			local distance = nx * (cx - wx[i]) + ny * (cy - wy[i])
+			if distance > 0 then
+				inside = false
+			end
+
+			--the point of the side closest to the center
+			local u = math.min(math.max(((cx - wx[i]) * ex + (cy - wy[i]) * ey) / ee, 0), 1)
+			local qx, qy = wx[i] + ex * u, wy[i] + ey * u
+			local sm = (cx - qx)^2 + (cy - qy)^2
+
+			if sm < closest then
+				closest, closestX, closestY = sm, nx, ny
+				if sm > 0 and distance > 0 then
+					local d = math.sqrt(sm)
+					closestX, closestY = (cx - qx) / d, (cy - qy) / d
+				end
+			end
+
+			--the side, pushed out by the radius
+			local speed = nx * vx + ny * vy
+			if speed < 0 then
+				local t = (r - distance) / speed
+				if t < first then
+					local hx, hy = cx + vx * t, cy + vy * t
+					u = ((hx - wx[i]) * ex + (hy - wy[i]) * ey) / ee
+					if u >= 0 and u <= 1 then
+						first, normalX, normalY = t, nx, ny
+					end
+				end
+			end
+
+			--the corner, rounded by the radius
+			local dx, dy = cx - wx[i], cy - wy[i]
+			local b = 2 * (dx * vx + dy * vy)
+			if b < 0 then
+				local a = vx * vx + vy * vy
+				local c = dx * dx + dy * dy - r * r
+				local discriminant = b * b - 4 * a * c
+				if discriminant >= 0 then
+					local t = (-b - math.sqrt(discriminant)) / (2 * a)
+					if t < first then
+						first = t
+						normalX, normalY = (dx + vx * t) / r, (dy + vy * t) / r
+					end
+				end
+			end
+		end
+	end
+
+	if inside or closest < (r - CONTACT_EPSILON)^2 then
+		--already overlapping. the circle may move out, but not any further in
+		if closestX * vx + closestY * vy < 0 then
+			return 0, closestX, closestY
+		end
+		return nil
+	end
+
+	if first <= 1 then
+		return math.max(first, 0), normalX, normalY
 	end
 end
 
@@ -945,15 +1484,15 @@ end
 
 local function intersecting(fig1, fig2, transform1, transform2, ignoreRotation1, ignoreRotation2, direction)
 
+	local fig1Type, fig2Type = figureType(fig1), figureType(fig2)
+
 	assert(
-		class.instanceof(fig1, Shape, Vector2) and class.instanceof(fig2, Shape, Vector2),
+		(fig1Type or class.instanceof(fig1, Shape)) and (fig2Type or class.instanceof(fig2, Shape)),
 		"both figures must be instances of Shape or Vector2"
 	)
 
-	transform1 = Transform(transform1)
-	transform2 = Transform(transform2)
-	local fig1Type = class.instanceof(fig1, Vector2, Rectangle, Circle, Polygon)
-	local fig2Type = class.instanceof(fig2, Vector2, Rectangle, Circle, Polygon)
+	transform1 = narrowPhaseTransform(transform1, ignoreRotation1)
+	transform2 = narrowPhaseTransform(transform2, ignoreRotation2)
 
 	--collision between two points
 	if fig1Type == Vector2 and fig2Type == Vector2 then
@@ -962,16 +1501,14 @@ local function intersecting(fig1, fig2, transform1, transform2, ignoreRotation1,
 		return fig1.x == fig2.x and fig1.y == fig2.y and fig1.z == fig2.z
 	end
 
-	--if not ignoreRotation and rotation not divisible by 90, cast any rectangles to polygons
-	if ignoreRotation1 then
-		transform1.rotation = 0 
-	elseif fig1Type == Rectangle and transform1.rotation % 90 ~= 0 then
-		fig1, fig1Type = fig1:toPolygon(), Polygon
+	--if rotation is not divisible by 90, treat rectangles as polygons
+	local shape1Type, shape2Type = fig1Type, fig2Type
+
+	if fig1Type == Rectangle and transform1.rotation % 90 ~= 0 then
+		fig1Type = Polygon
 	end
-	if ignoreRotation2 then
-		transform2.rotation = 0 
-	elseif fig2Type == Rectangle and transform2.rotation % 90 ~= 0 then
-		fig2, fig2Type = fig2:toPolygon(), Polygon
+	if fig2Type == Rectangle and transform2.rotation % 90 ~= 0 then
+		fig2Type = Polygon
 	end
 
 	--collision between two fixed rectangles
@@ -980,21 +1517,20 @@ local function intersecting(fig1, fig2, transform1, transform2, ignoreRotation1,
 
 	--collision between a fixed rectangle and something else
 	elseif fig1Type == Rectangle or fig2Type == Rectangle then
-		local _, otherType, rec, other, transformRec, transformOther, ignoreRotationRec, ignoreRotationOther =
-			guaranteeOrder(
-				Rectangle,
-				fig1Type, fig2Type, fig1, fig2, transform1, transform2, ignoreRotation1, ignoreRotation2
-			)
+		--put the rectangle first
+		if fig1Type ~= Rectangle then
+			fig1, fig2 = fig2, fig1
+			fig1Type, fig2Type = fig2Type, fig1Type
+			shape1Type, shape2Type = shape2Type, shape1Type
+			transform1, transform2 = transform2, transform1
+		end
 
 		--collision between a fixed rectangle and a vector
-		if otherType == Vector2 then
-			return rec:globalRectangle(transformRec):contains(other + transformOther.position)
-		--collision between a fixed rectangle and a circle
-		-- elseif otherType == Circle then
-			-- return intersectingFixedRectangleAndCircle(rec, other, transformRec, transformOther)
-		--collision between a fixed rectangle and a polygon
-		elseif otherType == Polygon or otherType == Circle then
-			return intersectingPolygonAndOther(rec:toPolygon(), other, transformRec, transformOther)
+		if fig2Type == Vector2 then
+			return fig1:globalRectangle(transform1):contains(fig2 + transform2.position)
+		--collision between a fixed rectangle and a polygon or circle
+		elseif fig2Type == Polygon or fig2Type == Circle then
+			return intersectingPolygonAndOther(fig1, Rectangle, fig2, shape2Type, transform1, transform2)
 		end
 
 	--collision between two circles
@@ -1003,31 +1539,96 @@ local function intersecting(fig1, fig2, transform1, transform2, ignoreRotation1,
 
 	--collision between a circle and either a vector or a polygon
 	elseif fig1Type == Circle or fig2Type == Circle then
-
-		local _, otherType, cir, other, transformCir, transformOther, __, ignoreRotationOther =
-			guaranteeOrder(
-				Circle,
-				fig1Type, fig2Type, fig1, fig2, transform1, transform2, ignoreRotation1, ignoreRotation2
-			)
+		--put the circle first
+		if fig1Type ~= Circle then
+			fig1, fig2 = fig2, fig1
+			fig1Type, fig2Type = fig2Type, fig1Type
+			shape1Type, shape2Type = shape2Type, shape1Type
+			transform1, transform2 = transform2, transform1
+		end
 
 		--collision between a circle and a vector
-		if otherType == Vector2 then
-			return cir:globalCircle(transformCir):contains(other)
+		if fig2Type == Vector2 then
+			return fig1:globalCircle(transform1):contains(fig2)
 		--collision between a circle and a polygon
 		else
-			cir = Circle(cir.radius, cir.position)
-			return intersectingPolygonAndOther(other, cir, transformOther, transformCir)
+			return intersectingPolygonAndOther(fig2, shape2Type, fig1, Circle, transform2, transform1)
 		end
 
 	--collision between a polygon and either a polygon or a vector
 	elseif fig1Type == Polygon or fig2Type == Polygon then
-		--we've already accounted for rotation by now
-		local _, otherType, pol, other, transformPol, transformOther =
-			guaranteeOrder(
-				Polygon, fig1Type, fig2Type, fig1, fig2, transform1, transform2
-			)
+		--put the polygon first
+		if fig1Type ~= Polygon then
+			fig1, fig2 = fig2, fig1
+			fig1Type, fig2Type = fig2Type, fig1Type
+			shape1Type, shape2Type = shape2Type, shape1Type
+			transform1, transform2 = transform2, transform1
+		end
 
-		return intersectingPolygonAndOther(pol, other, transformPol, transformOther)
+		return intersectingPolygonAndOther(fig1, shape1Type, fig2, shape2Type, transform1, transform2)
+	end
+end
+
+local function timeOfImpact(shape1, shape2, transform1, transform2, displacement)
+	--return how far shape1 can be moved by displacement before it touches shape2, as a
+	--fraction from 0 to 1, and the normal of the contact (pointing from shape2 to shape1).
+	--returns nil if the shapes don't touch on the way. shapes that are touching can
+	--move along each other, and shapes that already overlap can move apart.
+	--polygons are assumed to be convex
+
+	local shape1Type, shape2Type = figureType(shape1), figureType(shape2)
+
+	assert(
+		shape1Type and shape1Type ~= Vector2 and shape2Type and shape2Type ~= Vector2,
+		"both shapes must be Rectangles, Circles or Polygons"
+	)
+
+	transform1 = narrowPhaseTransform(transform1)
+	transform2 = narrowPhaseTransform(transform2)
+
+	local vx, vy = displacement.x, displacement.y
+	local t, nx, ny
+
+	if vx == 0 and vy == 0 then
+		return nil
+	end
+
+	if shape1Type == Circle and shape2Type == Circle then
+		t, nx, ny = sweptCircles(
+			shape1.position.x + transform1.position.x, shape1.position.y + transform1.position.y,
+			shape1.radius * transform1.size.x,
+			shape2.position.x + transform2.position.x, shape2.position.y + transform2.position.y,
+			shape2.radius * transform2.size.x,
+			vx, vy
+		)
+	elseif shape1Type == Circle then
+		t, nx, ny = sweptCircleAndPolygon(
+			shape1.position.x + transform1.position.x, shape1.position.y + transform1.position.y,
+			shape1.radius * transform1.size.x,
+			polygonData(shape2, shape2Type, transform2),
+			vx, vy
+		)
+	elseif shape2Type == Circle then
+		--the circle moves towards the polygon instead, so the normal is turned around
+		t, nx, ny = sweptCircleAndPolygon(
+			shape2.position.x + transform2.position.x, shape2.position.y + transform2.position.y,
+			shape2.radius * transform2.size.x,
+			polygonData(shape1, shape1Type, transform1),
+			-vx, -vy
+		)
+		if t then
+			nx, ny = -nx, -ny
+		end
+	else
+		t, nx, ny = sweptPolygons(
+			polygonData(shape1, shape1Type, transform1),
+			polygonData(shape2, shape2Type, transform2),
+			vx, vy
+		)
+	end
+
+	if t then
+		return t, Vector2(nx, ny)
 	end
 end
 
@@ -1072,6 +1673,7 @@ geometry = {
 	Circle = Circle,
 	Rectangle = Rectangle,
 	intersecting = intersecting,
+	timeOfImpact = timeOfImpact,
 	degreesToRadians = function(d) return (d/180) * math.pi end,
 	flattenedVector2Array = flattenedVector2Array,
 	functions = functions
@@ -1086,7 +1688,6 @@ geometry = {
 for i, gClassTable in ipairs({
 	{"Vector2", x="number", y="number"},
 	{"Vector3", x="number", y="number", z="number"},
-	{"Transform", position={Vector3=Vector3}},
 	{"Rectangle", width="number+", height="number+", position={Vector2=Vector2}},
 	{"Circle", radius="number+", position={Vector2=Vector2}},
 	{"Polygon", vertices="table", position={Vector2=Vector2}},
@@ -1094,6 +1695,7 @@ for i, gClassTable in ipairs({
 
 	local gClass = gClassTable[1]
 	gClassTable[1] = nil
+	local isShape = class.subclassof(geometry[gClass], Shape)
 
 	for property, propertyType in pairs(gClassTable) do
 
@@ -1111,6 +1713,9 @@ for i, gClassTable in ipairs({
 				assertValueIsValidNumber(gClass, property, value, allowNegative, allowZero)
 
 				self["_" .. property] = value
+				if isShape then
+					self._version = self._version + 1
+				end
 
 				if self.callback then
 					self.callback(self, property, value)
@@ -1129,6 +1734,9 @@ for i, gClassTable in ipairs({
 				)
 
 				self["_" .. property] = value
+				if isShape then
+					self._version = self._version + 1
+				end
 
 				if self.callback then
 					self.callback(self, property, value)
@@ -1145,6 +1753,9 @@ for i, gClassTable in ipairs({
 				)
 
 				self["_" .. property] = value
+				if isShape then
+					self._version = self._version + 1
+				end
 
 				if self.callback then
 					self.callback(self, property, value)
@@ -9,6 +9,8 @@ local collections = require("lass.collections")
 local operators = require("lass.operators")
 local geometry = require("lass.geometry")
 local DelayObject = require("lass.delay")
+local SpatialHash = require("lass.spatialhash")
+local RenderBatches = require("lass.batching")
 local Collider = nil
 
 --[[
@@ -20,33 +22,143 @@ local Event = class.define(function(self, name)
 	self.name = name
 
 	self.listeners = {}
+	-- the components of the listeners that respond to each action, and their responses.
+	-- unsubscribed components leave a false behind until the next post
+	self.subscriptions = {}
+	-- how many posts of this event are running, so that subscriptions aren't compacted
+	-- while they're being walked
+	self.posting = 0
 end)
 
-for i, f in ipairs({"play", "stop", "pause", "seek"}) do
-	Event[f] = function(self, source, data)
-		return self:post(f, source, data)
+--[[internal]]
+
+local function subscribe(event, component)
+	--add a component's responses to the event to the subscriptions. the responses are
+	--looked up once, when the component subscribes
+
+	local responses = component.events[event.name]
+
+	for action, response in pairs(responses) do
+		local subscriptions = event.subscriptions[action]
+		if not subscriptions then
+			subscriptions = {components = {}, responses = {}, slots = {}, holes = 0}
+			event.subscriptions[action] = subscriptions
+		end
+
+		if not subscriptions.slots[component] then
+			local n = #subscriptions.components + 1
+			subscriptions.components[n], subscriptions.responses[n] = component, response
+			subscriptions.slots[component] = n
+		end
 	end
 end
 
-function Event:post(action, source, data)
+local function unsubscribe(event, component)
 
-	response = {}
+	for action, subscriptions in pairs(event.subscriptions) do
+		local slot = subscriptions.slots[component]
+		if slot then
+			subscriptions.components[slot], subscriptions.responses[slot] = false, false
+			subscriptions.slots[component] = nil
+			subscriptions.holes = subscriptions.holes + 1
+		end
+	end
+end
 
-	for listener in pairs(self.listeners) do
-		if listener.active then
-			for j, component in ipairs(listener.components) do
-				if
-					component.active and
-					component.events[self.name] and
-					component.events[self.name][action]
-				then
-					response[component] = component.events[self.name][action](component, source, data)
-				end
+local function compactSubscriptions(subscriptions)
+	--close the gaps left by unsubscribed components
+
+	local components, responses, slots = subscriptions.components, subscriptions.responses, subscriptions.slots
+	local n = 0
+
+	for i = 1, #components do
+		local component = components[i]
+		if component then
+			n = n + 1
+			components[n], responses[n] = component, responses[i]
+			slots[component] = n
+		end
+	end
+
+	for i = #components, n + 1, -1 do
+		components[i], responses[i] = nil, nil
+	end
+
+	subscriptions.holes = 0
+end
+
+local function subscribeComponent(listener, component)
+	--subscribe a component to every event its game object listens to
+
+	if listener._listeningTo and listener.active and component.active then
+		for event in pairs(listener._listeningTo) do
+			subscribe(event, component)
+		end
+	end
+end
+
+local function unsubscribeComponent(listener, component)
+
+	if listener._listeningTo then
+		for event in pairs(listener._listeningTo) do
+			unsubscribe(event, component)
+		end
+	end
+end
+
+local function dispatch(subscriptions, source, data, responses)
+	--call the responses of the subscribed components (see Event:post)
+
+	local components, functions = subscriptions.components, subscriptions.responses
+
+	-- components subscribed by a response are left for the next post
+	for i = 1, #components do
+		local component = components[i]
+
+		-- a component may have been deactivated directly, without its game object knowing
+		if component and component.active then
+			local response = functions[i](component, source, data)
+
+			if responses then
+				responses[component] = response
 			end
 		end
 	end
+end
+
+--[[public]]
+
+for i, f in ipairs({"play", "stop", "pause", "seek"}) do
+	Event[f] = function(self, source, data, responses)
+		return self:post(f, source, data, responses)
+	end
+end
+
+function Event:post(action, source, data, responses)
+	--call the responses of the listeners' components to action. if responses is a table,
+	--each component's return value is stored in it, and it is returned
+
+	local subscriptions = self.subscriptions[action]
+
+	if not subscriptions then
+		return responses
+	end
+
+	if subscriptions.holes > 0 and self.posting == 0 then
+		compactSubscriptions(subscriptions)
+	end
+
+	-- the lists mustn't be compacted while they are being posted to, even if a response
+	-- raises an error, so the count is restored before the error is passed on
+	self.posting = self.posting + 1
+	local ok, err = pcall(dispatch, subscriptions, source, data, responses)
+	self.posting = self.posting - 1
+
+	if not ok then
+		error(err, 0)
+	end
 
-	return response
+	return responses
 end
 
 --[[
@@ -94,6 +206,11 @@ end
 
 function Component:update(dt, firstUpdate) end
 
+function Component:reset()
+	--callback function that is invoked when a released object is acquired again
+	--(see GameScene:acquire). it should restore the state the component started with
+end
+
 class.addkey(Component, "events", EventResponseTable(), false)
 
 --[[
@@ -115,6 +232,142 @@ local function retrieveParentGlobalTransform(self)
 
 end
 
+local function readOnlyTransform(self, key)
+	error("attempt to modify a global transform; copy it with geometry.Transform() first")
+end
+
+local function drawableMoved(self)
+	-- the global z of a drawable object may have changed, so the scene should
+	-- check its place in the draw order before the next draw
+
+	local drawOrder = rawget(self, "_drawOrder")
+
+	if drawOrder and not drawOrder.moved[self] then
+		drawOrder.moved[self] = true
+		drawOrder.moved[#drawOrder.moved + 1] = self
+	end
+end
+
+local function invalidateGlobalTransform(self)
+	-- mark the cached global transforms of self and its descendants as stale.
+	-- a descendant of a stale entity is always stale too, so there's no need
+	-- to go any further than an entity that is already marked
+
+	if self._globalTransformDirty then
+		return
+	end
+
+	self._globalTransformDirty = true
+	drawableMoved(self)
+
+	for i, child in ipairs(self.children) do
+		invalidateGlobalTransform(child)
+	end
+end
+
+local function stepChanged(self)
+	-- with interpolation, the scene keeps the states of entities whose transforms
+	-- change during a fixed step (see GameScene:update)
+
+	local scene = rawget(self, "gameScene")
+	local interpolation = scene and scene.globals.interpolation
+
+	if interpolation and not interpolation.marked[self] then
+		interpolation.marked[self] = true
+		interpolation.changed[#interpolation.changed + 1] = self
+	end
+end
+
+local function transformChanged(self)
+	-- children always need to be visited here, even if self is already stale:
+	-- the top-level objects of a scene depend on the scene's local transform,
+	-- not its global one
+
+	self._globalTransformDirty = true
+	drawableMoved(self)
+	stepChanged(self)
+
+	if self.children then
+		for i, child in ipairs(self.children) do
+			invalidateGlobalTransform(child)
+		end
+	end
+end
+
+local function composeTransform(gt, x, y, z, rotation, sx, sy, sz, p)
+	-- write the global transform of a local position, rotation and size into gt,
+	-- given the parent's global transform p (or nil for no parent)
+
+	-- write the fields directly, so that the read-only callback isn't triggered
+	local position, size = gt._position, gt._size
+
+	if p == nil then
+		position._x, position._y, position._z = x, y, z
+		size._x, size._y, size._z = sx, sy, sz
+		gt._rotation = rotation
+	else
+		-- how to get global position:
+		--
+		-- 1. multiply each axis of the local position by the corresponding axis
+		--    from the parent's global size
+		-- 2. rotate that clockwise by the parent's global rotation
+		-- 3. add that to the parent's global position
+
+		local pp, ps = p._position, p._size
+		x, y = x * ps._x, y * ps._y
+		local angle = math.rad(-p._rotation)
+		local cosine = math.round(math.cos(angle), 10)
+		local sine = math.round(math.sin(angle), 10)
+
+		position._x = pp._x + (x * cosine - y * sine)
+		position._y = pp._y + (x * sine + y * cosine)
+		position._z = pp._z + z * ps._z
+
+		size._x, size._y, size._z = sx * ps._x, sy * ps._y, sz * ps._z
+		gt._rotation = (rotation + p._rotation) % 360
+	end
+
+	-- the fields were written directly, so bump the version by hand
+	gt._version = gt._version + 1
+end
+
+local function updateGlobalTransform(self)
+
+	local t = self._transform
+	local gt = self._globalTransform
+
+	if gt == nil then
+		gt = geometry.Transform()
+		gt.callback = readOnlyTransform
+		self._globalTransform = gt
+	end
+
+	local tp, ts = t._position, t._size
+
+	composeTransform(
+		gt, tp._x, tp._y, tp._z, t._rotation, ts._x, ts._y, ts._z,
+		retrieveParentGlobalTransform(self)
+	)
+	self._globalTransformDirty = false
+end
+
+local function currentGlobalTransform(self)
+	-- while the scene draws with interpolation, an entity that has moved in the last
+	-- step has a separate global transform for where it is drawn (see GameScene:draw)
+
+	local drawn = rawget(self, "_drawTransform")
+
+	if drawn then
+		return drawn
+	end
+
+	if self._globalTransformDirty then
+		updateGlobalTransform(self)
+	end
+
+	return self._globalTransform
+end
+
 local function findDescendantParent(self, descendant)
 	for i, child in ipairs(self.children) do
 		if child == descendant then
@@ -177,14 +430,15 @@ end
 
 local GameEntity = class.define(function(self, transform, parent)
 
+	self._globalTransformDirty = true
+	self.children = {}
+
 	if class.instanceof(transform, geometry.Transform) then
 		self.transform = transform
 	else
 		self.transform = geometry.Transform(transform)
 	end
 
-	self.children = {}
-
 	if parent then
 		parent:addChild(self)
 	end
@@ -192,90 +446,82 @@ local GameEntity = class.define(function(self, transform, parent)
 	-- maintainTransform(self)
 end)
 
-function GameEntity.__get.globalTransform(self)
+function GameEntity.__get.transform(self)
+	return self._transform
+end
 
-	local t = self.transform
-	local p = retrieveParentGlobalTransform(self)
+function GameEntity.__set.transform(self, value)
 
-	if p == nil then
-		return geometry.Transform(t)
+	if not class.instanceof(value, geometry.Transform) then
+		value = geometry.Transform(value)
 	end
 
-	-- how to get global position:
-	--
-	-- 1. multiply each axis of the local position by the corresponding axis
-	--    from the parent's global size
-	-- 2. rotate that clockwise by the parent's global rotation
-	-- 3. add that to the parent's global position
-
-	local gt = geometry.Transform({
-		position = p.position,
-		size = geometry.Vector3({
-			x = t.size.x * p.size.x,
-			y = t.size.y * p.size.y,
-			z = t.size.z * p.size.z,
-		}),
-		rotation = t.rotation + p.rotation
-	})
-
-	gt.position = gt.position + geometry.Vector3({
-		x = t.position.x * p.size.x,
-		y = t.position.y * p.size.y,
-		z = t.position.z * p.size.z
-	}):rotate(p.rotation)
-
-	return gt
-end
+	local old = self._transform
+	local onChange = rawget(self, "_onTransformChanged")
+	local scene = rawget(self, "gameScene")
 
-function GameEntity.__set.globalTransform(self)
+	-- a new transform shouldn't be interpolated from the old one
+	if scene and scene.globals.interpolation then
+		scene.globals.interpolation.states[self] = nil
+	end
 
-	error("attempt to set read-only field \"globalTransform\"")
-end
+	if onChange == nil then
+		onChange = function()
+			transformChanged(self)
+		end
+		self._onTransformChanged = onChange
+	end
 
-function GameEntity.__get.globalPosition(self)
+	if old and old ~= value and old.callback == onChange then
+		old.callback = nil
+	end
 
-	local t = self.transform
-	local p = retrieveParentGlobalTransform(self)
+	local oldCallback = value.callback
 
-	if p == nil then
-		return geometry.Vector3(t.position)
+	if oldCallback == nil then
+		value.callback = onChange
+	elseif oldCallback ~= onChange then
+		-- the transform is already being watched (it may be shared with another
+		-- entity), so chain the callbacks
+		value.callback = function(...)
+			oldCallback(...)
+			onChange(...)
+		end
 	end
 
-	-- how to get global position:
-	--
-	-- 1. multiply each axis of the local position by the corresponding axis
-	--    from the parent's global size
-	-- 2. rotate that clockwise by the parent's global rotation
-	-- 3. add that to the parent's global position
+	self._transform = value
+	transformChanged(self)
+end
 
-	return p.position + geometry.Vector3({
-		x = t.position.x * p.size.x,
-		y = t.position.y * p.size.y,
-		z = t.position.z * p.size.z
-	}):rotate(p.rotation)
+-- the global transform and its parts are cached, and shared by every caller until the
+-- entity or one of its ancestors moves. they are read-only: changing one raises an error,
+-- so copy it (e.g. geometry.Transform(object.globalTransform)) to get one to change.
+-- a reference to one is updated in place as the entity moves, so copy it to keep the
+-- value at one point in time too
 
+function GameEntity.__get.globalTransform(self)
+	--return the cached, read-only global transform
+	return currentGlobalTransform(self)
 end
 
-function GameEntity.__set.globalPosition(self)
+function GameEntity.__set.globalTransform(self)
 
-	error("attempt to set read-only field \"globalPosition\"")
+	error("attempt to set read-only field \"globalTransform\"")
 end
 
-function GameEntity.__get.globalSize(self)
-
-	local t = self.transform
-	local p = retrieveParentGlobalTransform(self)
+function GameEntity.__get.globalPosition(self)
+	--return the cached, read-only position of the global transform
+	return currentGlobalTransform(self)._position
+end
 
-	if p == nil then
-		return geometry.Vector3(t.size)
-	end
+function GameEntity.__set.globalPosition(self)
 
-	return geometry.Vector3({
-		x = t.size.x * p.size.x,
-		y = t.size.y * p.size.y,
-		z = t.size.z * p.size.z,
-	})
+	error("attempt to set read-only field \"globalPosition\"")
+end
 
+function GameEntity.__get.globalSize(self)
+	--return the cached, read-only size of the global transform
+	return currentGlobalTransform(self)._size
 end
 
 function GameEntity.__set.globalSize(self)
@@ -284,16 +530,9 @@ function GameEntity.__set.globalSize(self)
 end
 
 function GameEntity.__get.globalRotation(self)
-
-	local t = self.transform
-	local p = retrieveParentGlobalTransform(self)
-
-	if p == nil then
-		return t.rotation
-	end
-
-	return t.rotation + p.rotation
-
+	--return the rotation of the global transform. like every Transform rotation, it is
+	--between 0 and 360 (the sum of the local and parent rotations, wrapped)
+	return currentGlobalTransform(self)._rotation
 end
 
 function GameEntity.__set.globalRotation(self)
@@ -333,7 +572,7 @@ function GameEntity:addChild(child, trackParent)
 		child.parent = self
 	end
 
-	-- maintainTransform(child)
+	invalidateGlobalTransform(child)
 end
 
 function GameEntity:removeChild(child, removeDescendants)
@@ -361,6 +600,7 @@ function GameEntity:removeChild(child, removeDescendants)
 	end
 
 	child.parent = nil
+	invalidateGlobalTransform(child)
 
 	if not removeDescendants then
 		for i, grandchild in ipairs(child.children) do
@@ -567,6 +807,104 @@ local function evaluateDelayObjects(collection)
 	end
 end
 
+local function containsDelayObjects(collection)
+
+	for k, v in pairs(collection) do
+		if class.instanceof(v, DelayObject) then
+			return true
+		elseif type(v) == "table" and k ~= "__index" and containsDelayObjects(v) then
+			return true
+		end
+	end
+
+	return false
+end
+
+local function clonePrefabData(t, copies)
+	--deep copy part of a prefab template. unlike collections.deepcopy, each table is
+	--only visited once, and tables that are referenced twice are copied once
+
+	if type(t) ~= "table" then
+		return t
+	end
+
+	copies = copies or {}
+	if copies[t] then
+		return copies[t]
+	end
+
+	local mt = getmetatable(t)
+	local copy = setmetatable({}, mt)
+	copies[t] = copy
+
+	for k, v in pairs(t) do
+		-- if v is a reference to t's metatable, only copy the reference
+		if v == mt then
+			rawset(copy, k, v)
+		else
+			rawset(copy, k, clonePrefabData(v, copies))
+		end
+	end
+
+	return copy
+end
+
+local function compilePrefab(prefab)
+	--look up everything that a prefab needs once, so that instances of it only have
+	--to copy its data and construct its components
+
+	assert(prefab.components, "prefab.components must be list")
+
+	local template = {
+		name = prefab.name,
+		components = prefab.components,
+		children = prefab.children,
+		events = prefab.events,
+		-- the class of each component, and whether its arguments have delay objects
+		classes = {},
+		delays = {},
+	}
+
+	for i, comp in ipairs(prefab.components) do
+		local componentClass = require(comp.script)
+		assert(class.subclassof(componentClass, Component), comp.script.." does not return a Component")
+
+		template.classes[i] = componentClass
+		template.delays[i] = containsDelayObjects(comp.arguments)
+	end
+
+	return template
+end
+
+local function getPrefabTemplate(scene, prefab)
+	--return the template of a prefab. prefab files are compiled once per scene, and
+	--again if the file has been modified since (checked at most once per frame)
+
+	if type(prefab) ~= "string" then
+		return compilePrefab(prefab)
+	end
+
+	local getLastModified = love.filesystem.getLastModified
+	local template = scene.globals.prefabs[prefab]
+
+	if template and getLastModified and template.checked ~= scene.frame then
+		template.checked = scene.frame
+
+		if getLastModified(prefab) ~= template.modified then
+			template = nil
+		end
+	end
+
+	if not template then
+		template = compilePrefab(love.filesystem.load(prefab)())
+		template.modified = getLastModified and getLastModified(prefab)
+		template.checked = scene.frame
+		scene.globals.prefabs[prefab] = template
+	end
+
+	return template
+end
+
 --[[public]]
 
 local GameObject = class.define(GameEntity, function(self, gameScene, name, transform, parent)
@@ -587,39 +925,46 @@ local GameObject = class.define(GameEntity, function(self, gameScene, name, tran
 	end
 
 	self.components = {}
+	self._componentsVersion = 0
 	self.events = {}
 
 end)
 
-function GameObject.fromPrefab(scene, object, parent)
-	--build a game object and its children
+local function buildGameObject(scene, object, parent, template)
+	--build a game object and its children. template is the compiled object.prefab,
+	--if the caller already has it
 
 	--create gameObject and add it to scene
 	local gameObject = GameObject(scene, object.name, object.transform, parent)
 
 	if object.prefab and object.prefab ~= "" then
-		local pf = object.prefab
-		if type(object.prefab) == "string" then
-			pf = love.filesystem.load(pf)()
+		local pf = template or getPrefabTemplate(scene, object.prefab)
+		local components = pf.components
+
+		if object.prefabComponents then
+			components = mergeComponentLists(components, object.prefabComponents)
 		end
-		-- local pf = require(object.prefab)
 
-		for i, comp in ipairs(mergeComponentLists(pf.components, object.prefabComponents)) do
-			local componentClass = require(comp.script)
-			assert(class.subclassof(componentClass, Component), comp.script.." does not return a Component")
+		for i, comp in ipairs(components) do
+			local arguments = comp.arguments
+
+			--the template's arguments are shared by every instance, so they are copied.
+			--merged components are already copies
+			if components == pf.components then
+				arguments = clonePrefabData(arguments)
+			end
 
 			--evaluate delayed arguments
-			-- for i, arg in ipairs(comp.arguments) do
-			-- 	if class.instanceof(arg, DelayObject) then
-			-- 		comp.arguments[i] = arg()
-			-- 	end
-			-- end
-			evaluateDelayObjects(comp.arguments)
-			gameObject:addComponent(componentClass(comp.arguments), false)
+			if components ~= pf.components or pf.delays[i] then
+				evaluateDelayObjects(arguments)
+			end
+			gameObject:addComponent(pf.classes[i](arguments), false)
 		end
 
 		if pf.children then
 			for i, pfChild in ipairs(pf.children) do
+				pfChild = clonePrefabData(pfChild)
+
 				if object.prefabChildren and object.prefabChildren[i] then
 					object.prefabChildren[i].prefab = pfChild
 					-- gameObject:addChild(GameObject.fromPrefab(scene, object.prefabChildren[i].prefab))
@@ -672,6 +1017,11 @@ function GameObject.fromPrefab(scene, object, parent)
 	return gameObject
 end
 
+function GameObject.fromPrefab(scene, object, parent)
+	--build a game object and its children
+	return buildGameObject(scene, object, parent)
+end
+
 function GameObject:removeChild(child, removeDescendants, reattachToScene)
 
 	reattachToScene = operators.nilOr(reattachToScene, true)
@@ -709,6 +1059,7 @@ function GameObject:activate(activateDescendants)
 		if not component.active then
 			component:activate()
 		end
+		subscribeComponent(self, component)
 	end
 
 	if activateDescendants then
@@ -733,6 +1084,7 @@ function GameObject:deactivate(deactivateDescendants)
 		if component.active then
 			component:deactivate()
 		end
+		unsubscribeComponent(self, component)
 	end
 
 	if deactivateDescendants then
@@ -797,6 +1149,7 @@ function GameObject:addComponent(component, callAwake)
 		self.components = {components}
 	end
 
+	self._componentsVersion = self._componentsVersion + 1
 	component.gameObject = self
 	component.gameScene = self.gameScene
 	component.globals = self.gameScene.globals
@@ -810,6 +1163,7 @@ function GameObject:addComponent(component, callAwake)
 		component:activate()
 	end
 
+	subscribeComponent(self, component)
 end
 
 function GameObject:removeComponent(component)
@@ -832,8 +1186,10 @@ function GameObject:removeComponent(component)
 	end
 
 	component:deactivate()
+	unsubscribeComponent(self, component)
 
 	table.remove(self.components, index)
+	self._componentsVersion = self._componentsVersion + 1
 	component.gameObject = nil
 	component.gameScene = nil
 	component.globals = {}
@@ -912,21 +1268,29 @@ for i, f in ipairs({
 end
 
 for i, f in ipairs({"mousepressed", "mousereleased"}) do
-	GameObject[f] = function(self, x, y, button)
-		if not Collider then
-			Collider = require("lass.builtins.physics.Collider")
-		end
+	GameObject[f] = function(self, x, y, button, clicked)
+		--clicked is the set of game objects under the cursor. the scene finds it once
+		--for the whole tree; when an object is called directly, it checks itself
 
-		local c = self:getComponent(Collider)
-		local ySign = self.gameScene.globals.ySign
-		local r = c ~= nil and (c.clickable == true) and c:isCollidingWith(geometry.Vector2(x, y * ySign))
+		local r
+		if type(clicked) == "table" then
+			r = clicked[self] == true
+		else
+			if not Collider then
+				Collider = require("lass.builtins.physics.Collider")
+			end
+
+			local c = self:getComponent(Collider)
+			local ySign = self.gameScene.globals.ySign
+			r = c ~= nil and (c.clickable == true) and c:isCollidingWith(geometry.Vector2(x, y * ySign))
+		end
 
 		for i, component in ipairs(self.components) do
 			if component[f] then
 				component[f](component, x, y, button, r)
 			end
 		end
-		GameEntity[f](self, x, y, button)
+		GameEntity[f](self, x, y, button, clicked)
 	end
 end
 
@@ -940,17 +1304,55 @@ local function initGameScene(self, transform, parent)
 	--init the GameScene without reloading settings
 
 	self.timeScale = 1
+	-- time that hasn't been simulated yet, when using a fixed timestep
+	self.accumulator = 0
 	self.frame = 1
 	-- self.gameObjects = {}
 	self.globals = {}
 	self.globals.drawables = {}
+	self.globals.drawOrder = {
+		-- z values that have drawables, highest first
+		indices = {},
+		-- buckets[z] lists the drawables at z, in the order they were placed there.
+		-- removed drawables leave a false behind until the next draw
+		buckets = {},
+		-- the z value and bucket slot of each drawable that has been placed
+		z = {},
+		slots = {},
+		-- drawables that have been added, or whose transform has changed, as a list
+		-- in the order they were marked, and as a set
+		moved = {},
+	}
 	self.globals.colliders = {}
+	self.globals.collisionGrids = {}
+	-- the active clickable colliders, as a set, and their bounding boxes, for finding
+	-- what the cursor is over
+	self.globals.clickableColliders = {}
+	self.globals.clickGrid = SpatialHash()
+	self.globals.collisionData = {}
 	self.globals.canvases = {}
 	self.globals.cameras = {}
 	self.globals.events = {}
 	self.globals.physicsFixtures = {}
 	self.globals.physicsWorld = love.physics.newWorld(0, 0, true)
 	self.globals.physicsLayers = {}
+	-- templates of the prefab files that have been instantiated, by filename
+	self.globals.prefabs = {}
+	-- pools of released objects, by prefab
+	self.globals.pools = {}
+	-- time bases shared by PeriodicInterpolators, by name
+	self.globals.interpolatorClocks = {}
+	-- events waiting to be delivered at the end of update (see GameScene:queueEvent)
+	self.globals.eventQueue = {
+		entries = {},
+		-- the waiting entry of each event, action and source, so that they can be coalesced
+		keys = {},
+		sequence = 0,
+		-- entries coalesced since the last delivery
+		coalesced = 0,
+		-- counts from the last delivery
+		stats = {delivered = 0, coalesced = 0, deferred = 0, latency = 0, frames = 0},
+	}
 
 	self.globals.physicsWorld:setCallbacks(
 		function(fixture1, fixture2, contact)
@@ -1059,145 +1461,272 @@ local function createSettingsTable(settings, defaults)
 	return settings
 end
 
-local function maintainCollisions(self, colliderToCheck)
+-- box2d considers fixtures to be touching slightly before their shapes meet,
+-- so bounding boxes are padded by this many meters
+local COLLISION_MARGIN = 0.05
 
-	-- this method helps keep Colliders' collidingWith and notCollidingWith
-	-- tables up to date, and is responsible for triggering collisionenter and
-	-- collisionexit callbacks
-
-	local collisionData = {}
-	local layers
+local function updateCollisionGrids(self)
+	-- move every collider to its current bounding box in the spatial hash of each
+	-- of its layers, and each clickable collider in the click grid.
+	-- returns a table mapping each collider in a layer to its bounding box
 
-	if colliderToCheck then
-		layers = collections.set(colliderToCheck.layers)
-	else
-		layers = self.globals.colliders
-	end
+	local grids = self.globals.collisionGrids
+	local margin = COLLISION_MARGIN * (self.globals.pixelsPerMeter or 1)
+	local bounds = {}
 
-	for layerName, layer in pairs(layers) do
+	for layerName, layer in pairs(self.globals.colliders) do
 
-		if colliderToCheck then
-			layer = collections.copy(self.globals.colliders[layerName])
+		local grid = grids[layerName]
+		if not grid then
+			grid = SpatialHash(self.globals.collisionCellSize)
+			grids[layerName] = grid
 		end
 
-		table.sort(layer, function(a,b) return a.layersToCheck[layerName] ~= nil end)
-
-		-- use "staircase" method to check each collider against all subsequent colliders
 		for i, collider in ipairs(layer) do
 
-			if not collisionData[collider] then
-				collisionData[collider] = {colliding={}, notColliding={}}
+			local b = bounds[collider]
+			if not b then
+				local minX, minY, maxX, maxY =
+					collider.shape:globalBounds(collider.gameObject.globalTransform)
+				b = {minX - margin, minY - margin, maxX + margin, maxY + margin}
+				bounds[collider] = b
 			end
 
-			for i, layerNameToCheck in ipairs(collider.layersToCheck) do
-
-				if layerNameToCheck == layerName then
-					-- if j > #layer, the loop will be skipped
-					for j = i+1, #layer do
-
-						if collider == layer[j] then
-							goto continue
-						end
-
-						if not collisionData[layer[j]] then
-							collisionData[layer[j]] = {colliding={}, notColliding={}}
-						end
-						if (
-							not collisionData[collider].colliding[layer[j]] and
-							not collisionData[collider].notColliding[layer[j]]
-						) then
-							local r, d
-
-							--if box2d already checked the collision, let's see what it said
-							if collider.solid and layer[j].solid then
-								local col = collider.collidingWith[layer[j]]
-								local ncol = collider.notCollidingWith[layer[j]]
-								if not (col or ncol) then
-									r = false
-									collider.notCollidingWith[layer[j]] = {frame = self.frame}
-									layer[j].notCollidingWith[collider] = {frame = self.frame}
-								elseif col and not ncol then
-									r = true
-									-- if col.frame ~= self.frame then
-									-- 	collider.collidingWith[layer[j]] = {frame = self.frame}
-									-- 	layer[j].collidingWith[collider] = {frame = self.frame}
-									-- end
-									d = collections.copy(collider.collidingWith[layer[j]])
-								elseif ncol and not col then
-									r = false
-									collider.notCollidingWith[layer[j]] = {frame = self.frame}
-									layer[j].notCollidingWith[collider] = {frame = self.frame}
-								elseif col.frame > ncol.frame then
-									r = true
-									-- if col.frame ~= self.frame then
-									-- 	collider.collidingWith[layer[j]] = {frame = self.frame}
-									-- 	layer[j].collidingWith[collider] = {frame = self.frame}
-									-- end
-									d = collections.copy(collider.collidingWith[layer[j]])
-								else
-									r = false
-									collider.notCollidingWith[layer[j]] = {frame = self.frame}
-									layer[j].notCollidingWith[collider] = {frame = self.frame}
-								end
-							--else, check it ourselves
-							else
-								r, d = collider:isCollidingWith(layer[j], nil, true)
-							end
-							if r then
-								collisionData[collider].colliding[layer[j]] = d
-								collisionData[layer[j]].colliding[collider] = d
-							else
-								collisionData[collider].notColliding[layer[j]] = true
-								collisionData[layer[j]].notColliding[collider] = true
-							end
-						end
-
-						::continue::
-					end
-				elseif self.globals.colliders[layerNameToCheck] then
-					for i, other in ipairs(self.globals.colliders[layerNameToCheck]) do
-						if not collisionData[other] then
-							collisionData[other] = {colliding={}, notColliding={}}
-						end
-						if (
-							collider ~= other and
-							not collisionData[collider].colliding[other] and
-							not collisionData[collider].notColliding[other]
-						) then
-							local r, d = collider:isCollidingWith(other, nil, true)
-							if r then
-								collisionData[collider].colliding[other] = d
-								collisionData[other].colliding[collider] = d
-								-- D[#D+1] = d
-							else
-								collisionData[collider].notColliding[other] = true
-								collisionData[other].notColliding[collider] = true
-							end
-						end
-					end
-				end
-			end
+			grid:update(collider, b[1], b[2], b[3], b[4])
 		end
 	end
 
-	for collider, others in pairs(collisionData) do
-		local enter = {}
-		local exit = {}
+	-- clickable colliders don't have to be in a layer, so they are kept in a set of their own
+	local clickGrid = self.globals.clickGrid
 
-		-- debug.log(collider.gameObject.name)
+	for collider in pairs(self.globals.clickableColliders) do
+		local b = bounds[collider]
+		if b then
+			clickGrid:update(collider, b[1], b[2], b[3], b[4])
+		else
+			clickGrid:update(collider, collider.shape:globalBounds(collider.gameObject.globalTransform))
+		end
+	end
 
-		-- check for collisions that just started
-		for other in pairs(others.colliding) do
-			-- collision just started
-			if
-				collider.collidingWith[other].frame == self.frame and
-				(
-					not collider.notCollidingWith[other] or
-					collider.notCollidingWith[other].frame == self.frame - 1
-				)
-			then
-				enter[#enter + 1] = other
-			end
+	return bounds
+end
+
+local function collidersUnder(self, x, y)
+	-- return a list of the clickable colliders that contain the screen point (x, y).
+	-- as in GameObject.mousepressed, only the first Collider of each object counts.
+	-- candidates come from the click grid, which holds the bounding boxes from the
+	-- last update
+
+	if not Collider then
+		Collider = require("lass.builtins.physics.Collider")
+	end
+
+	local point = geometry.Vector2(x, y * self.globals.ySign)
+	local found = {}
+
+	for collider in pairs(self.globals.clickGrid:query(point.x, point.y, point.x, point.y)) do
+		local object = collider.gameObject
+
+		if
+			object and
+			collider.clickable == true and
+			object:getComponent(Collider) == collider and
+			collider:isCollidingWith(point)
+		then
+			found[#found + 1] = collider
+		end
+	end
+
+	return found
+end
+
+local function treePath(object)
+	-- return the position of object in a depth-first walk of the scene, as the index
+	-- of each of its ancestors (and itself) among its siblings
+
+	local path = {}
+
+	while true do
+		local parent = object:hasParent() and object.parent or object.gameScene
+		table.insert(path, 1, collections.index(parent.children, object) or 0)
+
+		if parent == object.gameScene then
+			return path
+		end
+		object = parent
+	end
+end
+
+local function comparePaths(a, b)
+	-- returns whether the object at tree path a comes before the one at b
+
+	for i = 1, math.min(#a, #b) do
+		if a[i] ~= b[i] then
+			return a[i] < b[i]
+		end
+	end
+
+	-- an ancestor comes before its descendants
+	return #a < #b
+end
+
+local function layerRelation(collider, other)
+	-- returns whether collider checks any of other's layers, and whether one of those
+	-- layers is shared by both colliders
+
+	local checks, shared = false, false
+
+	for i, layerName in ipairs(collider.layersToCheck) do
+		if collections.index(other.layers, layerName) then
+			checks = true
+			if collections.index(collider.layers, layerName) then
+				shared = true
+				break
+			end
+		end
+	end
+
+	return checks, shared
+end
+
+local function solidCollision(self, collider, other)
+	-- box2d has already checked the collision between two solid colliders,
+	-- so let's see what it said
+
+	local r, d
+	local col = collider.collidingWith[other]
+	local ncol = collider.notCollidingWith[other]
+
+	if not (col or ncol) then
+		r = false
+		collider.notCollidingWith[other] = {frame = self.frame}
+		other.notCollidingWith[collider] = {frame = self.frame}
+	elseif col and not ncol then
+		r = true
+		d = collections.copy(col)
+	elseif ncol and not col then
+		r = false
+		collider.notCollidingWith[other] = {frame = self.frame}
+		other.notCollidingWith[collider] = {frame = self.frame}
+	elseif col.frame > ncol.frame then
+		r = true
+		d = collections.copy(col)
+	else
+		r = false
+		collider.notCollidingWith[other] = {frame = self.frame}
+		other.notCollidingWith[collider] = {frame = self.frame}
+	end
+
+	return r, d
+end
+
+local function checkCollision(self, collisionData, lastCollisionData, collider, other, useContacts)
+
+	local data, otherData = collisionData[collider], collisionData[other]
+
+	if data.colliding[other] or data.notColliding[other] then
+		return
+	end
+
+	-- the broad phase skips pairs that are too far apart to collide, so the records of
+	-- a pair that wasn't checked last frame are out of date. backdate them, so that
+	-- collisionenter is triggered as if the pair had been checked every frame
+	local last = lastCollisionData[collider]
+	if not (last and (last.colliding[other] or last.notColliding[other])) then
+		collider.notCollidingWith[other] = {frame = self.frame - 1}
+		other.notCollidingWith[collider] = {frame = self.frame - 1}
+	end
+
+	local r, d
+
+	if useContacts and collider.solid and other.solid then
+		r, d = solidCollision(self, collider, other)
+	else
+		r, d = collider:isCollidingWith(other, nil, true)
+	end
+
+	if r then
+		data.colliding[other] = d
+		otherData.colliding[collider] = d
+	else
+		data.notColliding[other] = true
+		otherData.notColliding[collider] = true
+	end
+end
+
+local function maintainCollisions(self)
+
+	-- this method helps keep Colliders' collidingWith and notCollidingWith
+	-- tables up to date, and is responsible for triggering collisionenter and
+	-- collisionexit callbacks
+
+	local grids = self.globals.collisionGrids
+	local bounds = updateCollisionGrids(self)
+	local lastCollisionData = self.globals.collisionData
+	local collisionData = {}
+
+	for collider in pairs(bounds) do
+		collisionData[collider] = {colliding={}, notColliding={}}
+	end
+
+	-- only check the pairs of colliders whose bounding boxes overlap
+	for collider, b in pairs(bounds) do
+		for i, layerName in ipairs(collider.layersToCheck) do
+
+			local grid = grids[layerName]
+
+			if grid then
+				local useContacts = collections.index(collider.layers, layerName) ~= nil
+
+				for other in pairs(grid:query(b[1], b[2], b[3], b[4])) do
+					if other ~= collider then
+						checkCollision(self, collisionData, lastCollisionData, collider, other, useContacts)
+					end
+				end
+			end
+		end
+	end
+
+	-- pairs that were colliding last frame need to be checked again, even if they've
+	-- moved apart, so that collisionexit can be triggered
+	for collider, last in pairs(lastCollisionData) do
+		if bounds[collider] then
+			for other in pairs(last.colliding) do
+				if bounds[other] then
+
+					local checks, useContacts = layerRelation(collider, other)
+					if not checks then
+						checks, useContacts = layerRelation(other, collider)
+					end
+
+					if checks then
+						checkCollision(self, collisionData, lastCollisionData, collider, other, useContacts)
+					end
+				end
+			end
+		end
+	end
+
+	self.globals.collisionData = collisionData
+
+	for collider, others in pairs(collisionData) do
+		local enter = {}
+		local exit = {}
+
+		-- debug.log(collider.gameObject.name)
+
+		-- check for collisions that just started
+		for other in pairs(others.colliding) do
+			-- collision just started
+			if
+				collider.collidingWith[other].frame == self.frame and
+				(
+					not collider.notCollidingWith[other] or
+					collider.notCollidingWith[other].frame == self.frame - 1
+				)
+			then
+				enter[#enter + 1] = other
+			end
 		end
 
 		-- check non-collisions
@@ -1250,6 +1779,91 @@ local function getGameObjects(self, nodes)
 	return gameObjects
 end
 
+local function removeFromBucket(drawOrder, object)
+
+	local bucket = drawOrder.buckets[drawOrder.z[object]]
+
+	bucket[drawOrder.slots[object]] = false
+	bucket.holes = bucket.holes + 1
+
+	drawOrder.z[object] = nil
+	drawOrder.slots[object] = nil
+end
+
+local function addToBucket(drawOrder, object, z)
+
+	local bucket = drawOrder.buckets[z]
+
+	if not bucket then
+		bucket = {holes = 0}
+		drawOrder.buckets[z] = bucket
+
+		-- keep the indices sorted from highest to lowest
+		local indices = drawOrder.indices
+		local i = #indices + 1
+		while i > 1 and indices[i - 1] < z do
+			i = i - 1
+		end
+		table.insert(indices, i, z)
+	end
+
+	bucket[#bucket + 1] = object
+	drawOrder.z[object] = z
+	drawOrder.slots[object] = #bucket
+end
+
+local function maintainDrawOrder(drawOrder)
+	--move drawables whose z has changed into their new buckets, and tidy up the
+	--buckets that drawables have left
+
+	local moved = drawOrder.moved
+
+	for i = 1, #moved do
+		local object = moved[i]
+		moved[i] = nil
+
+		-- skip drawables that have been removed since they moved
+		local z = moved[object] and object.globalTransform.position.z
+		moved[object] = nil
+
+		if z and z ~= drawOrder.z[object] then
+			if drawOrder.z[object] ~= nil then
+				removeFromBucket(drawOrder, object)
+			end
+			addToBucket(drawOrder, object, z)
+		end
+	end
+
+	local indices, buckets, slots = drawOrder.indices, drawOrder.buckets, drawOrder.slots
+
+	for i = #indices, 1, -1 do
+		local z = indices[i]
+		local bucket = buckets[z]
+
+		if bucket.holes > 0 then
+			local n = 0
+
+			for j = 1, #bucket do
+				local object = bucket[j]
+				bucket[j] = nil
+
+				if object then
+					n = n + 1
+					bucket[n] = object
+					slots[object] = n
+				end
+			end
+
+			bucket.holes = 0
+
+			if n == 0 then
+				buckets[z] = nil
+				table.remove(indices, i)
+			end
+		end
+	end
+end
+
 local function removeGameObject(self, gameObject, removeDescendants, alreadyRemoved)
 
 	removeDescendants = operators.nilOr(removeDescendants, true)
@@ -1282,6 +1896,293 @@ local function removeGameObject(self, gameObject, removeDescendants, alreadyRemo
 	return gameObject
 end
 
+local function addTiming(timings, key, start)
+	--add the time since start to timings[key], and return the current time
+
+	local now = love.timer.getTime()
+	timings[key] = (timings[key] or 0) + now - start
+	return now
+end
+
+local function simulate(self, dt)
+	--advance components and physics by dt. if the scene has a timings table, the
+	--seconds spent in each part of the step are added to it
+
+	local timings = self.globals.timings
+	local time = timings and love.timer.getTime()
+
+	GameEntity.update(self, dt, self.frame)
+
+	if timings then
+		time = addTiming(timings, "update", time)
+	end
+
+	self.globals.events.physicsPreUpdate:play(self)
+	self.globals.physicsWorld:update(dt)
+	self.globals.events.physicsPostUpdate:play(self)
+
+	if timings then
+		time = addTiming(timings, "physics", time)
+	end
+
+	maintainCollisions(self)
+
+	if timings then
+		addTiming(timings, "collisions", time)
+	end
+
+	self.frame = self.frame + 1
+end
+
+local function recordStepStates(interpolation)
+	--keep the states before and after the last step, of the entities that changed
+	--during it. an entity's last recorded state is still its state at the start of
+	--the step, since it hasn't changed since it was recorded
+
+	local changed, states = interpolation.changed, interpolation.states
+
+	for i = 1, #changed do
+		local entity = changed[i]
+		local transform = entity.transform
+		local state = states[entity]
+
+		if not state then
+			state = {}
+			states[entity] = state
+		else
+			state.previousX, state.previousY = state.x, state.y
+			state.previousRotation = state.rotation
+			state.previousWidth, state.previousHeight = state.width, state.height
+		end
+
+		state.x, state.y = transform.position.x, transform.position.y
+		state.rotation = transform.rotation
+		state.width, state.height = transform.size.x, transform.size.y
+
+		if not state.previousX then
+			state.previousX, state.previousY = state.x, state.y
+			state.previousRotation = state.rotation
+			state.previousWidth, state.previousHeight = state.width, state.height
+		end
+
+		interpolation.marked[entity] = nil
+	end
+
+	--the entities that changed in this step are the ones to interpolate
+	interpolation.changed, interpolation.last = interpolation.last, changed
+
+	for i = #interpolation.changed, 1, -1 do
+		interpolation.changed[i] = nil
+	end
+end
+
+local function updateDrawTransform(interpolation, entity)
+	--work out where an entity and its descendants are drawn. an entity that moved in
+	--the last step is drawn at its interpolated local transform, and the others are
+	--drawn at their own local transforms under their (possibly interpolated) parents
+
+	local gt = interpolation.drawTransforms[entity]
+
+	if gt == nil then
+		gt = geometry.Transform()
+		gt.callback = readOnlyTransform
+		interpolation.drawTransforms[entity] = gt
+	end
+
+	local state = interpolation.states[entity]
+	local p = retrieveParentGlobalTransform(entity)
+
+	if state and state.applied then
+		composeTransform(
+			gt, state.drawX, state.drawY, entity.transform.position.z, state.drawRotation,
+			state.drawWidth, state.drawHeight, entity.transform.size.z, p
+		)
+	else
+		local t = entity.transform
+		local tp, ts = t.position, t.size
+		composeTransform(gt, tp.x, tp.y, tp.z, t.rotation, ts.x, ts.y, ts.z, p)
+	end
+
+	if not rawget(entity, "_drawTransform") then
+		rawset(entity, "_drawTransform", gt)
+		interpolation.drawn[#interpolation.drawn + 1] = entity
+	end
+
+	for i, child in ipairs(entity.children) do
+		updateDrawTransform(interpolation, child)
+	end
+end
+
+local function applyInterpolation(interpolation, alpha)
+	--give the entities that changed in the last step (and their descendants) the global
+	--transforms they would have at alpha (0 to 1) between the last two steps. these are
+	--only used while drawing, so the live transforms aren't touched
+
+	local last, states = interpolation.last, interpolation.states
+
+	for i, entity in ipairs(last) do
+		local state = states[entity]
+		local transform = entity.transform
+		local position, size = transform.position, transform.size
+
+		--entities that have been changed since the step are left alone
+		if
+			state and
+			position.x == state.x and position.y == state.y and
+			transform.rotation == state.rotation and
+			size.x == state.width and size.y == state.height
+		then
+			--turn the shortest way, so that going from 350 to 10 degrees doesn't sweep
+			--back through 180
+			local turn = (state.rotation - state.previousRotation + 180) % 360 - 180
+
+			state.applied = true
+			state.drawX = state.previousX + (state.x - state.previousX) * alpha
+			state.drawY = state.previousY + (state.y - state.previousY) * alpha
+			state.drawRotation = (state.previousRotation + turn * alpha) % 360
+			state.drawWidth = state.previousWidth + (state.width - state.previousWidth) * alpha
+			state.drawHeight = state.previousHeight + (state.height - state.previousHeight) * alpha
+		end
+	end
+
+	--an entity that is also a descendant of another may be visited twice. the visit
+	--from its ancestor comes last, or sees the ancestor's draw transform, so either
+	--way it ends up right
+	for i, entity in ipairs(last) do
+		local state = states[entity]
+
+		if state and state.applied then
+			updateDrawTransform(interpolation, entity)
+		end
+	end
+end
+
+local function restoreInterpolation(interpolation)
+	--go back to drawing entities at their live global transforms
+
+	local drawn = interpolation.drawn
+
+	for i = #drawn, 1, -1 do
+		rawset(drawn[i], "_drawTransform", nil)
+		drawn[i] = nil
+	end
+
+	for i, entity in ipairs(interpolation.last) do
+		local state = interpolation.states[entity]
+
+		if state then
+			state.applied = false
+		end
+	end
+end
+
+local function getPool(self, prefab)
+
+	local pool = self.globals.pools[prefab]
+
+	if not pool then
+		pool = {
+			scene = self,
+			-- released objects, waiting to be acquired, as a list and as a set
+			free = {},
+			released = {},
+			hits = 0,
+			misses = 0,
+			-- a prefab table is compiled once for the pool. prefab files are left to
+			-- getPrefabTemplate, which notices when they are modified
+			template = type(prefab) ~= "string" and compilePrefab(prefab) or nil,
+		}
+		self.globals.pools[prefab] = pool
+	end
+
+	return pool
+end
+
+local function createPooledObject(self, pool, prefab, transform, parent)
+
+	local template = pool.template or getPrefabTemplate(self, prefab)
+	local gameObject = buildGameObject(self, {
+		name = template.name,
+		prefab = prefab,
+		transform = transform,
+	}, parent, template)
+
+	gameObject._pool = pool
+	return gameObject
+end
+
+-- stands in for a missing source in the keys of the event queue
+local NO_SOURCE = {}
+
+local function deliverEvents(self)
+	--post the queued events, highest priority first, and in the order they were queued.
+	--if the settings give a time budget and it runs out, the rest wait for the next update
+
+	local queue = self.globals.eventQueue
+	local entries = queue.entries
+	local stats = queue.stats
+
+	stats.delivered, stats.deferred, stats.latency, stats.frames = 0, 0, 0, 0
+
+	stats.coalesced = queue.coalesced
+	queue.coalesced = 0
+
+	if #entries == 0 then
+		return
+	end
+
+	table.sort(entries, function(a, b)
+		if a.priority ~= b.priority then
+			return a.priority > b.priority
+		end
+		return a.sequence < b.sequence
+	end)
+
+	-- events queued while delivering wait for the next update
+	queue.entries = {}
+
+	local budget = self.settings.events.budget
+	local getTime = love.timer.getTime
+	local start = getTime()
+	local now = start
+
+	for i, entry in ipairs(entries) do
+		if budget and now - start >= budget then
+			--requeue the rest, ahead of anything queued during delivery
+			local rest = {}
+			for j = i, #entries do
+				rest[#rest + 1] = entries[j]
+			end
+			for j, queued in ipairs(queue.entries) do
+				rest[#rest + 1] = queued
+			end
+			queue.entries = rest
+			stats.deferred = #entries - i + 1
+			break
+		end
+
+		queue.keys[entry.event][entry.action][entry.source or NO_SOURCE] = nil
+
+		stats.delivered = stats.delivered + 1
+		stats.latency = math.max(stats.latency, now - entry.time)
+		stats.frames = math.max(stats.frames, self.frame - entry.frame)
+
+		entry.event:post(entry.action, entry.source, entry.data)
+		now = getTime()
+	end
+end
+
+local function resetComponents(gameObject)
+
+	for i, component in ipairs(gameObject.components) do
+		component:reset()
+	end
+
+	for i, child in ipairs(gameObject.children) do
+		resetComponents(child)
+	end
+end
+
 --[[public]]
 
 local GameScene = class.define(GameEntity, function(self, transform, settings, parent)
@@ -1365,9 +2266,26 @@ function GameScene:applySettings()
 		self.globals.ySign = 1
 	end
 
+	--drawing renderers in batches is opt-in. without SpriteBatch and Mesh support,
+	--each renderer draws itself
+	if self.settings.graphics.batching and love.graphics.newSpriteBatch and love.graphics.newMesh then
+		self.globals.renderBatches = self.globals.renderBatches or RenderBatches()
+	else
+		self.globals.renderBatches = nil
+	end
+
 	--physics
 	self.globals.gravity = geometry.Vector2(self.settings.physics.gravity)
 	self.globals.pixelsPerMeter = self.settings.physics.pixelsPerMeter
+	self.globals.collisionCellSize = self.settings.physics.collisionCellSize
+	-- rebuild the spatial hashes with the new cell size on the next update
+	self.globals.collisionGrids = {}
+
+	local clickGrid = SpatialHash(self.globals.collisionCellSize)
+	for collider in pairs(self.globals.clickableColliders) do
+		clickGrid:update(collider, collider.shape:globalBounds(collider.gameObject.globalTransform))
+	end
+	self.globals.clickGrid = clickGrid
 	love.physics.setMeter(self.settings.physics.pixelsPerMeter)
 	self.globals.physicsLayers = self.settings.physics.layers
 
@@ -1375,55 +2293,165 @@ function GameScene:applySettings()
 	-- grav.x = grav.x / self.settings.physics.pixelsPerMeter
 	-- grav.y = grav.y / self.settings.physics.pixelsPerMeter
 	self.globals.physicsWorld:setGravity(grav.x, self.globals.ySign * grav.y)
+
+	--a fixed timestep is opt-in. draws are interpolated between the last two steps,
+	--unless interpolate is false
+	local fixedTimestep = self.settings.physics.fixedTimestep
+	if fixedTimestep and fixedTimestep > 0 then
+		self.globals.fixedTimestep = fixedTimestep
+		self.globals.maxSubsteps = self.settings.physics.maxSubsteps
+	else
+		self.globals.fixedTimestep = nil
+	end
+
+	if self.globals.fixedTimestep and self.settings.physics.interpolate then
+		self.globals.interpolation = self.globals.interpolation or {
+			-- entities whose transforms changed in the current step, as a list and a set
+			changed = {},
+			marked = {},
+			-- the entities that changed in the last step
+			last = {},
+			-- the recorded transform values of each entity
+			states = setmetatable({}, {__mode = "k"}),
+			-- the global transforms entities are drawn at, and the entities that have
+			-- one in the current draw
+			drawTransforms = setmetatable({}, {__mode = "k"}),
+			drawn = {},
+		}
+	else
+		self.globals.interpolation = nil
+	end
 end
 
 function GameScene:removeGameObject(gameObject, removeDescendants)
 	return removeGameObject(self, gameObject, removeDescendants, false)
 end
 
-function GameScene:update(dt)
-	--update all children (top-level game objects) of the scene
+function GameScene:prewarm(prefab, count)
+	--create instances of a prefab ahead of time, until count of them are waiting
+	--to be acquired
+
+	local pool = getPool(self, prefab)
 
-	if not self.paused then
-		-- debug.log("============================")
-		-- maintainTransform(self)
-		-- debug.log("updating SimpleRigidbody")
-		GameEntity.update(self, dt * self.timeScale, self.frame)
+	while #pool.free < count do
+		self:release(createPooledObject(self, pool, prefab))
+	end
+end
 
-		self.globals.events.physicsPreUpdate:play(self)
-		self.globals.physicsWorld:update(dt * self.timeScale)
-		self.globals.events.physicsPostUpdate:play(self)
-		-- debug.log("maintaining Collisions")
-		maintainCollisions(self)
+function GameScene:acquire(prefab, transform, parent)
+	--return an active instance of a prefab (a filename or a prefab table), reusing a
+	--released instance if there is one. call release instead of destroying it
 
-		-- debug.log(self.globals.canvases[])
+	local pool = getPool(self, prefab)
+	local gameObject = table.remove(pool.free)
 
-		self.frame = self.frame + 1
+	if not gameObject then
+		pool.misses = pool.misses + 1
+		return createPooledObject(self, pool, prefab, transform, parent)
 	end
+
+	pool.hits = pool.hits + 1
+	pool.released[gameObject] = nil
+
+	gameObject.transform = transform
+
+	if parent then
+		parent:addChild(gameObject)
+	else
+		self:addChild(gameObject, false)
+	end
+
+	gameObject:activate()
+	resetComponents(gameObject)
+
+	return gameObject
 end
 
-function GameScene:draw()
+function GameScene:release(gameObject)
+	--deactivate an object from acquire (or prewarm), and remove it from the scene
+	--until it is acquired again
 
-	local drawables = {}
-	local indices = {}
+	local pool = gameObject._pool
+	assert(pool and pool.scene == self, "object was not acquired from this scene")
 
-	--collect all drawable objects into buckets -- each bucket maps to a different z-value
-	--self.globals.drawables is an unordered set
-	for object in pairs(self.globals.drawables) do
+	if pool.released[gameObject] then
+		return
+	end
 
-		local bucket = drawables[object.globalTransform.position.z]
-		if bucket then
-			bucket[#bucket+1] = object
-		else
-			drawables[object.globalTransform.position.z] = {object}
+	gameObject:deactivate()
+
+	if gameObject.parent then
+		gameObject.parent:removeChild(gameObject, true, false)
+	else
+		self:removeChild(gameObject)
+	end
+
+	pool.free[#pool.free + 1] = gameObject
+	pool.released[gameObject] = true
+end
+
+function GameScene:getPoolStats(prefab)
+	--return how many acquires reused a released object (hits) or had to create one
+	--(misses), and how many released objects are waiting
+
+	local pool = getPool(self, prefab)
+	return {hits = pool.hits, misses = pool.misses, free = #pool.free}
+end
+
+function GameScene:update(dt)
+	--update all children (top-level game objects) of the scene
+
+	if self.paused then
+		return
+	end
+
+	local step = self.globals.fixedTimestep
+
+	if not step then
+		simulate(self, dt * self.timeScale)
+		deliverEvents(self)
+		return
+	end
+
+	--with a fixed timestep, the simulation runs in steps of the same length, as many
+	--as fit in the time that has passed (up to maxSubsteps)
+	local interpolation = self.globals.interpolation
+	local steps = 0
+
+	self.accumulator = self.accumulator + dt * self.timeScale
+
+	while self.accumulator >= step and steps < self.globals.maxSubsteps do
+		simulate(self, step)
+
+		if interpolation then
+			recordStepStates(interpolation)
 		end
+
+		self.accumulator = self.accumulator - step
+		steps = steps + 1
 	end
 
-	--sort the z-values (indices) in reverse order (so highest are drawn first)
-	for index in pairs(drawables) do
-		indices[#indices+1] = index
+	--if the simulation can't keep up, drop the time it had no room for, so that the
+	--game slows down instead of falling further and further behind
+	if self.accumulator >= step then
+		self.accumulator = self.accumulator % step
 	end
-	table.sort(indices, function(a,b) return a > b end)
+
+	deliverEvents(self)
+end
+
+function GameScene:draw()
+
+	local drawOrder = self.globals.drawOrder
+	local interpolation = self.globals.interpolation
+
+	if interpolation then
+		applyInterpolation(interpolation, self.accumulator / self.globals.fixedTimestep)
+	end
+
+	--drawables are kept in buckets -- each bucket maps to a different z-value.
+	--only drawables that have been added or moved since the last draw need to be sorted
+	maintainDrawOrder(drawOrder)
 
 	--draw
 	-- if self.globals.camera then
@@ -1432,13 +2460,46 @@ function GameScene:draw()
 	-- 	-- class tries to prevent this from happening.
 	-- 	self.globals.camera:draw()
 	-- end
-	for i, index in ipairs(indices) do
-		-- debug.log(i, index, #drawables[index])
-		for j, drawable in ipairs(drawables[index]) do
-			drawable:draw()
+	--draw the buckets in reverse order of z (so highest are drawn first)
+	local indices, buckets = drawOrder.indices, drawOrder.buckets
+	local batches = self.globals.renderBatches
+
+	if batches then
+		batches:beginFrame()
+	end
+
+	for i = 1, #indices do
+		local bucket = buckets[indices[i]]
+
+		if batches then
+			batches:beginLayer(indices[i])
+		end
+
+		-- a drawable may be removed while others are drawing, leaving a false behind
+		for j = 1, #bucket do
+			local drawable = bucket[j]
+			if drawable then
+				if batches then
+					batches:drawObject(drawable)
+				else
+					drawable:draw()
+				end
+			end
+		end
+
+		if batches then
+			batches:endLayer()
 		end
 	end
 
+	if batches then
+		batches:endFrame()
+	end
+
+	if interpolation then
+		restoreInterpolation(interpolation)
+	end
+
 	for k, canvas in pairs(self.globals.canvases) do
 		love.graphics.setCanvas()
 		love.graphics.setColor(255,255,255)
@@ -1453,6 +2514,74 @@ function GameScene:draw()
 	end
 end
 
+function GameScene:addDrawable(object)
+	--draw object every frame, in order of its global z position
+
+	if self.globals.drawables[object] then
+		return
+	end
+
+	local drawOrder = self.globals.drawOrder
+
+	self.globals.drawables[object] = true
+	object._drawOrder = drawOrder
+	drawableMoved(object)
+end
+
+function GameScene:removeDrawable(object)
+
+	if not self.globals.drawables[object] then
+		return
+	end
+
+	local drawOrder = self.globals.drawOrder
+
+	self.globals.drawables[object] = nil
+	object._drawOrder = nil
+	drawOrder.moved[object] = nil
+
+	if drawOrder.z[object] ~= nil then
+		removeFromBucket(drawOrder, object)
+	end
+end
+
+function GameScene:hitTest(x, y)
+	--return a list of the clickable colliders under the screen point (x, y), from the
+	--lowest z (drawn last, on top) to the highest. colliders with the same z are in
+	--reverse tree order, as objects later in the tree are drawn over earlier ones
+
+	local colliders = collidersUnder(self, x, y)
+	local z, paths = {}, {}
+
+	for i, collider in ipairs(colliders) do
+		z[collider] = collider.gameObject.globalTransform.position.z
+		paths[collider] = treePath(collider.gameObject)
+	end
+
+	table.sort(colliders, function(a, b)
+		if z[a] ~= z[b] then
+			return z[a] < z[b]
+		end
+		return comparePaths(paths[b], paths[a])
+	end)
+
+	return colliders
+end
+
+for i, f in ipairs({"mousepressed", "mousereleased"}) do
+	GameScene[f] = function(self, x, y, button)
+		--find the objects under the cursor once, instead of having every object in the
+		--tree check itself. components are called in the same order as before
+
+		local clicked = {}
+		for i, collider in ipairs(collidersUnder(self, x, y)) do
+			clicked[collider.gameObject] = true
+		end
+
+		GameEntity[f](self, x, y, button, clicked)
+	end
+end
+
 function GameScene:addEvent(eventName)
 
 	local e = Event(eventName)
@@ -1460,10 +2589,89 @@ function GameScene:addEvent(eventName)
 	return e
 end
 
+function GameScene:queueEvent(eventName, action, source, data, priority)
+	--post an event at the end of the next update, instead of right away. if the same
+	--action of the event is already waiting for the same source, it is only delivered
+	--once, with the latest data. events with a higher priority are delivered first
+
+	local queue = self.globals.eventQueue
+	local event = self.globals.events[eventName] or self:addEvent(eventName)
+	priority = priority or 0
+
+	local actions = queue.keys[event]
+	if not actions then
+		actions = {}
+		queue.keys[event] = actions
+	end
+
+	local sources = actions[action]
+	if not sources then
+		sources = {}
+		actions[action] = sources
+	end
+
+	local entry = sources[source or NO_SOURCE]
+
+	if entry then
+		entry.data = data
+		entry.priority = math.max(entry.priority, priority)
+		queue.coalesced = queue.coalesced + 1
+		return
+	end
+
+	queue.sequence = queue.sequence + 1
+	entry = {
+		event = event,
+		action = action,
+		source = source,
+		data = data,
+		priority = priority,
+		sequence = queue.sequence,
+		time = love.timer.getTime(),
+		frame = self.frame,
+	}
+
+	sources[source or NO_SOURCE] = entry
+	queue.entries[#queue.entries + 1] = entry
+end
+
+function GameScene:getEventQueueStats()
+	--return how many events are waiting in the queue (depth), and, for the last update,
+	--how many were delivered, coalesced into ones already waiting, or left for the next
+	--update because the time budget ran out (deferred), plus the longest time (latency,
+	--in seconds) and number of frames that a delivered event waited
+
+	local queue = self.globals.eventQueue
+	local stats = queue.stats
+
+	return {
+		depth = #queue.entries,
+		delivered = stats.delivered,
+		coalesced = stats.coalesced,
+		deferred = stats.deferred,
+		latency = stats.latency,
+		frames = stats.frames,
+	}
+end
+
 function GameScene:addEventListener(eventName, listener, addToObjectEventsList)
 
 	local e = self.globals.events[eventName] or self:addEvent(eventName)
-	e.listeners[listener] = true
+
+	if not e.listeners[listener] then
+		e.listeners[listener] = true
+
+		listener._listeningTo = listener._listeningTo or {}
+		listener._listeningTo[e] = true
+
+		if listener.active then
+			for i, component in ipairs(listener.components) do
+				if component.active then
+					subscribe(e, component)
+				end
+			end
+		end
+	end
 
 	if addToObjectEventsList == nil then
 		addToObjectEventsList = true
@@ -1476,7 +2684,16 @@ end
 
 function GameScene:removeEventListener(eventName, listener)
 
-	self.globals.events[eventName][listener] = nil
+	local e = self.globals.events[eventName]
+
+	if e and e.listeners[listener] then
+		e.listeners[listener] = nil
+		listener._listeningTo[e] = nil
+
+		for i, component in ipairs(listener.components) do
+			unsubscribe(e, component)
+		end
+	end
 
 	local index
 	for i, event in ipairs(listener.events) do
@@ -1486,7 +2703,9 @@ function GameScene:removeEventListener(eventName, listener)
 		end
 	end
 
-	table.remove(listener.events, index)
+	if index then
+		table.remove(listener.events, index)
+	end
 end
 
 return {
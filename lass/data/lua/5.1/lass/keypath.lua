@@ -0,0 +1,143 @@
+local class = require("lass.class")
+
+--[[
+KeyPath
+
+a chain of keys, as used by collections.getkey, that remembers the object and key it
+leads to. the chain is only walked again when one of the objects along it has been
+replaced, instead of every time it is used.
+
+a function in the chain (e.g. GameObject.getComponent) is only called again when it
+can't be shown to return the same thing: when it was called on a game object whose
+components have not changed since, its last result is reused.
+
+arguments:
+	keys (table) - the chain of keys. it is not copied, so changing it in place
+		is not noticed; give the KeyPath a new table instead
+]]
+
+local KeyPath = class.define(function(self, keys)
+
+	self.keys = keys
+	self.links = {}
+	self.length = 0
+end)
+
+--[[internal]]
+
+local function linksValid(self)
+
+	local links = self.links
+
+	for i = 1, self.length do
+		local link = links[i]
+		local parent = link.parent
+
+		if link.call then
+			if link.version == nil or parent._componentsVersion ~= link.version then
+				if link.call(parent, link.key) ~= link.child then
+					return false
+				end
+				link.version = type(parent) == "table" and parent._componentsVersion or nil
+			end
+		elseif parent[link.key] ~= link.child then
+			return false
+		end
+	end
+
+	return true
+end
+
+local function compile(self, root)
+	--walk the chain the same way collections.getkey does, remembering each step
+
+	local keys, links = self.keys, self.links
+	local object, lastObject = root, nil
+	local length = 0
+
+	self.root = nil
+
+	for i, subkey in ipairs(keys) do
+
+		length = length + 1
+		local link = links[length]
+		if not link then
+			link = {}
+			links[length] = link
+		end
+
+		if type(object) == "table" then
+			link.call = nil
+			link.parent = object
+			link.key = subkey
+			link.version = nil
+
+			lastObject = object
+			object = object[subkey]
+		elseif type(object) == "function" then
+			link.call = object
+			link.parent = lastObject
+			link.key = subkey
+			link.version = type(lastObject) == "table" and lastObject._componentsVersion or nil
+
+			local tmp = object
+			object = object(lastObject, subkey)
+			lastObject = tmp
+		else
+			error("object must be table or function")
+		end
+
+		link.child = object
+
+		if i >= #keys - 1 then
+			self.root, self.object, self.key = root, object, keys[i + 1]
+			break
+		end
+	end
+
+	for i = length + 1, self.length do
+		links[i] = nil
+	end
+	self.length = length
+
+	return self.object, self.key
+end
+
+--[[public]]
+
+function KeyPath:resolve(root)
+	--return the object and key that the chain leads to, starting from root
+
+	if self.root == root and linksValid(self) then
+		return self.object, self.key
+	end
+
+	return compile(self, root)
+end
+
+function KeyPath:invalidate()
+	--walk the chain again the next time it is resolved
+
+	self.root = nil
+end
+
+function KeyPath.compileList(paths, keyLists)
+	--update paths, a list of KeyPaths, to match keyLists, a list of key chains. paths
+	--are only recreated for chains that have been replaced, so this is cheap to call
+	--every time the paths are used. returns paths
+
+	for i, keys in ipairs(keyLists) do
+		local path = paths[i]
+		if not path or path.keys ~= keys then
+			paths[i] = KeyPath(keys)
+		end
+	end
+
+	for i = #keyLists + 1, #paths do
+		paths[i] = nil
+	end
+
+	return paths
+end
+
+return KeyPath
@@ -0,0 +1,149 @@
+local class = require("lass.class")
+
+--[[
+SpatialHash
+
+a uniform grid of square cells, used to find objects whose bounding boxes overlap
+without comparing every object against every other one.
+
+each object is stored in every cell that its box touches. moving an object only
+touches the grid when the object crosses into a different set of cells.
+
+arguments (optional):
+	cellSize (number, default=128) - width and height of each cell
+]]
+
+--[[internal]]
+
+local function addToCells(self, object, b)
+
+	local cells = self.cells
+
+	for x = b[5], b[7] do
+		local column = cells[x]
+		if not column then
+			column = {}
+			cells[x] = column
+		end
+
+		for y = b[6], b[8] do
+			local cell = column[y]
+			if not cell then
+				cell = {}
+				column[y] = cell
+			end
+
+			cell[object] = true
+		end
+	end
+end
+
+local function removeFromCells(self, object, b)
+
+	local cells = self.cells
+
+	for x = b[5], b[7] do
+		local column = cells[x]
+
+		for y = b[6], b[8] do
+			local cell = column[y]
+			cell[object] = nil
+
+			-- don't let empty cells pile up as objects move around
+			if next(cell) == nil then
+				column[y] = nil
+			end
+		end
+
+		if next(column) == nil then
+			cells[x] = nil
+		end
+	end
+end
+
+--[[public]]
+
+local SpatialHash = class.define(function(self, cellSize)
+
+	assert(cellSize == nil or (type(cellSize) == "number" and cellSize > 0), "cellSize must be a positive number")
+
+	self.cellSize = cellSize or 128
+	-- cells[x][y] is a set of objects
+	self.cells = {}
+	-- bounds[object] is {minX, minY, maxX, maxY, first cell x, first cell y, last cell x, last cell y}
+	self.bounds = {}
+end)
+
+function SpatialHash:update(object, minX, minY, maxX, maxY)
+	--add object to the grid, or move it if it's already there
+
+	local size = self.cellSize
+	local x1, y1 = math.floor(minX / size), math.floor(minY / size)
+	local x2, y2 = math.floor(maxX / size), math.floor(maxY / size)
+	local b = self.bounds[object]
+
+	if b then
+		b[1], b[2], b[3], b[4] = minX, minY, maxX, maxY
+
+		if b[5] == x1 and b[6] == y1 and b[7] == x2 and b[8] == y2 then
+			return
+		end
+
+		removeFromCells(self, object, b)
+		b[5], b[6], b[7], b[8] = x1, y1, x2, y2
+	else
+		b = {minX, minY, maxX, maxY, x1, y1, x2, y2}
+		self.bounds[object] = b
+	end
+
+	addToCells(self, object, b)
+end
+
+function SpatialHash:remove(object)
+
+	local b = self.bounds[object]
+
+	if b then
+		removeFromCells(self, object, b)
+		self.bounds[object] = nil
+	end
+end
+
+function SpatialHash:query(minX, minY, maxX, maxY, results)
+	--return a set of the objects whose boxes overlap the given box (touching counts).
+	--if results is given, objects are added to it
+
+	results = results or {}
+
+	local size = self.cellSize
+	local cells = self.cells
+	local bounds = self.bounds
+
+	for x = math.floor(minX / size), math.floor(maxX / size) do
+		local column = cells[x]
+
+		if column then
+			for y = math.floor(minY / size), math.floor(maxY / size) do
+				local cell = column[y]
+
+				if cell then
+					for object in pairs(cell) do
+						local b = bounds[object]
+
+						if
+							not results[object] and
+							b[1] <= maxX and b[3] >= minX and
+							b[2] <= maxY and b[4] >= minY
+						then
+							results[object] = true
+						end
+					end
+				end
+			end
+		end
+	end
+
+	return results
+end
+
+return SpatialHash
@@ -0,0 +1,64 @@
+--entrypoint for the benchmarks - measures how much time and memory geometry.intersecting
+--uses per pair of shapes, prints the results, and quits.
+--run with: lasspm play benchmarks -u
+
+require("lass.stdext")
+local geometry = require("lass.geometry")
+
+local Vector2, Vector3 = geometry.Vector2, geometry.Vector3
+local Transform = geometry.Transform
+
+local ITERATIONS = 20000
+
+local pairsToCheck = {
+	{"rotated rectangles", geometry.Rectangle(40, 20), geometry.Rectangle(30, 30), 30, 60},
+	{"fixed rectangles", geometry.Rectangle(40, 20), geometry.Rectangle(30, 30), 0, 90},
+	{"polygon and circle", geometry.Polygon({0, 0, 30, 0, 30, 30, 0, 30}), geometry.Circle(20), 45, 0},
+	{"polygon and polygon", geometry.Polygon({0, 0, 30, 0, 15, 30}), geometry.Polygon({0, 0, 20, 5, 25, 25, 5, 20}), 10, 80},
+	{"circles", geometry.Circle(20), geometry.Circle(15), 0, 0},
+}
+
+local function measure(shape1, shape2, transform1, transform2, move)
+
+	collectgarbage("collect")
+	collectgarbage("stop")
+
+	local memory = collectgarbage("count")
+	local time = love.timer.getTime()
+
+	for i = 1, ITERATIONS do
+		if move then
+			transform2.position.x = (i % 50) - 25
+		end
+		geometry.intersecting(shape1, shape2, transform1, transform2)
+	end
+
+	time = love.timer.getTime() - time
+	memory = collectgarbage("count") - memory
+
+	collectgarbage("restart")
+
+	-- microseconds and bytes per pair
+	return time / ITERATIONS * 1e6, memory * 1024 / ITERATIONS
+end
+
+function love.load()
+
+	print(string.format("%-22s %-8s %12s %12s", "pair", "motion", "us/pair", "bytes/pair"))
+
+	for i, p in ipairs(pairsToCheck) do
+		local name, shape1, shape2, rotation1, rotation2 = unpack(p)
+
+		for j, move in ipairs({false, true}) do
+			local transform1 = Transform(Vector3(0, 0, 0), rotation1)
+			local transform2 = Transform(Vector3(10, 5, 0), rotation2)
+			local time, memory = measure(shape1, shape2, transform1, transform2, move)
+
+			print(string.format(
+				"%-22s %-8s %12.2f %12.1f", name, move and "moving" or "static", time, memory
+			))
+		end
+	end
+
+	love.event.quit()
+end
@@ -0,0 +1,5 @@
+return {
+  modules = {
+    window = false
+  }
+}
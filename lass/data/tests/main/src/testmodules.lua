@@ -1,5 +1,10 @@
 return {
     "coretest",
 	"classtest",
-    "geometrytest"
+    "csvtest",
+    "geometrytest",
+    "keypathtest",
+    "simplerigidbodytest",
+    "spatialhashtest",
+    "tilemaptest"
 }
\ No newline at end of file
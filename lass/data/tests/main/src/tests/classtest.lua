@@ -99,4 +99,92 @@ function classtest:testInstanceOf(scene)
 	assert(class.instanceof(dog, Plant, Dog), "class.instanceof fails with multiple classes specified")
 end
 
+function classtest:testLookupAfterClassChanges(scene)
+	--ensure that lookups that have already been made notice changes to classes
+
+	local Animal = class.define()
+	local Dog = class.define(Animal)
+	local dog = Dog()
+
+	function Animal:speak() return "..." end
+	assertEqual(dog:speak(), "...")
+	assertEqual(dog.name, nil)
+
+	--a subclass overrides an inherited method
+	function Dog:speak() return "woof" end
+	assertEqual(dog:speak(), "woof")
+
+	--an existing key is replaced
+	class.addkey(Dog, "speak", function() return "arf" end)
+	assertEqual(dog:speak(), "arf")
+
+	--a getter is added for a key that was missing
+	Animal.__get.name = function(self) return "rex" end
+	assertEqual(dog.name, "rex")
+
+	--a setter is added for a key that used to be assigned directly
+	local other = Dog()
+	other.age = 1
+	assertEqual(rawget(other, "age"), 1)
+
+	Animal.__set.age = function(self, value) rawset(self, "_age", value) end
+	dog.age = 2
+	assertEqual(rawget(dog, "age"), nil)
+	assertEqual(rawget(dog, "_age"), 2)
+end
+
+function classtest:testRedefineAfterUse(scene)
+	--replacing a method, value or getter by plain assignment is noticed by objects
+	--that have already used it
+
+	local Animal = class.define()
+	local Dog = class.define(Animal)
+	local dog = Dog()
+
+	function Animal:speak() return "..." end
+	Animal.legs = 4
+	Animal.__get.name = function(self) return "rex" end
+	assertEqual(dog:speak(), "...")
+	assertEqual(dog.legs, 4)
+	assertEqual(dog.name, "rex")
+
+	function Animal:speak() return "woof" end
+	Animal.legs = 3
+	Animal.__get.name = function(self) return "fido" end
+	assertEqual(dog:speak(), "woof")
+	assertEqual(dog.legs, 3)
+	assertEqual(dog.name, "fido")
+
+	function Dog:speak() return "arf" end
+	assertEqual(dog:speak(), "arf")
+	function Dog:speak() return "yip" end
+	assertEqual(dog:speak(), "yip")
+end
+
+function classtest:testClassTableKeys(scene)
+	--keys are kept on the class table itself, and removing one is noticed too
+
+	local Animal = class.define()
+	local Dog = class.define(Animal)
+	local dog = Dog()
+
+	function Animal:speak() return "..." end
+	Animal.legs = 4
+	assertEqual(rawget(Animal, "legs"), 4)
+	assertEqual(rawget(Dog, "legs"), nil)
+
+	local keys = {}
+	for k, v in pairs(Animal) do
+		keys[k] = v
+	end
+	assertEqual(keys.speak, Animal.speak)
+	assertEqual(keys.legs, 4)
+
+	assertEqual(dog.legs, 4)
+	Animal.legs = nil
+	assertEqual(dog.legs, nil)
+	Animal.legs = 2
+	assertEqual(dog.legs, 2)
+end
+
 return classtest
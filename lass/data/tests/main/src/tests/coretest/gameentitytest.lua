@@ -111,6 +111,59 @@ function GameEntityTest:testGlobalTransformGetters(scene)
     assertEqual(gt.size, child.globalSize)
 end
 
+function GameEntityTest:testGlobalTransformInvalidation(scene)
+
+    local object = self:createEntity(scene, "test")
+    local child = self:createEntity(scene, "test child", nil, object)
+    local grandchild = self:createEntity(scene, "test grandchild", nil, child)
+
+    -- the cached global transform is reused until something changes
+    local gt = grandchild.globalTransform
+    assertEqual(grandchild.globalTransform, gt)
+    assertEqual(gt.position, geometry.Vector3(0, 0, 0))
+
+    --[[moving and resizing an ancestor]]
+    object:move(1, 2, 3)
+    assertEqual(grandchild.globalPosition, geometry.Vector3(1, 2, 3))
+
+    object.transform.position.x = 4
+    assertEqual(grandchild.globalPosition, geometry.Vector3(4, 2, 3))
+
+    object.transform.size.x = 2
+    child:moveTo(1, 0, 0)
+    assertEqual(grandchild.globalPosition, geometry.Vector3(6, 2, 3))
+    assertEqual(grandchild.globalSize, geometry.Vector3(2, 1, 1))
+
+    --[[replacing a transform]]
+    object.transform = geometry.Transform(geometry.Vector3(0, 0, 0), 90)
+    assertEqual(grandchild.globalRotation, 90)
+
+    --[[changing parents]]
+    local other = self:createEntity(scene, "other", geometry.Transform(geometry.Vector3(10, 10, 0)))
+    other:addChild(child)
+    assertEqual(child.globalPosition, geometry.Vector3(11, 10, 0))
+    assertEqual(child.globalRotation, 0)
+
+    --[[the cached transform is read-only]]
+    assertFalse(pcall(function() grandchild.globalTransform.position.x = 5 end))
+    assertFalse(pcall(function() grandchild.globalTransform.rotation = 5 end))
+    assertFalse(pcall(function() grandchild.globalPosition.x = 5 end))
+    assertFalse(pcall(function() grandchild.globalSize.x = 5 end))
+
+    --[[the cached position is updated in place, so a copy keeps the old value]]
+    local position = child.globalPosition
+    local copy = geometry.Vector3(position)
+    other:move(1, 0, 0)
+    assertEqual(position, child.globalPosition)
+    assertEqual(position, geometry.Vector3(12, 10, 0))
+    assertEqual(copy, geometry.Vector3(11, 10, 0))
+
+    --[[the global rotation is wrapped like any other rotation]]
+    other.transform.rotation = 350
+    child.transform.rotation = 20
+    assertEqual(child.globalRotation, 10)
+end
+
 function GameEntityTest:testMove(scene)
 
     --[[setup]]
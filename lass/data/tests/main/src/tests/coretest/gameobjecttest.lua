@@ -1,4 +1,6 @@
 local lass = require("lass")
+local class = require("lass.class")
+local delay = require("lass.delay")
 local geometry = require("lass.geometry")
 local turtlemode = require("turtlemode")
 local helpers = require("tests.coretest.helpers")
@@ -63,4 +65,48 @@ function GameObjectTest:testRemoveChild(scene)
     assertEqual(child.active, true, "child was incorrectly deactivated")
 end
 
+function GameObjectTest:testFromPrefabFile(scene)
+    --prefab files are only loaded again when they change
+
+    local Counter = class.define(lass.Component, function(self, arguments)
+        arguments.values = arguments.values or {}
+        arguments.values[#arguments.values + 1] = #arguments.values + 1
+        lass.Component.init(self, arguments)
+    end)
+    package.loaded["tests.coretest.counter"] = Counter
+
+    local load, getLastModified = love.filesystem.load, love.filesystem.getLastModified
+    local loads, modified = 0, 1
+    love.filesystem.load = function(filename)
+        return function()
+            loads = loads + 1
+            return {components = {
+                {script = "tests.coretest.counter", arguments = {values = {}, id = delay(function() return loads end)}}
+            }}
+        end
+    end
+    love.filesystem.getLastModified = function() return modified end
+
+    local ok, message = pcall(function()
+        local a = lass.GameObject.fromPrefab(scene, {name = "a", prefab = "counter.lua"})
+        local b = lass.GameObject.fromPrefab(scene, {name = "b", prefab = "counter.lua"})
+        assertEqual(loads, 1)
+
+        -- instances don't share (or change) the prefab's arguments
+        assertEqual(#a:getComponent(Counter).values, 1)
+        assertEqual(#b:getComponent(Counter).values, 1)
+        assertEqual(b:getComponent(Counter).id, 1)
+
+        modified = 2
+        scene.frame = scene.frame + 1
+        local c = lass.GameObject.fromPrefab(scene, {name = "c", prefab = "counter.lua"})
+        assertEqual(loads, 2)
+        assertEqual(c:getComponent(Counter).id, 2)
+    end)
+
+    love.filesystem.load, love.filesystem.getLastModified = load, getLastModified
+    package.loaded["tests.coretest.counter"] = nil
+    assert(ok, message)
+end
+
 return GameObjectTest
\ No newline at end of file
@@ -1,8 +1,10 @@
 local lass = require("lass")
+local class = require("lass.class")
+local geometry = require("lass.geometry")
 local turtlemode = require("turtlemode")
 local helpers = require("tests.coretest.helpers")
 local GameEntityTest = require("tests.coretest.gameentitytest")
-local assertLen, assertEqual = turtlemode.assertLen, turtlemode.assertEqual
+local assertLen, assertEqual, assertTrue = turtlemode.assertLen, turtlemode.assertEqual, turtlemode.assertTrue
 
 local GameSceneTest = turtlemode.testModule(GameEntityTest)
 
@@ -120,4 +122,460 @@ function GameSceneTest:testRemoveGameObject(scene)
 
 end
 
+function GameSceneTest:testDrawOrder(scene)
+
+    local drawn = {}
+    local Recorder = class.define(lass.Component)
+
+    function Recorder:draw()
+        drawn[#drawn + 1] = self.gameObject.name
+    end
+
+    local function assertDrawOrder(...)
+        drawn = {}
+        scene:draw()
+        assertEqual(table.concat(drawn, " "), table.concat({...}, " "))
+    end
+
+    local function addDrawable(name, z, parent)
+        local object = lass.GameObject(scene, name, {position = {z = z}}, parent)
+        object:addComponent(Recorder({}))
+        scene:addDrawable(object)
+        return object
+    end
+
+    local a = addDrawable("a", 1)
+    local b = addDrawable("b", 3)
+    local c = addDrawable("c", 2)
+    local d = addDrawable("d", 5, a)
+    local e = addDrawable("e", 2)
+
+    -- highest z first; objects with the same z are drawn in the order they were added
+    assertDrawOrder("d", "b", "c", "e", "a")
+
+    b:moveTo(nil, nil, 0)
+    assertDrawOrder("d", "c", "e", "a", "b")
+
+    -- moving a parent moves its descendants along the z axis too
+    a:moveTo(nil, nil, 10)
+    assertDrawOrder("d", "a", "c", "e", "b")
+
+    scene:removeDrawable(c)
+    assertDrawOrder("d", "a", "e", "b")
+
+    c:moveTo(nil, nil, 20)
+    scene:addDrawable(c)
+    assertDrawOrder("c", "d", "a", "e", "b")
+end
+
+function GameSceneTest:testPooling(scene)
+
+    local resets = 0
+    local Part = class.define(lass.Component, function(self, arguments)
+        lass.Component.init(self, arguments)
+    end)
+    function Part:reset()
+        resets = resets + 1
+    end
+    package.loaded["tests.coretest.part"] = Part
+
+    local prefab = {
+        name = "bullet",
+        components = {{script = "tests.coretest.part", arguments = {}}},
+        children = {{name = "trail", components = {{script = "tests.coretest.part", arguments = {}}}}},
+    }
+
+    local a = scene:acquire(prefab, {position = {x = 5}})
+    assertEqual(a.name, "bullet")
+    assertEqual(a.globalPosition.x, 5)
+    assertEqual(scene:getPoolStats(prefab).misses, 1)
+
+    a:move(10, 0)
+    scene:release(a)
+    assertEqual(a.active, false)
+    assertEqual(a.children[1].active, false)
+    assertEqual(helpers.searchTreeDepth(scene.children, a), nil)
+    assertEqual(scene:getPoolStats(prefab).free, 1)
+
+    -- the released object comes back with a fresh transform, and its components reset
+    local b = scene:acquire(prefab)
+    assertEqual(b, a)
+    assertEqual(b.active, true)
+    assertEqual(b.children[1].active, true)
+    assertEqual(b.globalPosition.x, 0)
+    assertEqual(helpers.searchTreeDepth(scene.children, b), 1)
+    assertEqual(resets, 2)
+
+    scene:prewarm(prefab, 3)
+    local stats = scene:getPoolStats(prefab)
+    assertEqual(stats.free, 3)
+    assertEqual(stats.hits, 1)
+    assertEqual(stats.misses, 1)
+
+    package.loaded["tests.coretest.part"] = nil
+end
+
+function GameSceneTest:testFixedTimestep(scene)
+
+    scene.settings.physics.fixedTimestep = 0.25
+    scene.settings.physics.maxSubsteps = 3
+    scene:applySettings()
+
+    local steps, drawnAt = {}, nil
+    local Mover = class.define(lass.Component, function(self, arguments)
+        lass.Component.init(self, arguments)
+    end)
+    function Mover:update(dt)
+        steps[#steps + 1] = dt
+        self.gameObject:move(10, 0)
+    end
+    function Mover:draw()
+        drawnAt = self.gameObject.globalPosition.x
+    end
+
+    local object = lass.GameObject(scene, "mover")
+    object:addComponent(Mover({}))
+    scene:addDrawable(object)
+
+    -- time is simulated in whole steps, and the rest is carried over
+    scene:update(0.625)
+    assertEqual(#steps, 2)
+    assertEqual(steps[2], 0.25)
+    scene:update(0.125)
+    assertEqual(#steps, 3)
+    assertEqual(object.globalPosition.x, 30)
+
+    -- draws are interpolated between the last two steps
+    scene:update(0.125)
+    assertEqual(#steps, 3)
+    scene:draw()
+    assertEqual(drawnAt, 25)
+    assertEqual(object.globalPosition.x, 30)
+
+    -- a long frame runs at most maxSubsteps steps, and the rest is dropped
+    scene:update(10)
+    assertEqual(#steps, 6)
+    assertTrue(scene.accumulator < 0.25)
+end
+
+function GameSceneTest:testInterpolatedDraw(scene)
+
+    scene.settings.physics.fixedTimestep = 0.25
+    scene.settings.physics.maxSubsteps = 3
+    scene:applySettings()
+
+    local drawn = {}
+    local Turner = class.define(lass.Component, function(self, arguments)
+        lass.Component.init(self, arguments)
+    end)
+    function Turner:update(dt)
+        self.gameObject:rotate(20)
+    end
+    local Watcher = class.define(lass.Component, function(self, arguments)
+        lass.Component.init(self, arguments)
+    end)
+    function Watcher:draw()
+        drawn[self.gameObject.name] = geometry.Transform(self.gameObject.globalTransform)
+    end
+
+    local object = lass.GameObject(scene, "turner", {rotation = 330})
+    object:addComponent(Turner({}))
+    object:addComponent(Watcher({}))
+    scene:addDrawable(object)
+
+    local child = lass.GameObject(scene, "child", {position = {x = 10}}, object)
+    child:addComponent(Watcher({}))
+    scene:addDrawable(child)
+
+    -- two steps: 330 to 350, then 350 to 10
+    scene:update(0.5)
+    assertEqual(object.transform.rotation, 10)
+    scene:update(0.125)
+
+    -- the rotation is interpolated the short way round, and the child follows
+    local version = object.transform._version
+    scene:draw()
+    assertEqual(drawn.turner.rotation, 0)
+    assertEqual(drawn.child.rotation, 0)
+    assertEqual(drawn.child.position.x, 10)
+    assertEqual(drawn.child.position.y, 0)
+
+    -- drawing doesn't touch the live transforms
+    assertEqual(object.transform._version, version)
+    assertEqual(object.globalRotation, 10)
+    assertEqual(child.globalRotation, 10)
+end
+
+function GameSceneTest:testEventSubscriptions(scene)
+    --only the active components that respond to an event are called when it's posted
+
+    local Responder = class.define(lass.Component, function(self, arguments)
+        lass.Component.init(self, arguments)
+    end)
+    function Responder.events.ping.play(self, source, data)
+        return data
+    end
+    local Bystander = class.define(lass.Component, function(self, arguments)
+        lass.Component.init(self, arguments)
+    end)
+
+    local object = lass.GameObject(scene, "listener")
+    local responder = Responder({})
+    object:addComponent(responder)
+    object:addComponent(Bystander({}))
+    scene:addEventListener("ping", object)
+
+    local event = scene.globals.events.ping
+    assertLen(event.subscriptions.play.components, 1)
+
+    local responses = event:play(scene, 7, {})
+    assertEqual(responses[responder], 7)
+    assertEqual(event:play(scene, 7), nil)
+
+    -- components added later are subscribed too
+    local second = Responder({})
+    object:addComponent(second)
+    responses = event:play(scene, 8, {})
+    assertEqual(responses[second], 8)
+
+    object:deactivate()
+    responses = event:play(scene, 9, {})
+    assertEqual(next(responses), nil)
+
+    object:activate()
+    object:removeComponent(second)
+    responses = event:play(scene, 10, {})
+    assertEqual(responses[responder], 10)
+    assertEqual(responses[second], nil)
+    assertLen(event.subscriptions.play.components, 1)
+
+    scene:removeEventListener("ping", object)
+    responses = event:play(scene, 11, {})
+    assertEqual(next(responses), nil)
+end
+
+function GameSceneTest:testEventResponseError(scene)
+    --a response that raises an error doesn't stop the subscriptions being compacted
+
+    local Faulty = class.define(lass.Component, function(self, arguments)
+        lass.Component.init(self, arguments)
+    end)
+    function Faulty.events.ping.play(self, source, data)
+        error("faulty response")
+    end
+
+    local object = lass.GameObject(scene, "listener")
+    local faulty = Faulty({})
+    object:addComponent(faulty)
+    scene:addEventListener("ping", object)
+
+    local event = scene.globals.events.ping
+    local ok, err = pcall(event.play, event, scene)
+    assertEqual(ok, false)
+    assertTrue(err:find("faulty response") ~= nil)
+    assertEqual(event.posting, 0)
+
+    object:removeComponent(faulty)
+    event:play(scene)
+    assertLen(event.subscriptions.play.components, 0)
+end
+
+function GameSceneTest:testEventQueue(scene)
+    --queued events are delivered at the end of update, coalesced and by priority
+
+    local received = {}
+    local Recorder = class.define(lass.Component, function(self, arguments)
+        lass.Component.init(self, arguments)
+    end)
+    function Recorder.events.first.play(self, source, data)
+        received[#received + 1] = "first " .. data
+    end
+    function Recorder.events.second.play(self, source, data)
+        received[#received + 1] = "second " .. data
+    end
+
+    local object = lass.GameObject(scene, "listener")
+    object:addComponent(Recorder({}))
+    scene:addEventListener("first", object)
+    scene:addEventListener("second", object)
+
+    local a, b = {}, {}
+    scene:queueEvent("first", "play", a, 1)
+    scene:queueEvent("first", "play", b, 2)
+    scene:queueEvent("first", "play", a, 3)
+    scene:queueEvent("second", "play", a, 4, 10)
+    assertLen(received, 0)
+    assertEqual(scene:getEventQueueStats().depth, 3)
+
+    scene:update(0)
+    assertEqual(table.concat(received, ","), "second 4,first 3,first 2")
+
+    local stats = scene:getEventQueueStats()
+    assertEqual(stats.depth, 0)
+    assertEqual(stats.delivered, 3)
+    assertEqual(stats.coalesced, 1)
+    assertEqual(stats.deferred, 0)
+
+    -- once the budget runs out, the rest of the events wait for the next update
+    scene.settings.events.budget = -1
+    received = {}
+    scene:queueEvent("first", "play", a, 5)
+    scene:queueEvent("second", "play", a, 6)
+    scene:update(0)
+    assertLen(received, 0)
+    assertEqual(scene:getEventQueueStats().deferred, 2)
+
+    scene.settings.events.budget = false
+    scene:update(0)
+    assertEqual(table.concat(received, ","), "first 5,second 6")
+    assertEqual(scene:getEventQueueStats().frames, 2)
+end
+
+function GameSceneTest:testClickDispatch(scene)
+    --the scene finds the clicked objects once, and components are called in tree order
+
+    scene:applySettings()
+
+    local received = {}
+    local Recorder = class.define(lass.Component, function(self, arguments)
+        lass.Component.init(self, arguments)
+    end)
+    function Recorder:mousepressed(x, y, button, clickedOnSelf)
+        received[#received + 1] = self.gameObject.name .. "=" .. tostring(clickedOnSelf)
+    end
+
+    local Collider = require("lass.builtins.physics.Collider")
+    local function addObject(name, x, z, clickable, parent, layers)
+        local object = lass.GameObject(scene, name, {position = {x = x, y = 0, z = z}}, parent)
+        object:addComponent(Collider({shape = {"Rectangle", 10, 10}, clickable = clickable, layers = layers}))
+        object:addComponent(Recorder({}))
+        return object
+    end
+
+    local back = addObject("back", 0, 1, true)
+    local front = addObject("front", 2, -1, true, back)
+    addObject("unclickable", 0, 0, false)
+    addObject("far", 100, 0, true)
+
+    scene:mousepressed(0, 0, 1)
+    assertEqual(
+        table.concat(received, ","),
+        "back=true,front=true,unclickable=false,far=false"
+    )
+
+    local hits = scene:hitTest(0, 0)
+    assertLen(hits, 2)
+    assertEqual(hits[1].gameObject, front)
+    assertEqual(hits[2].gameObject, back)
+
+    -- the click grid follows objects (and their children) as they move
+    back:moveTo(100, 0)
+    scene:update(0)
+    received = {}
+    scene:mousepressed(100, 0, 1)
+    assertEqual(
+        table.concat(received, ","),
+        "back=true,front=true,unclickable=false,far=true"
+    )
+
+    -- front and far have the same z, so the one later in the tree is on top
+    hits = scene:hitTest(100, 0)
+    assertLen(hits, 3)
+    assertEqual(hits[1].gameObject.name, "far")
+    assertEqual(hits[2].gameObject, front)
+    assertEqual(hits[3].gameObject, back)
+end
+
+function GameSceneTest:testClickWithoutLayers(scene)
+    --clickable colliders that aren't in any layer can still be clicked after they move
+
+    scene:applySettings()
+
+    local Collider = require("lass.builtins.physics.Collider")
+    local object = lass.GameObject(scene, "loose", {position = {x = 0, y = 0}})
+    local collider = Collider({shape = {"Rectangle", 10, 10}, clickable = true, layers = {}})
+    object:addComponent(collider)
+
+    object:moveTo(500, 500)
+    scene:update(0)
+    assertLen(scene:hitTest(500, 500 * scene.globals.ySign), 1)
+    assertLen(scene:hitTest(0, 0), 0)
+
+    -- a collider can be made clickable after it awakes
+    local other = lass.GameObject(scene, "other", {position = {x = 200, y = 0}})
+    local otherCollider = Collider({shape = {"Rectangle", 10, 10}, layers = {}})
+    other:addComponent(otherCollider)
+    assertLen(scene:hitTest(200, 0), 0)
+
+    otherCollider.clickable = true
+    other:moveTo(300, 0)
+    scene:update(0)
+    assertLen(scene:hitTest(300, 0), 1)
+
+    otherCollider.clickable = false
+    assertLen(scene:hitTest(300, 0), 0)
+end
+
+function GameSceneTest:testBatchedPaintOrder(scene)
+    --batched renderers stay under the unbatched ones that come after them, and members
+    --that haven't changed aren't written again
+
+    scene:applySettings()
+    scene.globals.renderBatches = require("lass.batching")()
+
+    local graphics = love.graphics
+    local newMesh, draw = graphics.newMesh, graphics.draw
+    local drawn, writes, meshes = {}, 0, {}
+
+    graphics.newMesh = function(count)
+        local mesh = {
+            getVertexCount = function() return count end,
+            setVertex = function() writes = writes + 1 end,
+            setDrawRange = function() end,
+        }
+        meshes[mesh] = true
+        return mesh
+    end
+    graphics.draw = function(drawable, ...)
+        if meshes[drawable] then
+            drawn[#drawn + 1] = "batch"
+        else
+            return draw(drawable, ...)
+        end
+    end
+
+    local Label = class.define(lass.Component)
+    function Label:draw()
+        drawn[#drawn + 1] = self.gameObject.name
+    end
+
+    local ok, message = pcall(function()
+        local ShapeRenderer = require("lass.builtins.graphics.ShapeRenderer")
+        local objects = {}
+
+        for i, name in ipairs({"a", "b"}) do
+            local object = lass.GameObject(scene, name, {position = {x = i * 20}})
+            object:addComponent(ShapeRenderer({shape = {"Rectangle", 10, 10}}))
+            object:addComponent(Label({}))
+            objects[i] = object
+        end
+
+        scene:draw()
+        assertEqual(table.concat(drawn, ","), "batch,a,batch,b")
+
+        -- nothing has changed, so no vertices are written
+        writes = 0
+        scene:draw()
+        assertEqual(writes, 0)
+
+        -- only the rectangle that moved is written again
+        objects[2]:move(5, 0)
+        scene:draw()
+        assertEqual(writes, 6)
+    end)
+
+    graphics.newMesh, graphics.draw = newMesh, draw
+    assert(ok, message)
+end
+
 return GameSceneTest
\ No newline at end of file
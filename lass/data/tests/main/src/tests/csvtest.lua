@@ -0,0 +1,51 @@
+local csv = require("lass.collections.csv")
+local turtlemode = require("turtlemode")
+
+local csvtest = turtlemode.testModule()
+local assertEqual = turtlemode.assertEqual
+
+function csvtest:testTypedLines()
+
+    local rows = {}
+    for line in csv.openstring("1, 2,a\n3,4,b\n", {types = {"number", "number"}}):lines() do
+        rows[#rows + 1] = line
+    end
+
+    assertEqual(#rows, 2)
+    assertEqual(rows[1][2], 2)
+    assertEqual(rows[2][1], 3)
+    assertEqual(rows[2][3], "b")
+
+    local ok = pcall(function()
+        for line in csv.openstring("1,2\n3,x\n", {types = "number"}):lines() do end
+    end)
+    assertEqual(ok, false, "a field that isn't a number should be an error")
+end
+
+function csvtest:testFill()
+
+    -- trailing separators and blank lines are ignored
+    local array = {9, 9, 9, 9, 9, 9, 9, 9, 9, 9}
+    local cells, width, height = csv.openstring("1,2,3,\r\n4,5,6,\n\n7,8,9", {types = "number"}):fill(array)
+
+    assertEqual(cells, array)
+    assertEqual(width, 3)
+    assertEqual(height, 3)
+    assertEqual(#cells, 9)
+    assertEqual(cells[5], 5)
+    assertEqual(cells[9], 9)
+
+    -- quoted fields are read the slow way
+    cells, width, height = csv.openstring('"a",1\n"b",2', {types = {"string", "number"}}):fill()
+    assertEqual(width, 2)
+    assertEqual(height, 2)
+    assertEqual(cells[3], "b")
+    assertEqual(cells[4], 2)
+
+    local ok = pcall(function()
+        csv.openstring("1,2\n3\n", {separator = ","}):fill()
+    end)
+    assertEqual(ok, false, "records with different numbers of fields should be an error")
+end
+
+return csvtest
@@ -441,6 +441,30 @@ function shapetest:testIntersectingPolygonsAndVectors()
         "polygon should not contain vector")
 end
 
+function shapetest:testIntersectingShapeWithItself()
+
+    -- the world-space data of each figure must be kept apart when both are one shape
+    local pol = geometry.Polygon({-100, -50, 100, -50, 0, 50})
+    local rec = geometry.Rectangle(10, 10)
+    local t1 = geometry.Transform(geometry.Vector3(0, 0))
+    local t2 = geometry.Transform(geometry.Vector3(0, 0))
+
+    t2.position.x = 200
+    assert(geometry.intersecting(pol, pol, t1, t2), "polygons should be touching")
+    t2.position.x = 200.001
+    assertEqual(geometry.intersecting(pol, pol, t1, t2), false, "polygons should not be touching")
+    assertEqual(geometry.intersecting(pol, pol, t2, t1), false, "polygons should not be touching")
+
+    -- a corner of the turned square reaches about 7.07 towards the other one
+    t2.position.x = 12.1
+    t2.rotation = 45
+    assertEqual(geometry.intersecting(rec, rec, t1, t2), false, "rectangles should not be touching")
+    t2.position.x = 12
+    assert(geometry.intersecting(rec, rec, t1, t2), "rectangles should be touching")
+    assert(geometry.intersecting(rec, rec, t2, t1), "rectangles should be touching")
+    assert(geometry.intersecting(rec, rec, t1, t1), "a rectangle should touch itself")
+end
+
 function shapetest:testIntersectingPolygonAndCircle()
 
     local pol = geometry.Rectangle(10,3):toPolygon()
@@ -503,4 +527,145 @@ function shapetest:testIntersectingPolygons()
     assert(geometry.intersecting(p1, p2, t1, t2), "figures should be intersecting")
 end
 
+function shapetest:testIntersectingAfterChanges()
+    -- world-space shape data is cached between calls, so changing the shapes or their
+    -- transforms in place should still be noticed
+
+    local pol = geometry.Polygon({-10, -10, 10, -10, 10, 10, -10, 10})
+    local rect = geometry.Rectangle(20, 20)
+    local t1 = geometry.Transform(geometry.Vector3(0, 0), 45)
+    local t2 = geometry.Transform(geometry.Vector3(40, 0), 45)
+
+    assert(not geometry.intersecting(pol, rect, t1, t2), "figures should not be intersecting")
+
+    t2.position.x = 15
+    assert(geometry.intersecting(pol, rect, t1, t2), "figures should be intersecting after moving")
+
+    t1.size.x = 0.25
+    t2.size.x = 0.25
+    assert(not geometry.intersecting(pol, rect, t1, t2), "figures should not be intersecting after resizing")
+
+    t1.size.x = 1
+    t2.size.x = 1
+    rect.width = 1
+    rect.height = 1
+    assert(not geometry.intersecting(pol, rect, t1, t2), "figures should not be intersecting after shrinking")
+
+    for i, vertex in ipairs(pol.vertices) do
+        vertex.x, vertex.y = vertex.x * 2, vertex.y * 2
+    end
+    assert(geometry.intersecting(pol, rect, t1, t2), "figures should be intersecting after changing vertices")
+end
+
+local function assertBounds(shape, transform, minX, minY, maxX, maxY)
+
+    local bounds = {shape:globalBounds(transform)}
+
+    for i, expected in ipairs({minX, minY, maxX, maxY}) do
+        assertEqual(bounds[i], expected, 1e-9)
+    end
+end
+
+function shapetest:testGlobalBounds()
+
+    local t = geometry.Transform(geometry.Vector3(100, 50), 0, geometry.Vector3(2, 1, 1))
+
+    assertBounds(geometry.Rectangle(10, 20), t, 90, 40, 110, 60)
+
+    -- turning the rectangle on its side swaps its width and height
+    t.rotation = 90
+    assertBounds(geometry.Rectangle(10, 20), t, 90, 40, 110, 60)
+
+    t.rotation = 270
+    assertBounds(geometry.Rectangle(20, 10), t, 95, 30, 105, 70)
+
+    -- the box should contain every global vertex, whatever the rotation
+    local shapes = {
+        geometry.Rectangle(30, 10, geometry.Vector2(5, -5)),
+        geometry.Polygon({0, 0, 30, 0, 0, 20}),
+    }
+
+    for i, shape in ipairs(shapes) do
+        for rotation = 0, 345, 15 do
+            t.rotation = rotation
+            local minX, minY, maxX, maxY = shape:globalBounds(t)
+
+            for j, vertex in ipairs(shape:globalVertices(t)) do
+                assert(
+                    vertex.x >= minX - 1e-9 and vertex.x <= maxX + 1e-9 and
+                    vertex.y >= minY - 1e-9 and vertex.y <= maxY + 1e-9,
+                    "vertex " .. tostring(vertex) .. " is outside the bounds at a rotation of " .. rotation
+                )
+            end
+        end
+    end
+
+    t.rotation = 0
+    assertBounds(geometry.Circle(5, geometry.Vector2(1, 2)), t, 91, 42, 111, 62)
+end
+
+function shapetest:testTimeOfImpact()
+
+    local function assertNear(a, b, message)
+        assert(a and math.abs(a - b) < 1e-6, (message or "") .. ": expected " .. b .. ", got " .. tostring(a))
+    end
+
+    local r1, r2 = geometry.Rectangle(10, 10), geometry.Rectangle(10, 10)
+    local t1 = geometry.Transform(geometry.Vector3(0, 0))
+    local t2 = geometry.Transform(geometry.Vector3(20, 0))
+
+    local t, normal = geometry.timeOfImpact(r1, r2, t1, t2, geometry.Vector2(20, 0))
+    assertNear(t, 0.5, "rectangles should touch halfway")
+    assertNear(normal.x, -1)
+    assertNear(normal.y, 0)
+    assertEqual(geometry.timeOfImpact(r1, r2, t1, t2, geometry.Vector2(5, 0)), nil, "rectangles shouldn't touch")
+
+    -- touching rectangles can slide along each other, but not move into each other
+    t2.position.x = 10
+    assertEqual(geometry.timeOfImpact(r1, r2, t1, t2, geometry.Vector2(0, 5)), nil, "touching rectangles should slide")
+    assertEqual(geometry.timeOfImpact(r1, r2, t1, t2, geometry.Vector2(5, 0)), 0, "touching rectangles can't move")
+
+    -- overlapping rectangles can only move apart
+    t2.position.x = 8
+    assertEqual(geometry.timeOfImpact(r1, r2, t1, t2, geometry.Vector2(-5, 0)), nil, "rectangles should move apart")
+    assertEqual(geometry.timeOfImpact(r1, r2, t1, t2, geometry.Vector2(1, 0)), 0, "rectangles shouldn't overlap more")
+
+    -- a rotated rectangle is a diamond, with a corner at x = 5 * sqrt(2)
+    t2.position.x = 20
+    t2.rotation = 45
+    t = geometry.timeOfImpact(r1, r2, t1, t2, geometry.Vector2(20, 0))
+    assertNear(t, (15 - 5 * math.sqrt(2)) / 20, "rectangle should touch the diamond's corner")
+
+    local c1, c2 = geometry.Circle(2), geometry.Circle(2)
+    t2 = geometry.Transform(geometry.Vector3(10, 0))
+    assertNear(geometry.timeOfImpact(c1, c2, t1, t2, geometry.Vector2(10, 0)), 0.6, "circles should touch")
+    assertEqual(geometry.timeOfImpact(c1, c2, t1, t2, geometry.Vector2(0, 10)), nil, "circles shouldn't touch")
+
+    -- a circle falling onto a rectangle, and the rectangle rising into the circle
+    local floor = geometry.Rectangle(10, 2)
+    t1.position.y = 10
+    t2.position.x = 0
+    t, normal = geometry.timeOfImpact(c1, floor, t1, t2, geometry.Vector2(0, -10))
+    assertNear(t, 0.7, "circle should land on the rectangle")
+    assertNear(normal.y, 1)
+    t, normal = geometry.timeOfImpact(floor, c1, t2, t1, geometry.Vector2(0, 10))
+    assertNear(t, 0.7, "rectangle should hit the circle")
+    assertNear(normal.y, -1)
+
+    -- a circle passing over a corner of a rectangle
+    local c3 = geometry.Circle(1)
+    t1 = geometry.Transform(geometry.Vector3(-10, 5.5))
+    t2 = geometry.Transform(geometry.Vector3(0, 0))
+    t = geometry.timeOfImpact(c3, r2, t1, t2, geometry.Vector2(20, 0))
+    assertNear(t, (5 - math.sqrt(0.75)) / 20, "circle should touch the corner")
+    t1.position.y = 6.5
+    assertEqual(geometry.timeOfImpact(c3, r2, t1, t2, geometry.Vector2(20, 0)), nil, "circle should miss the corner")
+
+    -- a triangle sliding into a rectangle
+    local triangle = geometry.Polygon({0, 0, 4, 0, 0, 4})
+    t1 = geometry.Transform(geometry.Vector3(-10, -2))
+    t = geometry.timeOfImpact(triangle, r2, t1, t2, geometry.Vector2(10, 0))
+    assertNear(t, 0.1, "triangle should touch the rectangle")
+end
+
 return shapetest
\ No newline at end of file
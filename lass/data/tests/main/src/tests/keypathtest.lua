@@ -0,0 +1,128 @@
+local lass = require("lass")
+local class = require("lass.class")
+local collections = require("lass.collections")
+local KeyPath = require("lass.keypath")
+local turtlemode = require("turtlemode")
+local PeriodicInterpolator = require("lass.builtins.animation.PeriodicInterpolator")
+
+local keypathtest = turtlemode.testModule()
+local assertEqual = turtlemode.assertEqual
+
+local Counter = class.define(lass.Component, function(self, arguments)
+
+    arguments.count = arguments.count or 0
+    lass.Component.init(self, arguments)
+end)
+
+function keypathtest.fixtures.scene()
+
+    local scene = lass.GameScene()
+    scene:applySettings()
+    return scene
+end
+
+function keypathtest:testResolve(scene)
+    --a path leads to the same object and key as collections.getkey
+
+    local object = lass.GameObject(scene, "object")
+    local counter = Counter({})
+    object:addComponent(counter)
+
+    local root = {gameObject = object}
+    for i, keys in ipairs({
+        {"gameObject", "transform", "position", "x"},
+        {"gameObject", "getComponent", Counter, "count"},
+        {"gameObject"},
+    }) do
+        local path = KeyPath(keys)
+        local target, key = collections.getkey(root, unpack(keys))
+        local pathTarget, pathKey = path:resolve(root)
+
+        assertEqual(pathTarget, target)
+        assertEqual(pathKey, key)
+
+        pathTarget, pathKey = path:resolve(root)
+        assertEqual(pathTarget, target)
+        assertEqual(pathKey, key)
+    end
+end
+
+function keypathtest:testReplacedObjects(scene)
+    --a path is walked again when an object along it is replaced
+
+    local object = lass.GameObject(scene, "object")
+    local first = Counter({})
+    object:addComponent(first)
+
+    local root = {gameObject = object}
+    local path = KeyPath({"gameObject", "transform", "position", "x"})
+    assertEqual(path:resolve(root), object.transform.position)
+
+    object.transform = {position = {x = 5, y = 5}}
+    assertEqual(path:resolve(root), object.transform.position)
+
+    path = KeyPath({"gameObject", "getComponent", Counter, "count"})
+    assertEqual(path:resolve(root), first)
+
+    local second = Counter({})
+    object:addComponent(second)
+    assertEqual(path:resolve(root), first)
+
+    object:removeComponent(first)
+    assertEqual(path:resolve(root), second)
+
+    local other = lass.GameObject(scene, "other")
+    local third = Counter({})
+    other:addComponent(third)
+    root.gameObject = other
+    assertEqual(path:resolve(root), third)
+
+    assertEqual(path:resolve({gameObject = object}), second)
+end
+
+function keypathtest:testInterpolatorClock(scene)
+    --interpolators with the same clock share one time base
+
+    local function addInterpolator(name, clock, autoplay)
+
+        local object = lass.GameObject(scene, name)
+        local interpolator = PeriodicInterpolator({
+            ifunction = function(x) return x end,
+            targets = {{"gameObject", "transform", "position", "x"}},
+            sampleLength = math.huge,
+            clock = clock,
+            autoplay = autoplay
+        })
+        object:addComponent(interpolator)
+        return interpolator
+    end
+
+    local a = addInterpolator("a", "shared", true)
+    local b = addInterpolator("b", "shared", true)
+    local c = addInterpolator("c", nil, true)
+
+    scene:update(0.5)
+    scene:update(0.5)
+
+    assertEqual(a.gameObject.transform.position.x, 1)
+    assertEqual(b.gameObject.transform.position.x, 1)
+    assertEqual(c.gameObject.transform.position.x, 1)
+    assertEqual(scene.globals.interpolatorClocks.shared.x, 1)
+
+    -- an interpolator that starts late catches up with the clock
+    local d = addInterpolator("d", "shared", false)
+    scene:update(0.5)
+    d:play()
+    scene:update(0.5)
+
+    assertEqual(a.gameObject.transform.position.x, 2)
+    assertEqual(d.gameObject.transform.position.x, 2)
+
+    -- seeking moves every interpolator on the clock
+    a:seek(0)
+    scene:update(0.5)
+    assertEqual(b.gameObject.transform.position.x, 0.5)
+    assertEqual(d.gameObject.transform.position.x, 0.5)
+end
+
+return keypathtest
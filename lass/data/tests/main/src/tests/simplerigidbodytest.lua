@@ -0,0 +1,74 @@
+local lass = require("lass")
+local geometry = require("lass.geometry")
+local turtlemode = require("turtlemode")
+local Collider = require("lass.builtins.physics.Collider")
+local SimpleRigidbody = require("lass.builtins.physics.SimpleRigidbody")
+
+local simplerigidbodytest = turtlemode.testModule()
+local assertEqual = turtlemode.assertEqual
+
+local function createBody(scene, name, shape, position, velocity)
+
+    local object = lass.GameObject(scene, name, {position = position})
+    object:addComponent(Collider({shape = shape, solid = true}))
+
+    if velocity then
+        object:addComponent(SimpleRigidbody({velocity = velocity}))
+    end
+
+    return object
+end
+
+function simplerigidbodytest.fixtures.scene()
+
+    local scene = lass.GameScene()
+    scene:applySettings()
+    scene.globals.gravity = geometry.Vector2(0, 0)
+    return scene
+end
+
+function simplerigidbodytest:testStopAtWall(scene)
+    --a body moves right up to a wall, and then stops
+
+    local body = createBody(scene, "body", {"Rectangle", 10, 10}, {x = 0, y = 0}, {x = 100, y = 0})
+    createBody(scene, "wall", {"Rectangle", 10, 100}, {x = 47, y = 0})
+
+    local rigidbody = body:getComponent(SimpleRigidbody)
+
+    for i = 1, 3 do
+        scene:update(0.1)
+    end
+    assertEqual(body.transform.position.x, 30)
+    assertEqual(rigidbody.stats.candidates, 1)
+    assertEqual(rigidbody.stats.pairs, 0)
+
+    -- the last move is cut short where the body touches the wall
+    scene:update(0.1)
+    assertEqual(body.transform.position.x, 37)
+    assertEqual(rigidbody.stats.pairs, 1)
+
+    scene:update(0.1)
+    assertEqual(body.transform.position.x, 37)
+    assertEqual(rigidbody.velocity.x, 0)
+end
+
+function simplerigidbodytest:testSlideAlongFloor(scene)
+    --a circle falls onto a floor, and then rolls along it
+
+    local ball = createBody(scene, "ball", {"Circle", 5}, {x = 0, y = 20}, {x = 50, y = -100})
+    createBody(scene, "floor", {"Rectangle", 1000, 10}, {x = 0, y = 0})
+
+    scene:update(0.1)
+    assertEqual(ball.transform.position.y, 10)
+    assertEqual(ball.transform.position.x, 5)
+
+    scene:update(0.1)
+    assertEqual(ball.transform.position.y, 10)
+    assertEqual(ball.transform.position.x, 10)
+    assertEqual(ball:getComponent(SimpleRigidbody).velocity.y, 0)
+
+    scene:update(0.1)
+    assertEqual(ball.transform.position.x, 15)
+end
+
+return simplerigidbodytest
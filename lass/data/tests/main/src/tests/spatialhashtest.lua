@@ -0,0 +1,63 @@
+local SpatialHash = require("lass.spatialhash")
+local turtlemode = require("turtlemode")
+
+local spatialhashtest = turtlemode.testModule()
+local assertEqual = turtlemode.assertEqual
+local assertNil = turtlemode.assertNil
+local assertNotNil = turtlemode.assertNotNil
+
+local function count(set)
+
+    local n = 0
+    for k in pairs(set) do
+        n = n + 1
+    end
+    return n
+end
+
+function spatialhashtest:testQuery()
+
+    local grid = SpatialHash(10)
+    local a, b, c = {}, {}, {}
+
+    grid:update(a, 0, 0, 5, 5)
+    grid:update(b, 5, 5, 25, 25)
+    grid:update(c, 100, 100, 110, 110)
+
+    -- touching boxes count as overlapping
+    local found = grid:query(0, 0, 5, 5)
+    assertEqual(count(found), 2)
+    assertNotNil(found[a])
+    assertNotNil(found[b])
+
+    -- boxes that share a cell but don't overlap are left out
+    found = grid:query(21, 0, 29, 4)
+    assertEqual(count(found), 0)
+
+    found = grid:query(-1000, -1000, 1000, 1000)
+    assertEqual(count(found), 3)
+end
+
+function spatialhashtest:testUpdateAndRemove()
+
+    local grid = SpatialHash(10)
+    local a = {}
+
+    grid:update(a, 0, 0, 5, 5)
+    grid:update(a, 200, 200, 205, 205)
+
+    assertNil(grid:query(0, 0, 5, 5)[a])
+    assertNotNil(grid:query(200, 200, 201, 201)[a])
+
+    -- moving within the same cell keeps the new box
+    grid:update(a, 201, 201, 203, 203)
+    assertNil(grid:query(204, 204, 205, 205)[a])
+
+    grid:remove(a)
+    assertNil(grid:query(-1000, -1000, 1000, 1000)[a])
+
+    -- empty cells are discarded
+    assertNil(next(grid.cells))
+end
+
+return spatialhashtest
@@ -0,0 +1,111 @@
+local lass = require("lass")
+local geometry = require("lass.geometry")
+local turtlemode = require("turtlemode")
+
+local tilemaptest = turtlemode.testModule()
+local assertEqual = turtlemode.assertEqual
+
+local function tilePrefab(solid)
+
+    return {
+        components = {
+            {
+                script = "lass.builtins.graphics.ShapeRenderer",
+                arguments = {shape = {"Rectangle", 10, 10}}
+            },
+            {
+                script = "lass.builtins.physics.Collider",
+                arguments = {
+                    shapeSource = {"gameObject", "getComponent", "lass.builtins.graphics.Renderer"},
+                    solid = solid
+                }
+            }
+        }
+    }
+end
+
+local function fullMap(width, height, tile)
+
+    local map = {}
+    for i = 1, height do
+        map[i] = {}
+        for j = 1, width do
+            map[i][j] = tile
+        end
+    end
+    return map
+end
+
+local function createTileMap(scene, map)
+
+    local object = lass.GameObject(scene, "map")
+    local TileMap = require("lass.builtins.tilemap.TileMap")
+    local tileMap = TileMap({
+        map = map,
+        tileSize = {x = 10, y = 10},
+        tiles = {tilePrefab(true), tilePrefab(false)},
+        chunkSize = 4
+    })
+    object:addComponent(tileMap)
+
+    return tileMap
+end
+
+function tilemaptest.fixtures.scene()
+
+    local scene = lass.GameScene()
+    scene:applySettings()
+    return scene
+end
+
+function tilemaptest:testChunkedColliders(scene)
+    --tiles are merged into as few colliders as possible in each chunk
+
+    local tileMap = createTileMap(scene, fullMap(6, 6, 1))
+    local colliders = scene.globals.colliders.main
+
+    -- 4x4, 2x4, 4x2 and 2x2 chunks
+    assertEqual(#tileMap.chunks, 4)
+    assertEqual(#colliders, 4)
+    assertEqual(colliders[1].shape.width, 40)
+    assertEqual(colliders[1].shape.height, 40)
+
+    -- a hole splits the first chunk into four rectangles
+    tileMap:setTile(2, 2, 0)
+    assertEqual(#colliders, 7)
+
+    -- tiles of different kinds are not merged
+    tileMap:setTile(2, 2, 2)
+    assertEqual(#colliders, 8)
+
+    tileMap:setTile(2, 2, 1)
+    assertEqual(#colliders, 4)
+end
+
+function tilemaptest:testTileQueries(scene)
+
+    local map = fullMap(6, 5, 0)
+    map[2][3] = 1
+    map[5][6] = 2
+
+    local tileMap = createTileMap(scene, map)
+    tileMap.gameObject:moveTo(100, 0)
+
+    assertEqual(tileMap:getTile(3, 2), 1)
+    assertEqual(tileMap:getTile(6, 5), 2)
+    assertEqual(tileMap:getTile(1, 1), 0)
+    assertEqual(tileMap:getTile(7, 1), 0)
+
+    -- tile positions are the centers of tiles
+    local tile, column, row = tileMap:tileAt(
+        geometry.Vector2(100 + 2 * 10 + 4, 1 * 10 * scene.globals.ySign)
+    )
+    assertEqual(tile, 1)
+    assertEqual(column, 3)
+    assertEqual(row, 2)
+
+    tileMap:setTile(3, 2, 0)
+    assertEqual(tileMap:tileAt(geometry.Vector2(120, 10 * scene.globals.ySign)), 0)
+end
+
+return tilemaptest
@@ -5,17 +5,17 @@ from __future__ import absolute_import
 import sys, linecache, os
 from six import string_types
 from PySide import QtGui
-from ..pmtools import ProjectManager
+from ..pmtools import ProjectManager, LuaRuntimePool
 
 class Project(object):
 
-    def __init__(self, directory, initialize=False):
+    def __init__(self, directory, initialize=False, runtimePool=None):
 
         if not isinstance(directory, string_types):
             raise TypeError("directory must be string")
 
         self.directory = os.path.abspath(os.path.expandvars(directory))
-        self.projectManager = ProjectManager()
+        self.projectManager = ProjectManager(runtimePool=runtimePool)
 
         if not initialize:
             self.projectManager.assertProjectIsValid(self.directory)
@@ -71,6 +71,8 @@ class Application(object):
     def __init__(self, qApp):
         self.qApp = qApp
         self.projects = {}
+        # every window's project loads scenes and prefabs through the same runtimes
+        self.runtimePool = LuaRuntimePool()
 
     def run(self):
 
@@ -95,7 +97,7 @@ class Application(object):
     def setProject(self, window, directory, initialize=False):
 
         if directory:
-            self.projects[window] = Project(directory, initialize)
+            self.projects[window] = Project(directory, initialize, self.runtimePool)
         else:
             self.projects[window] = None
 
@@ -7,9 +7,15 @@ from six import text_type, binary_type
 
 class TreeItem(object):
 
+    # there can be tens of thousands of these in a large scene
+    __slots__ = ("itemData", "childItems", "parentItem", "rowNumber", "pendingChildren")
+
     def __init__(self, data, parent=None):
         self.itemData = list(data)
         self.childItems = []
+        self.rowNumber = 0
+        # nodes (as passed to TreeModel.initializeTree) that haven't been made into items yet
+        self.pendingChildren = None
 
         if parent:
             parent.appendChild(self)
@@ -27,7 +33,7 @@ class TreeItem(object):
 
     def row(self):
         if self.parentItem:
-            return self.parentItem.childItems.index(self)
+            return self.rowNumber
 
     def columnCount(self):
         return len(self.itemData)
@@ -41,27 +47,49 @@ class TreeItem(object):
 
     def appendChild(self, item):
 
+        item.rowNumber = len(self.childItems)
         self.childItems.append(item)
         item.parentItem = self
 
     def insertChild(self, item, position=0):
 
+        return self.insertChildren([item], position)
+
+    def insertChildren(self, items, position=0):
+
         try:
-            self.childItems.insert(position, item)
-            item.parentItem = self
-            return True
-        except:
+            self.childItems[position:position] = items
+        except TypeError:
             return False
 
+        for item in items:
+            item.parentItem = self
+
+        self.renumberChildren(position)
+        return True
+
     def removeChild(self, row):
 
-        try:
-            item = self.childItems.pop(row)
-            item.parentItem = None
-            return True
-        except IndexError:
+        return self.removeChildren(row, 1)
+
+    def removeChildren(self, first, count):
+
+        if first < 0 or first + count > len(self.childItems):
             return False
 
+        for item in self.childItems[first:first + count]:
+            item.parentItem = None
+
+        del self.childItems[first:first + count]
+        self.renumberChildren(first)
+        return True
+
+    def renumberChildren(self, first=0):
+
+        childItems = self.childItems
+        for i in range(max(first, 0), len(childItems)):
+            childItems[i].rowNumber = i
+
     def setData(self, column, value):
 
         try:
@@ -70,6 +98,34 @@ class TreeItem(object):
         except IndexError:
             return False
 
+class TreeMimeData(QtCore.QMimeData):
+    """
+    mime data for items dragged out of a TreeModel. the items are only pickled if something
+    asks for the data, which doesn't happen when they are dropped back into the same model
+    """
+
+    def __init__(self, model, items):
+        QtCore.QMimeData.__init__(self)
+        self.model = model
+        self.items = items
+        self.pickled = None
+
+    def formats(self):
+        return self.model.mimeTypes()
+
+    def hasFormat(self, mimeType):
+        return mimeType in self.formats()
+
+    def retrieveData(self, mimeType, preferredType):
+
+        if mimeType not in self.formats():
+            return QtCore.QMimeData.retrieveData(self, mimeType, preferredType)
+
+        if self.pickled is None:
+            self.pickled = pickle.dumps([self.model.itemToDict(item) for item in self.items])
+
+        return QtCore.QByteArray(self.pickled)
+
 class TreeModel(QtCore.QAbstractItemModel):
 
     def __init__(self, initialData, headers, defaults, parent=None, itemClass=TreeItem):
@@ -78,6 +134,8 @@ class TreeModel(QtCore.QAbstractItemModel):
         self.rootItem = itemClass(headers)
         self.headers = headers
         self.defaults = defaults
+        # whether the last drop moved items within this model, rather than copying them in
+        self.movedOnDrop = False
         self.initializeTree(initialData)
 
     def index(self, row, column, parent=QtCore.QModelIndex()):
@@ -99,11 +157,36 @@ class TreeModel(QtCore.QAbstractItemModel):
 
         if not parentIndex.isValid():
             item = self.rootItem
+        elif parentIndex.column() > 0:
+            return 0
         else:
             item = parentIndex.internalPointer()
 
         return len(item.childItems)
 
+    def hasChildren(self, parentIndex=QtCore.QModelIndex()):
+
+        if parentIndex.column() > 0:
+            return False
+
+        item = self.item(parentIndex)
+        return bool(item.childItems or item.pendingChildren)
+
+    def canFetchMore(self, parentIndex):
+
+        if parentIndex.column() > 0:
+            return False
+
+        return bool(self.item(parentIndex).pendingChildren)
+
+    def fetchMore(self, parentIndex):
+
+        item = self.item(parentIndex)
+        nodes, item.pendingChildren = item.pendingChildren, None
+
+        if nodes:
+            self.insertItems(self.newItems(nodes), parentIndex, len(item.childItems))
+
     def columnCount(self, parentIndex):
 
         if not parentIndex.isValid():
@@ -143,18 +226,31 @@ class TreeModel(QtCore.QAbstractItemModel):
         if not index.isValid():
             return
 
-        item = index.internalPointer()
+        return self.itemToDict(index.internalPointer())
+
+    def itemToDict(self, item):
+
         d = {"data":{}, "children":[]}
 
         for i in range(item.columnCount()):
             d["data"][self.headers[i]] = item.data(i)
 
-        for i in range(self.rowCount(index)):
-            child = self.toDict(self.index(i, 0, index))
-            d["children"].append(child)
+        for child in item.childItems:
+            d["children"].append(self.itemToDict(child))
+
+        # children that haven't been fetched are still in the same form
+        if item.pendingChildren:
+            d["children"].extend(item.pendingChildren)
 
         return d
 
+    def indexOfItem(self, item):
+
+        if item is self.rootItem or not item.parentItem:
+            return QtCore.QModelIndex()
+
+        return self.createIndex(item.row(), 0, item)
+
     def item(self, index):
 
         if not index.isValid():
@@ -170,45 +266,68 @@ class TreeModel(QtCore.QAbstractItemModel):
             return self.rootItem.data(section)
 
     def initializeTree(self, nodes, parentIndex=QtCore.QModelIndex(), position=None):
+        """
+        insert nodes, in the form {"data": {header: value}, "children": [nodes]}, under
+        parentIndex. all of the nodes are inserted at once, but their children are only made
+        into items when the view asks for them (see fetchMore). returns the new indices
+        """
+
+        # position should count every child, not just the ones fetched so far
+        if self.canFetchMore(parentIndex):
+            self.fetchMore(parentIndex)
 
-        # parent = parent or self.rootItem
-        # parent = self.item(parentIndex)
         if position == None:
             position = self.rowCount(parentIndex)
 
-        indices = []
+        items = self.newItems(nodes)
+        self.insertItems(items, parentIndex, position)
 
-        for node in nodes:
-            data = []
-            for header in self.headers:
-                data.append(node["data"].get(header, self.defaults[header]))
+        return [self.createIndex(item.row(), 0, item) for item in items]
+
+    def resetTree(self, nodes):
+        """
+        replace the whole tree with nodes (see initializeTree)
+        """
+
+        self.beginResetModel()
+        self.rootItem.childItems = []
+        self.rootItem.pendingChildren = None
+        self.rootItem.insertChildren(self.newItems(nodes))
+        self.endResetModel()
 
-            # child = self.newItem(data)
-            # parent.appendChild(child)
-            r = self.insertRows(position, 1, parentIndex)
+    def clearTree(self):
 
-            childIndex = self.index(position, 0, parentIndex)
-            child = self.item(childIndex)
+        self.resetTree([])
 
-            indices.append(childIndex)
+    def newItems(self, nodes):
+        """
+        make items out of nodes, leaving their children pending
+        """
 
-            for i, datum in enumerate(data):
-                self.setData(self.index(position, i, parentIndex), datum, QtCore.Qt.EditRole)
+        items = []
 
-                # print node, datum
+        for node in nodes:
+            item = self.newItem()
 
-            # print child.data(0)
+            # go through the item's setData, which may reject some values
+            for i, header in enumerate(self.headers):
+                item.setData(i, node["data"].get(header, self.defaults[header]))
 
-            if node.get("children"):
-                self.initializeTree(node["children"], childIndex)
+            item.pendingChildren = node.get("children") or None
+            items.append(item)
 
-            position += 1
+        return items
 
-        return indices
+    def insertItems(self, items, parentIndex=QtCore.QModelIndex(), position=0):
 
-    def clearTree(self):
+        if not items:
+            return True
 
-        self.removeRows(0, self.rowCount())
+        self.beginInsertRows(parentIndex, position, position + len(items) - 1)
+        r = self.item(parentIndex).insertChildren(items, position)
+        self.endInsertRows()
+
+        return r
 
     def setData(self, index, value, role):
 
@@ -226,37 +345,20 @@ class TreeModel(QtCore.QAbstractItemModel):
         self.beginInsertRows(parentIndex, first, first + count - 1)
 
         parentItem = self.item(parentIndex)
-        rows = []
-
-        for i in range(first, first+count):
-            item = self.newItem()
-            r = parentItem.insertChild(item=item, position=first)
-
-            if not r:
-                self.endInsertRows()
-                return False
-
-            rows.append(i)
+        r = parentItem.insertChildren([self.newItem() for i in range(count)], first)
 
         self.endInsertRows()
 
-        return True
+        return r
 
     def removeRows(self, first, count, parentIndex=QtCore.QModelIndex()):
 
         self.beginRemoveRows(parentIndex, first, first + count - 1)
 
-        parentItem = self.item(parentIndex)
-
-        for i in range(first, first+count):
-            r = parentItem.removeChild(first)
-
-            if not r:
-                self.endRemoveRows()
-                return False
+        r = self.item(parentIndex).removeChildren(first, count)
 
         self.endRemoveRows()
-        return True
+        return r
 
     def newItem(self, data=tuple()):
 
@@ -290,34 +392,37 @@ class TreeModel(QtCore.QAbstractItemModel):
 
     def mimeData(self, indices):
 
-        md = QtCore.QMimeData()
-        objects = []
-        descendants = set()
-
-        for index in indices:
-            descendants = descendants.union(set(self.descendants(index)))
+        items = []
+        selected = set(index.internalPointer() for index in indices if index.isValid())
 
-        for index in indices:
-            if index.isValid() and index not in descendants:
-                d = self.toDict(index)
-                objects.append(self.toDict(index))
+        # leave out anything whose ancestor is also being dragged, since it comes along anyway
+        for item in selected:
+            ancestor = item.parentItem
+            while ancestor and ancestor not in selected:
+                ancestor = ancestor.parentItem
 
-        md.setData(self.mimeTypes()[0], pickle.dumps(objects))
+            if not ancestor:
+                items.append(item)
 
-        return md
+        # keep the items in the order they appear in the tree
+        items.sort(key=self.itemPath)
 
-    def descendants(self, index):
+        return TreeMimeData(self, items)
 
-        desc = []
+    def itemPath(self, item):
 
-        for i in range(self.rowCount(index)):
-            childIndex = self.index(i, 0, index)
-            desc += [childIndex] + self.descendants(childIndex)
+        path = []
+        while item.parentItem:
+            path.append(item.row())
+            item = item.parentItem
 
-        return desc
+        path.reverse()
+        return path
 
     def dropMimeData(self, data, action, row, column, parent):
 
+        self.movedOnDrop = False
+
         if action == QtCore.Qt.IgnoreAction:
             return True
         elif column > 0 or not data.hasFormat(self.mimeTypes()[0]):
@@ -336,6 +441,11 @@ class TreeModel(QtCore.QAbstractItemModel):
             else:
                 row = self.rowCount()
 
+        # items dragged within this model are moved as they are
+        if isinstance(data, TreeMimeData) and data.model is self:
+            self.movedOnDrop = self.moveItems(data.items, parent, row)
+            return self.movedOnDrop
+
         decodedData = binary_type(data.data(self.mimeTypes()[0]))
         objects = pickle.loads(decodedData)
         self.initializeTree(objects, parent, row)
@@ -345,8 +455,52 @@ class TreeModel(QtCore.QAbstractItemModel):
 
         return True
 
+    def moveItems(self, items, parentIndex, row):
+        """
+        move items (and their children) to row under parentIndex, keeping their order.
+        returns False if parentIndex is one of the items, or inside one of them
+        """
+
+        parentItem = self.item(parentIndex)
+
+        ancestor = parentItem
+        while ancestor:
+            if ancestor in items:
+                return False
+            ancestor = ancestor.parentItem
+
+        if self.canFetchMore(parentIndex):
+            self.fetchMore(parentIndex)
+
+        for item in items:
+            sourceItem = item.parentItem
+            sourceRow = item.row()
+
+            # already in place
+            if sourceItem is parentItem and sourceRow in (row, row - 1):
+                row = sourceRow + 1
+                continue
+
+            # moving may have changed the rows of either parent
+            sourceIndex = self.indexOfItem(sourceItem)
+            parentIndex = self.indexOfItem(parentItem)
+
+            self.beginMoveRows(sourceIndex, sourceRow, sourceRow, parentIndex, row)
+
+            sourceItem.removeChildren(sourceRow, 1)
+            if sourceItem is parentItem and sourceRow < row:
+                row -= 1
+            parentItem.insertChildren([item], row)
+
+            self.endMoveRows()
+            row += 1
+
+        return True
+
 class GameObjectTreeItem(TreeItem):
 
+    __slots__ = ()
+
     def setData(self, column, value):
 
         if value == "":
@@ -175,8 +175,7 @@ class MainWindow(QtGui.QMainWindow):
             return
 
         treeModel = self.gameObjectTreeContainer.gameObjectTree.model()
-        treeModel.clearTree()
-        treeModel.initializeTree(scene.gameObjects)
+        treeModel.resetTree(gameObjects)
 
 class GameObjectTreeContainer(QtGui.QWidget):
 
@@ -301,8 +300,14 @@ class GameObjectTree(QtGui.QTreeView):
         self.setExpanded(index, True)
 
         self.setProperty("dragging", "false")
+        self.model().movedOnDrop = False
         QtGui.QTreeView.dropEvent(self, event)
 
+        # the model has already moved the items. if the drag ended with a move action, the
+        # view would remove the dragged rows from their (new) positions
+        if self.model().movedOnDrop:
+            event.setDropAction(QtCore.Qt.CopyAction)
+
     def startDrag(self, event):
 
         indices = self.selectedIndexes()
@@ -334,6 +339,8 @@ class GameObjectTree(QtGui.QTreeView):
 
         # set position and parent
         if len(selected) == 1 and createAsChild:
+            if self.model().canFetchMore(selected[0]):
+                self.model().fetchMore(selected[0])
             position = self.model().rowCount(selected[0])
             parent = selected[0]
         elif selected:
@@ -1,6 +1,167 @@
 from __future__ import unicode_literals
 import lupa
 
+# name under which the compiled serializer is cached in each runtime's package.loaded
+SERIALIZER_MODULE = "lass.luatools.serializer"
+
+# how many values to move from lua to python per call (lua 5.1 can only return ~8000)
+UNPACK_CHUNK_SIZE = 4000
+
+# walks a table in lua and flattens it into one buffer of "slots", so that python only
+# has to fetch the buffer instead of making a call for every key, value and metatable.
+# slot kinds:
+# 	0, value: a value that python keeps as it is
+# 	1, size, hasMetatable, (key, slot) * size: a new table. if hasMetatable, the
+# 		metatable's slot follows the first (key, slot) pair
+# 	2, id: a table that was already written (ids count up from 1)
+# in list mode, the buffer starts with the number of items, followed by their slots.
+# tables are only written once per mode, so shared tables stay shared and cycles end.
+# returns the buffer, its size, and as much of its contents as fits in one chunk
+_SERIALIZER = """
+local getmetatable, next, type, unpack = getmetatable, next, type, unpack or table.unpack
+local CHUNK_SIZE = ...
+
+-- mirrors python's idea of which lua values are false, since luatools.ipairs stops
+-- at the first one and luaTableToDict skips falsy metatables
+local function isFalsy(v)
+	return v == nil or v == false or v == 0 or v == ""
+end
+
+return function(value, asList)
+	local buf, n = {}, 0
+	local ids = {[true] = {}, [false] = {}}
+	local count = 0
+
+	local function emit(v, withMeta)
+		if type(v) ~= "table" then
+			buf[n + 1], buf[n + 2] = 0, v
+			n = n + 2
+			return
+		end
+
+		local id = ids[withMeta][v]
+		if id then
+			buf[n + 1], buf[n + 2] = 2, id
+			n = n + 2
+			return
+		end
+
+		local mt = getmetatable(v)
+		if isFalsy(mt) then
+			mt = nil
+		end
+
+		count = count + 1
+		if mt == nil then
+			-- converts the same either way
+			ids[true][v], ids[false][v] = count, count
+		else
+			ids[withMeta][v] = count
+			if not withMeta then
+				mt = nil
+			end
+		end
+
+		local header = n + 2
+		buf[n + 1], buf[n + 3] = 1, mt ~= nil
+		n = n + 3
+
+		local size = 0
+		for key, item in next, v do
+			size = size + 1
+			n = n + 1
+			buf[n] = key
+			emit(item, false)
+			if size == 1 and mt ~= nil then
+				emit(mt, true)
+			end
+		end
+		buf[header] = size
+	end
+
+	if asList then
+		n = 1
+		local i = 1
+		while not isFalsy(value[i]) do
+			emit(value[i], true)
+			i = i + 1
+		end
+		buf[1] = i - 1
+	else
+		emit(value, true)
+	end
+
+	return buf, n, unpack(buf, 1, math.min(n, CHUNK_SIZE))
+end
+"""
+
+# (runtime, serializer) for the last runtime used, which is nearly always the only one
+_lastSerializer = (None, None)
+
+def _serializer(runtime):
+
+	global _lastSerializer
+
+	if _lastSerializer[0] is runtime:
+		return _lastSerializer[1]
+
+	loaded = runtime.globals().package.loaded
+	serializer = loaded[SERIALIZER_MODULE]
+
+	if not serializer:
+		serializer = runtime.execute(_SERIALIZER, UNPACK_CHUNK_SIZE)
+		loaded[SERIALIZER_MODULE] = serializer
+
+	_lastSerializer = (runtime, serializer)
+	return serializer
+
+def _serialize(table, runtime, asList=False):
+	# run the serializer, and copy its buffer into a python list
+
+	result = _serializer(runtime)(table, asList)
+
+	if not isinstance(result, tuple):
+		# the runtime doesn't unpack returned tuples, so go one value at a time
+		return [result[k] for k in range(1, len(result) + 1)]
+
+	buf, size, values = result[0], result[1], list(result[2:])
+
+	if size <= UNPACK_CHUNK_SIZE:
+		return values
+
+	unpack = runtime.eval("unpack or table.unpack")
+
+	for i in range(UNPACK_CHUNK_SIZE + 1, size + 1, UNPACK_CHUNK_SIZE):
+		j = min(i + UNPACK_CHUNK_SIZE - 1, size)
+		chunk = unpack(buf, i, j)
+		values.extend(chunk if i < j else (chunk,))
+
+	return values
+
+def _decode(slots, tables):
+
+	kind = next(slots)
+
+	if kind == 0:
+		return next(slots)
+	elif kind == 2:
+		return tables[next(slots) - 1]
+
+	size, hasMetatable = next(slots), next(slots)
+	d = {}
+	tables.append(d)
+	metatable = None
+
+	for i in range(size):
+		k = next(slots)
+		d[k] = _decode(slots, tables)
+		if hasMetatable:
+			if i == 0:
+				metatable = _decode(slots, tables)
+			d["__metatable"] = metatable
+
+	return d
+
 def luaTableToDict(table, runtime=None):
 	"""
 	recursively (deep) convert lua table to dictionary
@@ -10,23 +171,21 @@ def luaTableToDict(table, runtime=None):
 		runtime: lupa.LuaRuntime
 			if runtime is specified, the function will attempt to find the
 			metatables. if found, each dict will include the metatable dict
-			under the key "__metatable".
+			under the key "__metatable". the table is also converted in a single
+			call to lua, and tables that appear more than once (including
+			cycles) are converted to the same dict.
 	"""
 
 	if lupa.lua_type(table) != "table":
 		return table
 
-	d = {}
-
 	if runtime:
-		getmetatable = runtime.eval("getmetatable")
+		return _decode(iter(_serialize(table, runtime)), [])
+
+	d = {}
 
 	for k, v in table.items():
 		d[k] = luaTableToDict(v)
-		if runtime:
-			mt = getmetatable(table)
-			if mt:
-				d["__metatable"] = luaTableToDict(mt, runtime)
 
 	return d
 
@@ -35,6 +194,11 @@ def luaTableToList(table, runtime=None):
 	if lupa.lua_type(table) != "table":
 		return TypeError("table must be Lua table")
 
+	if runtime:
+		slots = iter(_serialize(table, runtime, True))
+		tables = []
+		return [_decode(slots, tables) for i in range(next(slots))]
+
 	l = []
 
 	for i, v in ipairs(table):
@@ -18,9 +18,9 @@
 # along with Lass.  If not, see <http://www.gnu.org/licenses/>.
 
 from __future__ import print_function, unicode_literals
-import os, sys, shutil, zipfile, subprocess
+import os, sys, shutil, hashlib, zipfile, threading, subprocess
 import lupa, six
-from . import luatools
+from . import luatools, simtools, watchtools, ziptools
 
 #set a bunch of global constants
 
@@ -41,15 +41,122 @@ if sys.platform == "win32":
 else:
 	DIR_TEMP = "/tmp"
 
+def _sortedWalk(top):
+	#os.walk, but in a stable order, so that builds are reproducible
+
+	for layer in os.walk(top):
+		layer[1].sort()
+		layer[2].sort()
+		yield layer
+
+class LuaRuntimePool(object):
+	"""
+	lua runtimes that can be shared by any number of project managers (e.g. one per window),
+	plus a cache of compiled lua files that all of them load from. a file is only
+	recompiled when its mtime or size changes
+
+	args:
+		runtimeType: lupa.LuaRuntime, or the LuaRuntime of a specific lupa lua module
+	"""
+
+	def __init__(self, runtimeType=None):
+
+		self.runtimeType = runtimeType or lupa.LuaRuntime
+		self._local = threading.local()
+		self._lock = threading.Lock()
+		self._bytecode = {}
+		self._compiler = None
+
+	def runtime(self):
+		"""
+		get the calling thread's runtime (lua states can't be shared between threads)
+		"""
+
+		runtime = getattr(self._local, "runtime", None)
+
+		if runtime is None:
+			runtime = self._local.runtime = self.runtimeType(unpack_returned_tuples=True)
+			self._local.chunks = {}
+
+		return runtime
+
+	def _compile(self, fileName):
+		# string.dump produces binary strings, which only a runtime without an encoding can
+		# hand back to python
+
+		if not self._compiler:
+			self._compiler = self.runtimeType(encoding=None)
+			self._compileFile = self._compiler.eval(
+				"function(f) local c, e = loadfile(f) return c and string.dump(c), e end"
+			)
+
+		bytecode, error = self._compileFile(fileName.encode(sys.getfilesystemencoding()))
+		if bytecode is None:
+			raise lupa.LuaError("Could not parse {}: {}".format(fileName, error.decode("utf-8", "replace")))
+
+		return bytecode
+
+	def bytecode(self, fileName):
+		"""
+		get the compiled bytecode of a lua file
+		"""
+
+		try:
+			st = os.stat(fileName)
+		except OSError:
+			raise OSError("{} not found".format(fileName))
+
+		key = os.path.abspath(fileName)
+		version = (st.st_mtime, st.st_size)
+
+		with self._lock:
+			cached = self._bytecode.get(key)
+			if not cached or cached[0] != version:
+				cached = self._bytecode[key] = (version, self._compile(fileName))
+
+		return cached
+
+	def loadChunk(self, fileName, runtime=None):
+		"""
+		load a lua file as a function, without running it
+
+		args:
+			runtime: runtime to load the chunk into. defaults to the calling thread's runtime
+		"""
+
+		ownRuntime = runtime is None or runtime is getattr(self._local, "runtime", None)
+		runtime = runtime or self.runtime()
+		version, bytecode = self.bytecode(fileName)
+
+		# the thread's own runtime also keeps the loaded function, so that opening a file
+		# that hasn't changed doesn't even need to undump it
+		if ownRuntime:
+			cached = self._local.chunks.get(os.path.abspath(fileName))
+			if cached and cached[0] == version:
+				return cached[1]
+
+		chunk = runtime.eval("loadstring or load")(bytecode, "@" + fileName)
+		if isinstance(chunk, tuple):
+			chunk = chunk[0]
+
+		if ownRuntime:
+			self._local.chunks[os.path.abspath(fileName)] = (version, chunk)
+
+		return chunk
+
 class ProjectManager(object):
 
 	#main functions
 
-	def __init__(self, lua=None):
+	def __init__(self, lua=None, runtimePool=None):
 
-		self.lua = lua or lupa.LuaRuntime(unpack_returned_tuples=True)
+		self.runtimePool = runtimePool or LuaRuntimePool()
+		self.lua = lua or self.runtimePool.runtime()
 
-	def buildGame(self, game, sendToTemp=False, examples=False, tests=False, target="l", packages=tuple(), **kwargs):
+	def buildGame(
+		self, game, sendToTemp=False, examples=False, tests=False, target="l", packages=tuple(),
+		incremental=False, compression=None, **kwargs
+	):
 		"""
 		build a .love file, plus optional binary distributions
 
@@ -60,28 +167,14 @@ class ProjectManager(object):
 			tests: search for project in tests folder, if not found in examples
 			target: target platform--must be combination of w, l, o
 			packages: list of lua packages to include, in addition to lass
+			incremental: only rewrite archive members whose files have changed since the last
+				incremental build
+			compression: name of a compression policy, or a string of custom compression rules
+				(see ziptools.compressionPolicy)
 		"""
 
-		if not (examples or tests):
-			if os.path.isabs(game):
-				projPath = game
-			else:
-				projPath = os.path.join(os.getcwd(), game)
-		#search for game in examples folder first, then test
-		else:
-			if os.path.isabs(game):
-				raise OSError("Can't use -e option with absolute path")
-			dirs = []
-			if examples:
-				dirs.append(DIR_EXAMPLES)
-			if tests:
-				dirs.append(DIR_TESTS)
-				if not "turtlemode" in packages:
-					packages = list(packages) + ["turtlemode"]
-			projPath = self.findGame(game, dirs)
-
-		if not projPath:
-			raise OSError("Project not found")
+		projPath = self.findProject(game, examples, tests)
+		packages = self._resolvePackages(packages, tests)
 
 		#in case game is '.', find the 'real' name
 		game = os.path.basename(os.path.abspath(projPath))
@@ -100,55 +193,16 @@ class ProjectManager(object):
 		if not sendToTemp and not "build" in os.listdir(projPath):
 			os.mkdir(buildPath)
 
-		origDir = os.getcwd()
-
-		# projFiles = os.listdir(sourcePath)
-		projFiles = []
-		os.chdir(sourcePath)
-
-		for layer in os.walk("."):
-			pr = layer[0]
-			if pr == ".":
-				pr = ""
-
-			for d in layer[1]:
-				projFiles.append(os.path.join(pr, d))
-			for f in layer[2]:
-				projFiles.append(os.path.join(pr, f))
-
-		os.chdir(origDir)
-
 		loveFileName = game + ".love"
+		entries = self._gatherBuildEntries(self.sourceDirectory(projPath), packages)
 
-		with zipfile.ZipFile(os.path.join(buildPath, loveFileName), mode='w') as loveFile:
-
-			#add project files
-			for f in projFiles:
-				if f != "build":
-					loveFile.write(os.path.join(sourcePath, f), f)
-
-			#add lass library
-			os.chdir(os.path.join(DIR_LUA_LIB, "lass"))
-			for i, wtup in enumerate(os.walk(".")):
-				for j, f in enumerate(wtup[2]):
-					fullName = os.path.join(wtup[0], f)
-					loveFile.write(fullName, os.path.join("lass", fullName))
-
-			#add other libraries
-			os.chdir(DIR_LUA_LIB)
-			for lib in packages:
-				if os.path.isdir(lib):
-					for i, wtup in enumerate(os.walk(lib)):
-						for j, f in enumerate(wtup[2]):
-							fullName = os.path.join(wtup[0], f)
-							loveFile.write(fullName)
-				else:
-					name = lib + ".lua"
-					loveFile.write(name)
-
-		os.chdir(origDir)
+		stats = ziptools.buildArchive(
+			os.path.join(buildPath, loveFileName), entries, policy=compression, incremental=incremental
+		)
 
 		if not sendToTemp:
+			print(ziptools.formatCompressionReport(stats))
+
 			if "w" in target:
 				buildExe(os.path.join(buildPath, loveFileName), dest=buildPath)
 			elif "o" in target:
@@ -193,29 +247,183 @@ class ProjectManager(object):
 		for t in ["main.lua", "settings.lua", "scene_main.lua"]:
 			shutil.copy(os.path.join(DIR_TEMPLATES_LUA, t), "src")
 
-	def playGame(self, game, scene="", **kwargs):
+	def stageGame(self, game, examples=False, tests=False, packages=tuple(), **kwargs):
+		"""
+		lay out a game in the temp folder as a directory of links to its files, which love
+		can run as is. the directory is kept and updated in place between runs
+
+		args:
+			game: name of game project
+			examples: search for project in examples folder
+			tests: search for project in tests folder, if not found in examples
+			packages: list of lua packages to include, in addition to lass
+		"""
+
+		projPath = self.findProject(game, examples, tests)
+		packages = self._resolvePackages(packages, tests)
+		self.assertProjectIsValid(projPath)
+
+		# projects in different places can have the same folder name (e.g. two checkouts
+		# of a game), so the stage directory is named after the full path as well
+		projPath = os.path.abspath(projPath)
+		pathHash = hashlib.sha1(projPath.encode("utf-8")).hexdigest()[:8]
+		stagePath = os.path.join(
+			DIR_TEMP, "{}-{}.stage".format(os.path.basename(projPath), pathHash)
+		)
+		ziptools.stageDirectory(
+			stagePath, self._gatherBuildEntries(self.sourceDirectory(projPath), packages)
+		)
+
+		return os.path.abspath(stagePath)
+
+	def playGame(self, game, scene="", noPack=False, **kwargs):
 		"""
 		temporarily build and play a Lass project
 
 		args:
 			scene: filename of scene to play
 			examples: search for project in examples folder
+			incremental: keep the built game (and its manifest) between runs, and only
+				rewrite the files that changed
+			noPack: skip zipping, and play a staged directory of the game's files instead
+		"""
+
+		if noPack:
+			game = self.stageGame(game, **kwargs)
+		else:
+			game = self.buildGame(game, sendToTemp=True, **kwargs)
+
+		proc, reader = self._startGame(game, scene, kwargs.get("args", ""))
+		try:
+			proc.wait()
+		finally:
+			self._stopGame(proc, reader)
+
+		if not (noPack or kwargs.get("incremental")):
+			os.remove(game)
+
+	def serveGame(self, game, scene="", interval=0.5, polling=False, **kwargs):
+		"""
+		build and play a Lass project, then keep watching its source folder. whenever something
+		changes, only the changed files are rebuilt, and the game is restarted. runs until
+		interrupted
+
+		args:
+			scene: filename of scene to play
+			examples: search for project in examples folder
+			interval: seconds between checks for changes (and to wait for a burst of changes
+				to settle)
+			polling: poll the source folder even if inotify is available
+		"""
+
+		kwargs["incremental"] = True
+		projPath = self.findProject(game, kwargs.get("examples"), kwargs.get("tests"))
+		watcher = watchtools.FileWatcher(self.sourceDirectory(projPath), interval, polling)
+
+		proc = reader = None
+		try:
+			while True:
+				loveFile = self.buildGame(game, sendToTemp=True, **kwargs)
+				proc, reader = self._startGame(loveFile, scene, kwargs.get("args", ""))
+
+				# if the game is closed, leave the archive warm until the next change
+				watcher.wait(settle=interval)
+				print("Change detected, restarting " + os.path.basename(loveFile), file=sys.stderr)
+
+				self._stopGame(proc, reader)
+				proc = reader = None
+		except KeyboardInterrupt:
+			pass
+		finally:
+			if proc:
+				self._stopGame(proc, reader)
+			watcher.close()
+
+	def simulateGame(self, game, scene="", frames=600, dt=1/60.0, output=None, **kwargs):
+		"""
+		run a Lass project's scene without love, as fast as possible, and print how long
+		each part of its frames took. graphics and box2d are stubbed out, so only lass
+		and the game's own scripts are measured
+
+		args:
+			scene: filename of scene to run. defaults to the project's first scene
+			frames: number of frames to step
+			dt: seconds of game time per frame
+			output: filename of a csv file to write each frame's timings to
+			examples: search for project in examples folder
 		"""
 
-		game = self.buildGame(game, sendToTemp=True, **kwargs)
+		projPath = self.findProject(game, kwargs.get("examples"), kwargs.get("tests"))
+		headless = simtools.HeadlessGame(self.sourceDirectory(projPath), DIR_LUA_LIB)
+		headless.loadScene(scene or None)
+
+		timings = headless.run(frames, dt)
+
+		if output:
+			simtools.writeTimings(timings, output)
+		print(simtools.formatTimingReport(timings))
+
+		return timings
+
+	def _startGame(self, game, scene="", args=""):
+		"""
+		launch love in the background, streaming its output to stdout.
+		returns the process and the thread reading its output
+		"""
 
-		# argString = ""
-		args = ["--scene=" + scene] if scene else []
-		args += kwargs.get("args", "").split()
+		args = (["--scene=" + scene] if scene else []) + args.split()
 
-		# os.system(_getLoveEngineCommand().format(game, argString))
 		proc = subprocess.Popen(self._getLoveEngineCommand(game, args), stdout=subprocess.PIPE)
-		while proc.poll() == None:
-			out = proc.stdout.readline()
-			sys.stdout.write(out)
-			sys.stdout.flush()
+		return proc, watchtools.streamOutput(proc.stdout)
+
+	def _stopGame(self, proc, reader):
+
+		if proc.poll() is None:
+			proc.terminate()
+			proc.wait()
+
+		# let the reader drain whatever the game printed before exiting
+		reader.join()
+
+	def findProject(self, game, examples=False, tests=False):
+		"""
+		get the full path of a game project
+
+		args:
+			game: name or path of game project
+			examples: search for project in examples folder
+			tests: search for project in tests folder, if not found in examples
+		"""
+
+		if not (examples or tests):
+			if os.path.isabs(game):
+				projPath = game
+			else:
+				projPath = os.path.join(os.getcwd(), game)
+		#search for game in examples folder first, then test
+		else:
+			if os.path.isabs(game):
+				raise OSError("Can't use -e option with absolute path")
+			dirs = []
+			if examples:
+				dirs.append(DIR_EXAMPLES)
+			if tests:
+				dirs.append(DIR_TESTS)
+			projPath = self.findGame(game, dirs)
+
+		if not projPath:
+			raise OSError("Project not found")
+
+		return projPath
 
-		os.remove(game)
+	def _resolvePackages(self, packages, tests=False):
+		#test projects always need turtlemode
+
+		packages = list(packages or tuple())
+		if tests and not "turtlemode" in packages:
+			packages.append("turtlemode")
+
+		return packages
 
 	def newPrefab(self, fileName):
 		shutil.copy(
@@ -223,21 +431,52 @@ class ProjectManager(object):
 			os.path.join("src", fileName)
 		)
 
-	def _loadLuaModule(self, fileName):
+	def _gatherBuildEntries(self, sourcePath, packages):
+		"""
+		list every file that goes into a game's .love file, as (fileName, arcName) tuples,
+		in the order they are written to the archive
+		"""
 
-		# use multi-line lua string to escape any backslashes
-		self.lua.execute("t = loadfile([[{}]])".format(fileName))
-		module = None
+		entries = []
+
+		#add project files (including folders)
+		for pr, dirs, files in _sortedWalk(sourcePath):
+			rel = os.path.relpath(pr, sourcePath)
+			if rel == ".":
+				rel = ""
+
+			for f in dirs + files:
+				if os.path.join(rel, f) != "build":
+					entries.append((os.path.join(pr, f), os.path.join(rel, f)))
+
+		#add lass library
+		libPath = os.path.join(DIR_LUA_LIB, "lass")
+		for pr, dirs, files in _sortedWalk(libPath):
+			for f in files:
+				fullName = os.path.join(pr, f)
+				entries.append((fullName, os.path.join("lass", os.path.relpath(fullName, libPath))))
+
+		#add other libraries
+		for lib in packages:
+			if os.path.isdir(os.path.join(DIR_LUA_LIB, lib)):
+				for pr, dirs, files in _sortedWalk(os.path.join(DIR_LUA_LIB, lib)):
+					for f in files:
+						fullName = os.path.join(pr, f)
+						entries.append((fullName, os.path.relpath(fullName, DIR_LUA_LIB)))
+			else:
+				name = lib + ".lua"
+				entries.append((os.path.join(DIR_LUA_LIB, name), name))
 
-		if self.lua.globals().t:
-			try:
-				module = self.lua.globals().t()
-			except lupa.LuaError as e:
-				raise lupa.LuaError("Could not parse " + fileName)
-		else:
-			raise OSError("{} not found".format(fileName))
+		return entries
 
-		return module
+	def _loadLuaModule(self, fileName):
+
+		chunk = self.runtimePool.loadChunk(fileName, self.lua)
+
+		try:
+			return chunk()
+		except lupa.LuaError as e:
+			raise lupa.LuaError("Could not parse " + fileName)
 
 	def loadScene(self, fileName):
 
@@ -0,0 +1,438 @@
+#!/usr/bin/env python
+
+# Copyright 2014, 2015 Decky Coss
+
+# This file is part of Lass.
+
+# Lass is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Lass is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with Lass.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function, unicode_literals, division
+import os, time, struct
+import lupa
+
+# the parts of a frame that are timed, in the order they happen. update, physics and
+# collisions are recorded by GameScene.update (see simulate in lass/init.lua)
+PHASES = ("update", "physics", "collisions", "draw")
+
+# a stand-in for the love namespace. every love object is a stub that remembers what
+# its setters were given and hands it back from its getters, so that code which reads
+# back what it set (body positions, fixture categories, ...) keeps working. nothing is
+# drawn, and the physics world never moves anything. lass's own collision detection
+# and SimpleRigidbody don't need it, so they run as they would in the game
+_LOVE_STUB = """
+local sourceDirectory, helpers = ...
+local unpack = unpack or table.unpack
+
+local function noop() end
+
+local function stubModule(functions)
+	return setmetatable(functions or {}, {__index = function() return noop end})
+end
+
+local function path(name)
+	return sourceDirectory .. "/" .. name
+end
+
+local newObject
+
+local objectMethods = {
+	type = function(self) return self.kind end,
+	typeOf = function(self, kind) return kind == self.kind or kind == "Object" end,
+	destroy = function(self) self.state.Destroyed = {true} end,
+	release = function(self) self.state.Destroyed = {true} end,
+	clone = function(self)
+		local state = {}
+		for k, v in pairs(self.state) do
+			state[k] = {unpack(v)}
+		end
+		return newObject(self.kind, state)
+	end,
+	add = function(self)
+		self.count = self.count + 1
+		return self.count
+	end,
+	clear = function(self) self.count = 0 end,
+}
+
+local objectMeta = {__index = function(self, key)
+	local method = objectMethods[key]
+	if method then
+		return method
+	end
+
+	local verb, property = string.match(key, "^(%l+)(%u.*)$")
+	if verb == "set" then
+		return function(self, ...) self.state[property] = {...} end
+	elseif verb == "get" then
+		return function(self) return unpack(self.state[property] or {}) end
+	elseif verb == "is" then
+		return function(self) return self.state[property] ~= nil and self.state[property][1] or false end
+	end
+
+	return noop
+end}
+
+function newObject(kind, state)
+	return setmetatable({kind = kind, state = state or {}, count = 0}, objectMeta)
+end
+
+local function newFile(name)
+
+	local file = newObject("File")
+
+	function file:open(mode)
+		local handle, message = io.open(path(name), mode == "r" and "rb" or mode .. "b")
+		self.handle = handle
+		return handle ~= nil, message
+	end
+
+	function file:read(size)
+		return self.handle:read(size or "*a")
+	end
+
+	function file:close()
+		self.handle:close()
+		self.handle = nil
+		return true
+	end
+
+	return file
+end
+
+local mode = {width = 800, height = 600}
+
+local function cross(x1, y1, x2, y2, x3, y3)
+	return (x2 - x1) * (y3 - y2) - (y2 - y1) * (x3 - x2)
+end
+
+love = {
+	filesystem = stubModule({
+		load = function(name)
+			local chunk, message = loadfile(path(name))
+			if not chunk then
+				error(message, 2)
+			end
+			return chunk
+		end,
+		read = function(name)
+			local handle = assert(io.open(path(name), "rb"))
+			local contents = handle:read("*a")
+			handle:close()
+			return contents, #contents
+		end,
+		newFile = newFile,
+		exists = function(name) return helpers.exists(path(name)) end,
+		isFile = function(name) return helpers.isFile(path(name)) end,
+		isDirectory = function(name) return helpers.isDirectory(path(name)) end,
+		getDirectoryItems = function(name) return helpers.listDirectory(path(name)) end,
+		getLastModified = function(name) return helpers.getLastModified(path(name)) end,
+	}),
+	graphics = stubModule({
+		getWidth = function() return mode.width end,
+		getHeight = function() return mode.height end,
+		getDimensions = function() return mode.width, mode.height end,
+		getCanvas = function() return nil end,
+		getBackgroundColor = function() return 0, 0, 0, 255 end,
+		newImage = function(name)
+			local width, height = helpers.imageSize(path(name))
+			return newObject("Image", {Dimensions = {width, height}, Width = {width}, Height = {height}})
+		end,
+		newCanvas = function(width, height)
+			width, height = width or mode.width, height or mode.height
+			return newObject("Canvas", {Dimensions = {width, height}, Width = {width}, Height = {height}})
+		end,
+		newSpriteBatch = function(image, size) return newObject("SpriteBatch", {BufferSize = {size or 1000}}) end,
+		newMesh = function(count) return newObject("Mesh", {VertexCount = {count}}) end,
+		newFont = function(size)
+			local font = newObject("Font", {Height = {size or 12}})
+			function font:getWrap(text) return 0, {text} end
+			return font
+		end,
+		newText = function(font) return newObject("Text", {Font = {font}, Dimensions = {0, 0}}) end,
+	}),
+	physics = stubModule({
+		newWorld = function() return newObject("World") end,
+		newBody = function(world, x, y, bodyType)
+			return newObject("Body", {
+				Position = {x or 0, y or 0}, X = {x or 0}, Y = {y or 0}, Angle = {0},
+				LinearVelocity = {0, 0}, AngularVelocity = {0}, Type = {bodyType or "static"},
+			})
+		end,
+		newFixture = function(body, shape, density)
+			return newObject("Fixture", {Body = {body}, Shape = {shape}, Density = {density or 1}, Category = {1}})
+		end,
+		newCircleShape = function(x, y, radius)
+			if not radius then
+				x, y, radius = 0, 0, x
+			end
+			return newObject("CircleShape", {Point = {x, y}, Radius = {radius}})
+		end,
+		newPolygonShape = function(...) return newObject("PolygonShape", {Points = {...}}) end,
+		newRectangleShape = function(...) return newObject("PolygonShape") end,
+	}),
+	math = stubModule({
+		isConvex = function(vertices, ...)
+			if type(vertices) ~= "table" then
+				vertices = {vertices, ...}
+			end
+
+			local n, sign = #vertices, 0
+			for i = 1, n, 2 do
+				local j, k = (i + 1) % n + 1, (i + 3) % n + 1
+				local c = cross(
+					vertices[i], vertices[i + 1], vertices[j], vertices[j + 1], vertices[k], vertices[k + 1]
+				)
+				if c ~= 0 then
+					if sign ~= 0 and (c > 0) ~= (sign > 0) then
+						return false
+					end
+					sign = c
+				end
+			end
+			return true
+		end,
+		triangulate = function(vertices, ...)
+			--a fan of triangles, which is only right for convex polygons
+			if type(vertices) ~= "table" then
+				vertices = {vertices, ...}
+			end
+
+			local triangles = {}
+			for i = 3, #vertices - 3, 2 do
+				triangles[#triangles + 1] = {
+					vertices[1], vertices[2], vertices[i], vertices[i + 1], vertices[i + 2], vertices[i + 3]
+				}
+			end
+			return triangles
+		end,
+	}),
+	timer = stubModule({
+		getTime = helpers.getTime,
+		getDelta = function() return helpers.delta end,
+		getFPS = function() return helpers.delta > 0 and math.floor(1 / helpers.delta + 0.5) or 0 end,
+	}),
+	window = stubModule({
+		getMode = function() return mode.width, mode.height, {} end,
+		setMode = function(width, height)
+			mode.width, mode.height = width, height
+			return true
+		end,
+		getPosition = function() return 0, 0, 1 end,
+	}),
+	audio = stubModule({
+		newSource = function(name, sourceType)
+			return newObject("Source", {Channels = {1}, VolumeLimits = {0, 1}, Volume = {1}, Pitch = {1}})
+		end,
+	}),
+	keyboard = stubModule({isDown = function() return false end}),
+	mouse = stubModule({
+		getPosition = function() return 0, 0 end,
+		isDown = function() return false end,
+	}),
+	event = stubModule(),
+	system = stubModule({getOS = function() return "Headless" end}),
+}
+"""
+
+# steps a scene by one frame and returns how long each part of it took
+_STEP = """
+local scene, dt, getTime = ...
+
+local timings = {}
+scene.globals.timings = timings
+
+local start = getTime()
+scene:update(dt)
+local updated = getTime()
+scene:draw()
+local drawn = getTime()
+
+scene.globals.timings = nil
+
+return
+	timings.update or 0,
+	timings.physics or 0,
+	timings.collisions or 0,
+	drawn - updated,
+	drawn - start
+"""
+
+def _defaultRuntimeType():
+	#love runs on luajit, and lass relies on it (bit, unpack, loadstring), so use it if
+	#lupa was built with it
+
+	for name in ("luajit21", "luajit20"):
+		try:
+			module = __import__("lupa." + name, fromlist=["LuaRuntime"])
+		except ImportError:
+			continue
+		return module.LuaRuntime
+
+	return lupa.LuaRuntime
+
+def _imageSize(fileName):
+	#read the dimensions of a png from its header, without decoding it. other formats
+	#are treated as 1x1
+
+	try:
+		with open(fileName, "rb") as f:
+			header = f.read(24)
+	except (IOError, OSError):
+		raise IOError("Could not open " + fileName)
+
+	if header[:8] == b"\x89PNG\r\n\x1a\n" and header[12:16] == b"IHDR":
+		return struct.unpack(">II", header[16:24])
+
+	return 1, 1
+
+class HeadlessGame(object):
+	"""
+	runs the scenes of a game without love, as fast as they can go, so that they can be
+	profiled and benchmarked where there is no window (e.g. on a CI server). love is
+	replaced with stubs: graphics calls do nothing, the box2d world never moves or
+	collides anything, and the filesystem reads from the game's source directory
+
+	args:
+		sourceDirectory: the game's src folder
+		libraryDirectory: folder of lua packages to require from, after sourceDirectory
+		runtimeType: the LuaRuntime to run the game in. defaults to luajit, if available
+	"""
+
+	def __init__(self, sourceDirectory, libraryDirectory, runtimeType=None):
+
+		self.sourceDirectory = os.path.abspath(sourceDirectory)
+		self.lua = (runtimeType or _defaultRuntimeType())(unpack_returned_tuples=True)
+		self.scene = None
+		self.frame = 0
+
+		timer = getattr(time, "perf_counter", time.time)
+
+		self.helpers = self.lua.table_from({
+			"exists": os.path.exists,
+			"isFile": os.path.isfile,
+			"isDirectory": os.path.isdir,
+			"listDirectory": lambda d: self.lua.table(*sorted(os.listdir(d))),
+			"getLastModified": lambda f: int(os.path.getmtime(f)),
+			"imageSize": _imageSize,
+			"getTime": timer,
+			"delta": 0,
+		})
+		self._getTime = timer
+
+		packagePath = ";".join(
+			os.path.join(d, pattern)
+			for d in (self.sourceDirectory, os.path.abspath(libraryDirectory))
+			for pattern in ("?.lua", os.path.join("?", "init.lua"))
+		)
+		self.lua.globals().package.path = packagePath + ";" + self.lua.globals().package.path
+
+		self.lua.execute(_LOVE_STUB, self.sourceDirectory, self.helpers)
+		self._step = self.lua.execute("return function(...) " + _STEP + " end")
+
+	def loadScene(self, scene=None, settings="settings.lua"):
+		"""
+		load a scene the same way a game's main.lua does
+
+		args:
+			scene: filename of the scene, relative to the source directory. defaults to
+				firstScene in the game's settings
+			settings: filename of the game's settings, or None to use the defaults
+		"""
+
+		lass = self.lua.require("lass")
+		self.scene = lass.GameScene()
+
+		if settings and os.path.isfile(os.path.join(self.sourceDirectory, settings)):
+			self.scene.loadSettings(self.scene, settings)
+		else:
+			self.scene.loadSettings(self.scene, self.lua.table())
+
+		self.scene.load(self.scene, scene or None)
+		self.frame = 0
+
+		return self.scene
+
+	def step(self, dt=1/60):
+		"""
+		update and draw the scene once, and get how many seconds each part of the frame
+		took, by name (see PHASES), plus the frame's total
+		"""
+
+		self.helpers.delta = dt
+		timings = self._step(self.scene, dt, self._getTime)
+		self.frame += 1
+
+		result = dict(zip(PHASES, timings[:-1]))
+		result["frame"] = timings[-1]
+		return result
+
+	def run(self, frames, dt=1/60):
+		"""
+		step the scene a number of times, and get the timings of each frame
+
+		args:
+			frames: number of frames to step
+			dt: seconds of game time per frame
+		"""
+
+		return [self.step(dt) for i in range(frames)]
+
+def summarize(timings):
+	"""
+	get the mean, median and maximum seconds of each phase over a list of frame timings,
+	by phase name
+	"""
+
+	summary = {}
+
+	for phase in PHASES + ("frame",):
+		values = sorted(frame[phase] for frame in timings)
+		if not values:
+			continue
+
+		summary[phase] = {
+			"mean": sum(values) / len(values),
+			"median": values[len(values) // 2],
+			"max": values[-1],
+		}
+
+	return summary
+
+def formatTimingReport(timings):
+	"""
+	describe the mean, median and maximum milliseconds of each phase of a run
+	"""
+
+	summary = summarize(timings)
+	lines = ["{} frame(s)".format(len(timings))]
+
+	for phase in PHASES + ("frame",):
+		if phase in summary:
+			lines.append("{}: mean {:.3f}ms, median {:.3f}ms, max {:.3f}ms".format(
+				phase, *(summary[phase][k] * 1000 for k in ("mean", "median", "max"))
+			))
+
+	return "\n".join(lines)
+
+def writeTimings(timings, fileName):
+	"""
+	write the seconds each frame spent in each phase to a csv file, one row per frame
+	"""
+
+	columns = PHASES + ("frame",)
+
+	with open(fileName, "w") as f:
+		f.write(",".join(columns) + "\n")
+		for frame in timings:
+			f.write(",".join(repr(frame[c]) for c in columns) + "\n")
@@ -0,0 +1,122 @@
+from __future__ import unicode_literals
+import os, sys, time, threading
+
+try:
+	import pyinotify
+except ImportError:
+	pyinotify = None
+
+class FileWatcher(object):
+	"""
+	watch a directory tree for changes.
+
+	uses inotify if pyinotify is installed; otherwise, the tree is polled
+	every [interval] seconds for files whose size or mtime has changed.
+	"""
+
+	def __init__(self, directory, interval=0.5, usePolling=False):
+
+		self.directory = directory
+		self.interval = interval
+		self._changed = False
+
+		if pyinotify and not usePolling:
+			mask = (
+				pyinotify.IN_CREATE | pyinotify.IN_DELETE | pyinotify.IN_MODIFY |
+				pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO | pyinotify.IN_ATTRIB
+			)
+			self._manager = pyinotify.WatchManager()
+			self._notifier = pyinotify.Notifier(
+				self._manager, self._onEvent, timeout=int(interval * 1000)
+			)
+			self._manager.add_watch(directory, mask, rec=True, auto_add=True)
+		else:
+			self._notifier = None
+			self._snapshot = self._takeSnapshot()
+
+	def _onEvent(self, event):
+		self._changed = True
+
+	def _takeSnapshot(self):
+
+		snapshot = {}
+
+		for pr, dirs, files in os.walk(self.directory):
+			for f in dirs + files:
+				fullName = os.path.join(pr, f)
+				try:
+					st = os.stat(fullName)
+				except OSError:
+					# the file was removed while we were walking
+					continue
+				snapshot[fullName] = (st.st_size, st.st_mtime)
+
+		return snapshot
+
+	def _poll(self):
+		# check for changes once, blocking for at most self.interval seconds
+
+		if self._notifier:
+			if self._notifier.check_events():
+				self._notifier.read_events()
+				self._notifier.process_events()
+		else:
+			time.sleep(self.interval)
+			snapshot = self._takeSnapshot()
+			if snapshot != self._snapshot:
+				self._snapshot = snapshot
+				self._changed = True
+
+		changed = self._changed
+		self._changed = False
+		return changed
+
+	def wait(self, timeout=None, settle=None):
+		"""
+		block until something in the directory changes. returns False if timeout
+		(in seconds) expires first.
+
+		if settle is specified, keep waiting until nothing has changed for that many
+		seconds, so that a burst of writes is reported as a single change
+		"""
+
+		deadline = None if timeout is None else time.time() + timeout
+
+		while not self._poll():
+			if deadline is not None and time.time() >= deadline:
+				return False
+
+		if settle:
+			while self.wait(settle):
+				pass
+
+		return True
+
+	def close(self):
+
+		if self._notifier:
+			self._notifier.stop()
+			self._notifier = None
+
+def streamOutput(stream, destination=None):
+	"""
+	copy everything from stream to destination (stdout by default) on a background
+	thread, so that a process writing lots of output never blocks on its pipe, and
+	the caller never blocks on the process. returns the thread
+	"""
+
+	if destination is None:
+		# write bytes as they are, on both python 2 and 3
+		destination = getattr(sys.stdout, "buffer", sys.stdout)
+
+	def run():
+		for line in iter(stream.readline, b""):
+			destination.write(line)
+			destination.flush()
+		stream.close()
+
+	thread = threading.Thread(target=run)
+	thread.daemon = True
+	thread.start()
+
+	return thread
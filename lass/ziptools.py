@@ -0,0 +1,557 @@
+from __future__ import unicode_literals
+import os, sys, stat, time, json, zlib, shutil, hashlib, zipfile, collections, multiprocessing
+from multiprocessing.pool import ThreadPool
+from six import string_types
+
+MANIFEST_VERSION = 1
+READ_BLOCK_SIZE = 1024 * 1024
+# the python versions whose ZipFile internals writeMember is known to work with
+RAW_WRITE_VERSIONS = ((2, 7), (3, 13))
+# how many files each compression thread may have read and compressed ahead of the writer
+JOBS_PER_WORKER = 2
+
+# file types that are already compressed, and gain next to nothing from being deflated again
+COMPRESSED_EXTENSIONS = (
+	".ogg", ".mp3", ".flac", ".png", ".jpg", ".jpeg", ".gif", ".zip", ".love", ".ttf", ".otf"
+)
+
+# each policy is an ordered list of (extensions, compressType, level) rules.
+# the first rule whose extensions match a file is applied to it; "*" matches anything
+COMPRESSION_POLICIES = {
+	"store": [
+		("*", zipfile.ZIP_STORED, None),
+	],
+	"deflate": [
+		("*", zipfile.ZIP_DEFLATED, 6),
+	],
+	"default": [
+		(COMPRESSED_EXTENSIONS, zipfile.ZIP_STORED, None),
+		("*", zipfile.ZIP_DEFLATED, 6),
+	],
+	"best": [
+		(COMPRESSED_EXTENSIONS, zipfile.ZIP_STORED, None),
+		("*", zipfile.ZIP_DEFLATED, 9),
+	],
+}
+
+COMPRESSION_METHODS = {
+	"store": zipfile.ZIP_STORED,
+	"deflate": zipfile.ZIP_DEFLATED,
+}
+
+def manifestPath(archivePath):
+	return archivePath + ".manifest"
+
+def fileDigest(fileName):
+	"""
+	return the sha1 hex digest of a file's contents
+	"""
+
+	h = hashlib.sha1()
+	with open(fileName, "rb") as f:
+		while True:
+			block = f.read(READ_BLOCK_SIZE)
+			if not block:
+				break
+			h.update(block)
+
+	return h.hexdigest()
+
+def zipInfo(fileName, arcName, st=None):
+	"""
+	create a ZipInfo for a file or directory, with the same metadata that
+	ZipFile.write would give it
+
+	args:
+		fileName: path of the file on disk
+		arcName: name of the file inside the archive
+		st: result of os.stat(fileName), if already known
+	"""
+
+	st = st or os.stat(fileName)
+	isDir = stat.S_ISDIR(st.st_mode)
+
+	# zip timestamps can't represent anything before 1980
+	dateTime = time.localtime(st.st_mtime)[0:6]
+	if dateTime[0] < 1980:
+		dateTime = (1980, 1, 1, 0, 0, 0)
+
+	arcName = os.path.normpath(os.path.splitdrive(arcName)[1])
+	while arcName[0] in (os.sep, os.altsep):
+		arcName = arcName[1:]
+	if isDir:
+		arcName += "/"
+
+	zinfo = zipfile.ZipInfo(arcName, dateTime)
+	zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+	if isDir:
+		zinfo.external_attr |= 0x10
+
+	return zinfo
+
+def compress(data, compressType, level=None):
+	"""
+	compress data as a raw zip member payload
+	"""
+
+	if compressType == zipfile.ZIP_STORED:
+		return data
+	elif compressType == zipfile.ZIP_DEFLATED:
+		if level is None:
+			level = zlib.Z_DEFAULT_COMPRESSION
+		compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+		return compressor.compress(data) + compressor.flush()
+	else:
+		raise ValueError("unsupported compression type: {}".format(compressType))
+
+def compressionPolicy(policy):
+	"""
+	return a list of compression rules, given the name of a policy in
+	COMPRESSION_POLICIES, a string of custom rules, or a list of rules.
+
+	custom rules are comma-separated, each in the form extensions=method[:level],
+	where extensions are separated by "|", and method is "store" or "deflate".
+	example: "ogg|png=store,lua=deflate:9,*=deflate:6"
+	"""
+
+	if policy is None:
+		policy = "default"
+
+	if not isinstance(policy, string_types):
+		return list(policy)
+	elif policy in COMPRESSION_POLICIES:
+		return COMPRESSION_POLICIES[policy]
+
+	rules = []
+	for ruleString in policy.split(","):
+		try:
+			extensions, method = ruleString.split("=")
+			method, _, level = method.partition(":")
+			compressType = COMPRESSION_METHODS[method.strip()]
+			level = int(level) if level else None
+		except (ValueError, KeyError):
+			raise ValueError("invalid compression rule: {}".format(ruleString))
+
+		extensions = tuple(
+			e if e == "*" or e.startswith(".") else "." + e
+			for e in (e.strip().lower() for e in extensions.split("|"))
+		)
+		if extensions == ("*",):
+			extensions = "*"
+
+		rules.append((extensions, compressType, level))
+
+	return rules
+
+def ruleLabel(rule):
+
+	extensions, compressType, level = rule
+	if extensions != "*":
+		extensions = "|".join(extensions)
+
+	method = "store" if compressType == zipfile.ZIP_STORED else "deflate"
+	if level is not None:
+		method += ":{}".format(level)
+
+	return "{}={}".format(extensions, method)
+
+def matchRule(rules, arcName):
+	"""
+	return the first rule that applies to arcName. if no rule applies, the file is stored
+	"""
+
+	extension = os.path.splitext(arcName)[1].lower()
+
+	for rule in rules:
+		if rule[0] == "*" or extension in rule[0]:
+			return rule
+
+	return ("*", zipfile.ZIP_STORED, None)
+
+def canWriteRaw():
+	"""
+	return whether writeMember can write compressed payloads as they are. it relies
+	on private ZipFile attributes that are only known to be the same in the python
+	versions in RAW_WRITE_VERSIONS
+	"""
+
+	low, high = RAW_WRITE_VERSIONS
+	return low <= sys.version_info[:2] <= high
+
+def writeMember(archive, zinfo, payload, crc, fileSize, compressType, level=None):
+	"""
+	write an already compressed member to an archive opened for writing.
+	returns the offset of the payload inside the archive, or None if it isn't
+	known.
+
+	ZipFile can only write members by compressing them itself, so we write the
+	local header and payload directly and let ZipFile take care of the central
+	directory when it is closed. in python versions where that isn't known to
+	work (see canWriteRaw), the payload is decompressed and written with
+	ZipFile.writestr instead, which compresses it again.
+	"""
+
+	zinfo.compress_type = compressType
+
+	if not canWriteRaw():
+		data = payload
+		if compressType == zipfile.ZIP_DEFLATED:
+			data = zlib.decompress(payload, -15)
+
+		if level is not None and sys.version_info >= (3, 7):
+			archive.writestr(zinfo, data, compresslevel=level)
+		else:
+			archive.writestr(zinfo, data)
+		return None
+
+	zinfo.CRC = crc
+	zinfo.file_size = fileSize
+	zinfo.compress_size = len(payload)
+	zinfo.header_offset = archive.fp.tell()
+
+	header = zinfo.FileHeader()
+	archive.fp.write(header)
+	archive.fp.write(payload)
+
+	archive.filelist.append(zinfo)
+	archive.NameToInfo[zinfo.filename] = zinfo
+	archive._didModify = True
+	if hasattr(archive, "start_dir"):
+		archive.start_dir = archive.fp.tell()
+
+	return zinfo.header_offset + len(header)
+
+def loadManifest(archivePath):
+	"""
+	load the manifest of a previous build, or return None if the manifest
+	is missing, out of date, or doesn't describe the archive on disk
+	"""
+
+	try:
+		with open(manifestPath(archivePath)) as f:
+			manifest = json.load(f)
+		st = os.stat(archivePath)
+	except (IOError, OSError, ValueError):
+		return None
+
+	if (
+		manifest.get("version") != MANIFEST_VERSION or
+		manifest.get("archiveSize") != st.st_size or
+		manifest.get("archiveMtime") != st.st_mtime
+	):
+		return None
+
+	return manifest
+
+def _isUnchanged(record, fileName, st, compressType, level):
+	# returns (unchanged, digest). digest is None if we didn't need to read the file
+
+	if not record or record["compressType"] != compressType or record["level"] != level:
+		return False, None
+	elif record["size"] != st.st_size:
+		return False, None
+	elif record["mtime"] == st.st_mtime:
+		return True, record["hash"]
+
+	# the file was touched, but its contents may be the same
+	digest = fileDigest(fileName)
+	return digest == record["hash"], digest
+
+def _readAndCompress(job):
+	# runs in a worker thread. zlib releases the GIL while it works, so
+	# members are compressed in parallel
+
+	fileName, compressType, level = job
+
+	with open(fileName, "rb") as f:
+		data = f.read()
+
+	start = time.time()
+	payload = compress(data, compressType, level)
+	crc = zlib.crc32(data) & 0xffffffff
+	elapsed = time.time() - start
+
+	return payload, crc, hashlib.sha1(data).hexdigest(), elapsed
+
+def _boundedResults(pool, func, jobs, window):
+	# like pool.imap, but with at most window jobs started and not yet collected. the
+	# workers would otherwise read and compress everything while the writer falls
+	# behind, holding whole files and their payloads in memory
+
+	jobs = iter(jobs)
+	pending = collections.deque()
+
+	while True:
+		while len(pending) < window:
+			job = next(jobs, None)
+			if job is None:
+				break
+			pending.append(pool.apply_async(func, (job,)))
+
+		if not pending:
+			return
+
+		yield pending.popleft().get()
+
+def buildArchive(archivePath, entries, policy=None, incremental=False, workers=None):
+	"""
+	write a zip archive from a list of files.
+
+	each file is compressed according to the first matching rule of a
+	compression policy. changed files are read and compressed in a pool of
+	worker threads, then written to the archive in their original order.
+
+	in incremental mode, a manifest of every member's size, mtime, and hash is
+	kept next to the archive. members whose contents and compression rule
+	haven't changed since the last build are copied straight from the previous
+	archive instead of being compressed again. the result is byte-identical to
+	a clean build.
+
+	args:
+		archivePath: path of the archive to create or update
+		entries: ordered list of (fileName, arcName) tuples
+		policy: compression policy (see compressionPolicy)
+		incremental: reuse unchanged members from the previous build
+		workers: number of compression threads (default: number of CPUs)
+
+	returns a dict with the number of members that were written and reused,
+	and, for each rule label, the number of files it was applied to, their
+	original and compressed size, and the time spent compressing them
+	"""
+
+	rules = compressionPolicy(policy)
+	manifest = loadManifest(archivePath) if incremental else None
+	oldRecords = manifest["entries"] if manifest else {}
+	records = {}
+	stats = {"written": 0, "reused": 0, "rules": {}}
+
+	# work out what needs to be compressed before writing anything
+
+	plan = []
+	jobs = []
+
+	for fileName, arcName in entries:
+
+		st = os.stat(fileName)
+		zinfo = zipInfo(fileName, arcName, st)
+
+		if stat.S_ISDIR(st.st_mode):
+			plan.append((zinfo, st, None, None, None))
+			continue
+
+		rule = matchRule(rules, zinfo.filename)
+		record = oldRecords.get(zinfo.filename)
+		unchanged, digest = _isUnchanged(record, fileName, st, rule[1], rule[2])
+
+		if unchanged:
+			plan.append((zinfo, st, rule, record, digest))
+		else:
+			plan.append((zinfo, st, rule, None, None))
+			jobs.append((fileName, rule[1], rule[2]))
+
+	tmpPath = archivePath + ".tmp"
+	previous = open(archivePath, "rb") if manifest else None
+	workers = workers or multiprocessing.cpu_count()
+	pool = ThreadPool(workers) if jobs else None
+
+	try:
+		# results are collected in the same order as the jobs, so we can write each
+		# member as soon as it (and everything before it) is ready
+		results = _boundedResults(pool, _readAndCompress, jobs, workers * JOBS_PER_WORKER)
+
+		with zipfile.ZipFile(tmpPath, mode="w") as archive:
+			for zinfo, st, rule, record, digest in plan:
+
+				if not rule:
+					writeMember(archive, zinfo, b"", 0, 0, zipfile.ZIP_STORED)
+					continue
+
+				label = ruleLabel(rule)
+				ruleStats = stats["rules"].setdefault(
+					label, {"files": 0, "size": 0, "compressSize": 0, "time": 0.0, "reused": 0, "reusedSize": 0}
+				)
+
+				if record:
+					previous.seek(record["offset"])
+					payload = previous.read(record["compressSize"])
+					crc = record["crc"]
+					stats["reused"] += 1
+					ruleStats["reused"] += 1
+					ruleStats["reusedSize"] += st.st_size
+				else:
+					payload, crc, digest, elapsed = next(results)
+					stats["written"] += 1
+					ruleStats["time"] += elapsed
+
+				ruleStats["files"] += 1
+				ruleStats["size"] += st.st_size
+				ruleStats["compressSize"] += len(payload)
+
+				offset = writeMember(archive, zinfo, payload, crc, st.st_size, rule[1], rule[2])
+
+				# a member can only be reused if we know where its payload is
+				if incremental and offset is not None:
+					records[zinfo.filename] = {
+						"size": st.st_size,
+						"mtime": st.st_mtime,
+						"hash": digest,
+						"crc": crc,
+						"compressType": rule[1],
+						"level": rule[2],
+						"offset": offset,
+						"compressSize": len(payload),
+					}
+	finally:
+		if pool:
+			pool.terminate()
+		if previous:
+			previous.close()
+
+	# os.rename won't overwrite an existing file on windows
+	if sys.platform == "win32" and os.path.exists(archivePath):
+		os.remove(archivePath)
+	os.rename(tmpPath, archivePath)
+
+	if incremental:
+		st = os.stat(archivePath)
+		with open(manifestPath(archivePath), "w") as f:
+			json.dump({
+				"version": MANIFEST_VERSION,
+				"archiveSize": st.st_size,
+				"archiveMtime": st.st_mtime,
+				"entries": records,
+			}, f, indent=1, sort_keys=True)
+	elif os.path.exists(manifestPath(archivePath)):
+		# a clean build invalidates any previous manifest
+		os.remove(manifestPath(archivePath))
+
+	return stats
+
+def formatCompressionReport(stats):
+	"""
+	describe, for each compression rule, how much space it saved and how long it took.
+	for rules that store files, the time saved by not deflating them is estimated from
+	the speed of the deflate rules in the same build
+	"""
+
+	lines = []
+	deflated = [
+		r for label, r in stats["rules"].items()
+		if not label.endswith("=store") and r["time"] > 0
+	]
+	deflateRate = None
+	if deflated:
+		# reused files weren't deflated in this build, so they don't count towards the speed
+		deflateRate = (
+			sum(r["size"] - r["reusedSize"] for r in deflated) / sum(r["time"] for r in deflated)
+		)
+
+	for label in sorted(stats["rules"]):
+		r = stats["rules"][label]
+		saved = r["size"] - r["compressSize"]
+		percent = 100.0 * saved / r["size"] if r["size"] else 0.0
+
+		line = "{}: {} file(s), {} -> {} bytes (saved {} bytes, {:.1f}%) in {:.3f}s".format(
+			label, r["files"], r["size"], r["compressSize"], saved, percent, r["time"]
+		)
+		if label.endswith("=store") and deflateRate:
+			line += ", saved ~{:.3f}s of deflating".format((r["size"] - r["reusedSize"]) / deflateRate)
+		if r["reused"]:
+			line += ", {} reused from previous build".format(r["reused"])
+
+		lines.append(line)
+
+	return "\n".join(lines)
+
+def _linkFile(fileName, linkName):
+	# hard links are the cheapest and work with any love build; fall back to
+	# symbolic links across devices, and to copying where neither is allowed
+
+	for link in (getattr(os, "link", None), getattr(os, "symlink", None)):
+		if link:
+			try:
+				link(os.path.abspath(fileName), linkName)
+				return
+			except (OSError, NotImplementedError):
+				pass
+
+	shutil.copy2(fileName, linkName)
+
+def _isStaged(fileName, linkName):
+
+	try:
+		if os.path.samefile(fileName, linkName):
+			return True
+		src, dst = os.stat(fileName), os.lstat(linkName)
+	except OSError:
+		return False
+
+	# a copy is up to date if copy2 preserved the source's size and mtime
+	return (
+		stat.S_ISREG(dst.st_mode) and
+		src.st_size == dst.st_size and int(src.st_mtime) == int(dst.st_mtime)
+	)
+
+def stageDirectory(stagePath, entries):
+	"""
+	lay out the same files as buildArchive, as links in a plain directory that love can
+	run without unpacking anything. an existing staging directory is updated in place:
+	files that still point at their source are left alone, and anything not in entries
+	is removed.
+
+	returns stats: {"linked": number of files (re)linked, "kept": number left alone,
+	"removed": number of stale paths removed}
+	"""
+
+	stats = {"linked": 0, "kept": 0, "removed": 0}
+	wanted = set()
+
+	if not os.path.isdir(stagePath):
+		os.makedirs(stagePath)
+
+	for fileName, arcName in entries:
+		linkName = os.path.join(stagePath, arcName)
+
+		# keep the entry, and every folder leading up to it
+		parent = arcName
+		while parent:
+			wanted.add(os.path.normcase(os.path.normpath(os.path.join(stagePath, parent))))
+			parent = os.path.dirname(parent)
+
+		if os.path.isdir(fileName):
+			if os.path.islink(linkName) or os.path.isfile(linkName):
+				os.remove(linkName)
+			if not os.path.isdir(linkName):
+				os.makedirs(linkName)
+			continue
+
+		if _isStaged(fileName, linkName):
+			stats["kept"] += 1
+			continue
+
+		if os.path.lexists(linkName):
+			if os.path.isdir(linkName) and not os.path.islink(linkName):
+				shutil.rmtree(linkName)
+			else:
+				os.remove(linkName)
+		else:
+			parent = os.path.dirname(linkName)
+			if not os.path.isdir(parent):
+				os.makedirs(parent)
+
+		_linkFile(fileName, linkName)
+		stats["linked"] += 1
+
+	# walk bottom-up, so that stale folders are empty by the time we reach them
+	for pr, dirs, files in os.walk(stagePath, topdown=False):
+		for f in files + dirs:
+			fullName = os.path.join(pr, f)
+			if os.path.normcase(os.path.normpath(fullName)) in wanted:
+				continue
+			if os.path.isdir(fullName) and not os.path.islink(fullName):
+				os.rmdir(fullName)
+			else:
+				os.remove(fullName)
+			stats["removed"] += 1
+
+	return stats
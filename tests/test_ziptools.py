@@ -0,0 +1,79 @@
+from __future__ import unicode_literals
+import os, shutil, zipfile, tempfile, unittest
+from lass import ziptools
+
+class BuildArchiveTest(unittest.TestCase):
+
+	def setUp(self):
+
+		self.dir = tempfile.mkdtemp()
+		self.src = os.path.join(self.dir, "src")
+		os.makedirs(os.path.join(self.src, "sub"))
+
+		self.entries = [(os.path.join(self.src, "sub"), "sub")]
+		for i, (name, data) in enumerate([
+			("main.lua", b"print('hello')\n" * 200),
+			("sub/image.png", os.urandom(4096)),
+			("sub/empty.txt", b""),
+		]):
+			fileName = os.path.join(self.src, name)
+			with open(fileName, "wb") as f:
+				f.write(data)
+			self.entries.append((fileName, name))
+
+		self.archivePath = os.path.join(self.dir, "game.love")
+
+	def tearDown(self):
+		shutil.rmtree(self.dir)
+
+	def assertArchiveValid(self):
+
+		with zipfile.ZipFile(self.archivePath) as archive:
+			self.assertIsNone(archive.testzip())
+			self.assertEqual(
+				sorted(archive.namelist()),
+				["main.lua", "sub/", "sub/empty.txt", "sub/image.png"]
+			)
+			for fileName, arcName in self.entries[1:]:
+				with open(fileName, "rb") as f:
+					self.assertEqual(archive.read(arcName), f.read())
+
+	def buildTwice(self):
+
+		stats = ziptools.buildArchive(self.archivePath, self.entries, incremental=True, workers=2)
+		self.assertEqual(stats["written"], 3)
+		self.assertArchiveValid()
+
+		with open(self.archivePath, "rb") as f:
+			first = f.read()
+
+		stats = ziptools.buildArchive(self.archivePath, self.entries, incremental=True, workers=2)
+		self.assertArchiveValid()
+
+		with open(self.archivePath, "rb") as f:
+			self.assertEqual(f.read(), first)
+
+		return stats
+
+	def testRawWrite(self):
+
+		if not ziptools.canWriteRaw():
+			self.skipTest("compressed members can't be written as they are in this python")
+
+		stats = self.buildTwice()
+		self.assertEqual(stats["reused"], 3)
+
+	def testWritestrFallback(self):
+
+		versions = ziptools.RAW_WRITE_VERSIONS
+		ziptools.RAW_WRITE_VERSIONS = ((0, 0), (0, 0))
+		try:
+			stats = self.buildTwice()
+		finally:
+			ziptools.RAW_WRITE_VERSIONS = versions
+
+		# without payload offsets, nothing can be reused
+		self.assertEqual(stats["reused"], 0)
+
+if __name__ == "__main__":
+	unittest.main()